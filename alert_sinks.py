@@ -0,0 +1,256 @@
+"""
+告警输出插件
+
+计时器的开始、停止、预警和完成事件会发布给所有 AlertSink。
+每个输出在自己的后台线程中执行，并且有自己的队列上限和超时，
+慢的或卡住的输出只会丢弃自己的事件，不会拖慢计时器或其他输出。
+
+新增输出类型：继承 AlertSink 实现 handle()，再用 register_sink_type() 注册，
+就可以在 tasks_config.json 的 settings.alert_sinks 中使用。
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+EVENT_START = 'start'
+EVENT_STOP = 'stop'
+EVENT_WARNING = 'warning'  # 即将冷却完毕 (提前 alert_lead_seconds 秒)
+EVENT_FINISH = 'finish'
+ALERT_EVENTS = (EVENT_START, EVENT_STOP, EVENT_WARNING, EVENT_FINISH)
+
+
+class AlertEvent:
+    """告警事件"""
+    __slots__ = ('kind', 'task_id', 'name', 'remaining', 'time', 'created')
+
+    def __init__(self, kind, task_id, name, remaining=0.0, wall=None):
+        self.kind = kind
+        self.task_id = task_id
+        self.name = name
+        self.remaining = remaining  # 剩余冷却时间 (秒)
+        self.time = time.time() if wall is None else wall  # 墙上时间，给输出使用
+        self.created = time.monotonic()  # 用于判断事件是否已经过期
+
+    def to_dict(self):
+        return {
+            'event': self.kind,
+            'task_id': self.task_id,
+            'name': self.name,
+            'remaining': round(self.remaining, 3),
+            'time': self.time,
+        }
+
+
+class AlertSink:
+    """告警输出基类
+
+    handle() 在后台线程中调用，同一个输出的事件按顺序逐个处理。
+    timeout: 单次处理的时间上限，也是事件在队列中等待的最长时间
+    queue_limit: 等待处理的事件数上限，超出时丢弃新事件
+    kinds: 关心的事件类型，默认全部
+    """
+
+    def __init__(self, name=None, timeout=2.0, queue_limit=16, kinds=None):
+        self.name = name or type(self).__name__
+        self.timeout = timeout
+        self.queue_limit = queue_limit
+        self.kinds = frozenset(kinds or ALERT_EVENTS)
+
+    def handle(self, alert):
+        raise NotImplementedError
+
+    def close(self):
+        """释放资源"""
+
+
+class FileSink(AlertSink):
+    """把事件以 JSON 行追加到文件"""
+
+    def __init__(self, path, **options):
+        super().__init__(**options)
+        self.path = path
+
+    def handle(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert.to_dict(), ensure_ascii=False) + "\n")
+
+
+class TextSink(AlertSink):
+    """用最新事件覆盖写入一个文本文件 (例如作为 OBS 的文本源)"""
+
+    TEMPLATES = {
+        EVENT_START: "{name} 冷却中",
+        EVENT_STOP: "{name} 已停止",
+        EVENT_WARNING: "{name} {remaining:.0f} 秒后就绪",
+        EVENT_FINISH: "{name} 已就绪",
+    }
+
+    def __init__(self, path, templates=None, **options):
+        super().__init__(**options)
+        self.path = path
+        self.templates = {**self.TEMPLATES, **(templates or {})}
+
+    def handle(self, alert):
+        text = self.templates[alert.kind].format(**alert.to_dict())
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+class WebhookSink(AlertSink):
+    """以 JSON POST 到指定地址 (例如本地的灯光或直播工具)"""
+
+    def __init__(self, url, **options):
+        super().__init__(**options)
+        self.url = url
+
+    def handle(self, alert):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert.to_dict(), ensure_ascii=False).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+# 配置中可用的输出类型 {type: 类}
+SINK_TYPES = {
+    'file': FileSink,
+    'text': TextSink,
+    'webhook': WebhookSink,
+}
+
+
+def register_sink_type(type_name, sink_class):
+    """注册新的输出类型"""
+    SINK_TYPES[type_name] = sink_class
+
+
+def create_sink(spec):
+    """根据配置创建输出，例如 {"type": "file", "path": "alerts.jsonl"}"""
+    options = dict(spec)
+    type_name = options.pop('type', None)
+    sink_class = SINK_TYPES.get(type_name)
+    if sink_class is None:
+        raise ValueError(f"未知的告警输出类型: {type_name}")
+    return sink_class(**options)
+
+
+class _SinkState:
+    """单个输出的队列、工作线程和统计"""
+    __slots__ = ('sink', 'pending', 'wakeup', 'thread', 'busy_since', 'stats')
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = deque()
+        self.wakeup = threading.Event()  # 有新事件或需要退出
+        self.thread = None
+        self.busy_since = None  # 正在执行 handle() 的开始时间
+        self.stats = {'delivered': 0, 'dropped': 0, 'expired': 0, 'timeouts': 0, 'errors': 0}
+
+
+class AlertDispatcher:
+    """把告警事件分发给所有输出
+
+    publish() 只把事件放进各输出的队列，立即返回。
+    每个输出有自己的工作线程，卡住的输出 (网络不通、文件共享被锁住等) 只占用自己的线程，
+    不会影响其他输出；卡住超过 timeout 期间它的新事件直接丢弃。
+    """
+
+    def __init__(self, sinks=()):
+        self.states = []
+        self.lock = threading.Lock()
+        self.closed = False
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink):
+        """添加输出并启动它的工作线程"""
+        state = _SinkState(sink)
+        state.thread = threading.Thread(target=self._worker, args=(state,),
+                                        name=f"alert-sink-{sink.name}", daemon=True)
+        with self.lock:
+            self.states.append(state)
+        state.thread.start()
+
+    def publish(self, alert):
+        """发布事件 (不阻塞)"""
+        now = time.monotonic()
+        with self.lock:
+            for state in self.states:
+                sink = state.sink
+                if alert.kind not in sink.kinds:
+                    continue
+                if state.busy_since is not None and now - state.busy_since > sink.timeout:
+                    state.stats['timeouts'] += 1
+                    continue
+                if len(state.pending) >= sink.queue_limit:
+                    state.stats['dropped'] += 1
+                    continue
+                state.pending.append(alert)
+                state.wakeup.set()
+
+    def _worker(self, state):
+        """工作线程：按顺序处理一个输出的事件"""
+        while True:
+            state.wakeup.wait()
+            state.wakeup.clear()
+            if self.closed:
+                break
+            self._drain(state)
+
+    def _drain(self, state):
+        sink = state.sink
+        while True:
+            with self.lock:
+                if not state.pending or self.closed:
+                    return
+                alert = state.pending.popleft()
+                now = time.monotonic()
+                if now - alert.created > sink.timeout:
+                    state.stats['expired'] += 1  # 过时的提醒没有意义
+                    continue
+                state.busy_since = now
+
+            try:
+                sink.handle(alert)
+                result = 'delivered'
+            except Exception as e:
+                result = 'errors'
+                logger.warning("告警输出 %s 失败: %s", sink.name, e,
+                               extra=event('alert_sink_failed', alert.task_id, sink=sink.name))
+
+            with self.lock:
+                elapsed = time.monotonic() - state.busy_since
+                state.busy_since = None
+                state.stats[result] += 1
+                if elapsed > sink.timeout:
+                    state.stats['timeouts'] += 1
+
+    def get_stats(self):
+        """各输出的统计 {名称: {...}}"""
+        with self.lock:
+            return {
+                state.sink.name: dict(state.stats, pending=len(state.pending))
+                for state in self.states
+            }
+
+    def shutdown(self):
+        """停止工作线程并关闭输出 (不等待卡住的输出)"""
+        with self.lock:
+            self.closed = True
+            states = list(self.states)
+        for state in states:
+            state.wakeup.set()
+            try:
+                state.sink.close()
+            except Exception:
+                pass
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷却效率分析基准测试
+生成一周的会话历史 (每天一次 4 小时的团本，20 个技能)，测量读取文件和计算统计的耗时
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+from cooldown_analytics import CooldownAnalytics
+from session_history import read_session_history
+
+DAYS = 7
+SESSION_HOURS = 4
+TASKS = 20
+
+
+def make_history(rng):
+    """按技能冷却模拟使用：就绪后随机延迟 0~20 秒再次使用，偶尔提前停止"""
+    records = []
+    for day in range(DAYS):
+        start = 1700000000.0 + day * 86400
+        end = start + SESSION_HOURS * 3600
+        records.append((start, 'open', None))
+        for k in range(TASKS):
+            task_id = f"task-{k}"
+            duration = rng.choice([10, 20, 30, 60, 90, 120])
+            t = start + rng.uniform(0, 30)
+            while t < end:
+                records.append((t, 'start', task_id))
+                if rng.random() < 0.05:
+                    t += rng.uniform(1, duration)
+                    records.append((t, 'stop', task_id))
+                else:
+                    t += duration
+                    records.append((t, 'finish', task_id))
+                t += rng.expovariate(1 / 5.0)
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def main():
+    rng = random.Random(42)
+    records = make_history(rng)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session_history.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for t, kind, task_id in records:
+                f.write(json.dumps({'t': t, 'event': kind, 'task_id': task_id}) + "\n")
+
+        start = time.perf_counter()
+        loaded = read_session_history(path)
+        read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analytics = CooldownAnalytics(loaded)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = analytics.all_metrics()
+    metrics_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analytics.overlap([f"task-{k}" for k in range(5)])
+    overlap_time = time.perf_counter() - start
+
+    uses = sum(item['uses'] for item in metrics.values())
+    print(f"事件数: {len(loaded)}，使用次数: {uses}，统计时长: {analytics.span / 3600:.0f} 小时")
+    print(f"读取文件: {read_time * 1000:8.1f} ms")
+    print(f"构建数组: {build_time * 1000:8.1f} ms")
+    print(f"技能统计: {metrics_time * 1000:8.1f} ms")
+    print(f"重叠分析: {overlap_time * 1000:8.1f} ms (5 个技能)")
+
+
+if __name__ == "__main__":
+    main()
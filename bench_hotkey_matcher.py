@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热键匹配器基准测试
+重放随机按键序列，测量不同绑定数量下每次按键的匹配耗时
+"""
+
+import random
+import string
+import time
+from hotkey_matcher import HotkeyMatcher, MOD_CTRL, MOD_SHIFT, MOD_ALT
+
+KEYS = list(string.ascii_lowercase + string.digits) + [f'f{i}' for i in range(1, 13)]
+MODS = [0, MOD_CTRL, MOD_SHIFT, MOD_ALT, MOD_CTRL | MOD_SHIFT, MOD_CTRL | MOD_ALT]
+MOD_NAMES = {MOD_CTRL: 'ctrl', MOD_SHIFT: 'shift', MOD_ALT: 'alt'}
+
+
+def make_hotkey(rng, sequence=False):
+    """生成一个随机热键"""
+    def step():
+        mods = rng.choice(MODS)
+        names = [name for bit, name in MOD_NAMES.items() if mods & bit]
+        return '+'.join(names + [rng.choice(KEYS)])
+
+    if sequence:
+        return f"{step()}, {step()}"
+    return step()
+
+
+def build_matcher(count, rng):
+    """生成 count 个绑定 (单步组合键只有几百种，其余为两步序列)"""
+    bindings = {}
+    while len(bindings) < count:
+        sequence = len(bindings) >= 100 or len(bindings) % 2 == 1
+        bindings[make_hotkey(rng, sequence)] = f"task-{len(bindings)}"
+    return HotkeyMatcher(bindings)
+
+
+def replay(matcher, events):
+    """重放按键事件，返回匹配次数"""
+    feed = matcher.feed
+    matched = 0
+    for mods, key, timestamp in events:
+        if feed(mods, key, timestamp) is not None:
+            matched += 1
+    return matched
+
+
+def main():
+    rng = random.Random(42)
+    events = [(rng.choice(MODS), rng.choice(KEYS), i * 0.05) for i in range(500000)]
+
+    print(f"{'绑定数':>8} {'按键数':>8} {'匹配数':>8} {'ns/按键':>10}")
+    for count in (10, 100, 1000, 10000):
+        matcher = build_matcher(count, rng)
+        start = time.perf_counter()
+        matched = replay(matcher, events)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>8} {len(events):>8} {matched:>8} {elapsed / len(events) * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务包导入 / 导出基准测试
+测量 5000 个任务的导出、整批验证导入 (.json / .csv)，并与逐个 add_task 对比
+"""
+
+import os
+import tempfile
+import time
+from config_manager import ConfigManager
+
+COUNT = 5000
+
+
+def make_tasks(count):
+    return [{
+        'name': f'技能{i}',
+        'duration': 60,
+        'hotkey_enabled': True,
+        'hotkey': f'ctrl+alt+{i}',
+        'popup_reminder': True,
+        'voice_reminder': True,
+        'custom_voice': ''
+    } for i in range(count)]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    source = ConfigManager(None, make_tasks(COUNT))
+    print(f"{COUNT} 个任务")
+    with tempfile.TemporaryDirectory() as directory:
+        for ext in ('json', 'csv'):
+            path = os.path.join(directory, f"pack.{ext}")
+            export_seconds, _ = timed(lambda: source.export_tasks(path))
+            target = ConfigManager(None, [])
+            import_seconds, (count, errors) = timed(lambda: target.import_tasks(path))
+            assert count == COUNT and not errors, errors
+            print(f".{ext:<5} 导出 {export_seconds * 1000:7.1f} ms, 导入 {import_seconds * 1000:7.1f} ms")
+
+    # 对比：逐个验证并添加 (每次都扫描全部任务检查热键冲突)
+    count = COUNT // 5
+    target = ConfigManager(None, [])
+    seconds, _ = timed(lambda: [target.validate_task(task) or target.add_task(task) for task in make_tasks(count)])
+    print(f"逐个 add_task {count} 个任务: {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+战斗日志触发基准测试
+生成一份较大的战斗日志，分别用合并正则和逐任务匹配重放，测量每行的匹配耗时，
+并测量从文件增量读取 + 匹配的整体吞吐量
+"""
+
+import os
+import random
+import re
+import tempfile
+import time
+from log_trigger import LogPatternMatcher, LogTailer, compile_log_pattern
+
+ACTORS = ['你', '队友甲', '队友乙', '敌方首领', '小怪']
+VERBS = ['施放了', '受到了', '获得了', '失去了']
+LINES = 200000
+
+
+def make_skills(count):
+    return [f"技能{i:05d}" for i in range(count)]
+
+
+def make_log(skills, rng):
+    """生成日志行，大约 5% 的行包含已绑定的技能"""
+    lines = []
+    for i in range(LINES):
+        skill = rng.choice(skills) if rng.random() < 0.05 else f"无关效果{rng.randrange(100000)}"
+        lines.append(f"[{i // 1000:02d}:{i % 60:02d}.{i % 1000:03d}] {rng.choice(ACTORS)} "
+                     f"{rng.choice(VERBS)} 「{skill}」 造成 {rng.randrange(1, 99999)} 点伤害")
+    return lines
+
+
+def replay_combined(matcher, lines):
+    match = matcher.match
+    return sum(len(match(line)) for line in lines)
+
+
+def replay_per_task(patterns, lines):
+    """对照：每行对每个任务的规则单独匹配"""
+    compiled = [(re.compile(compile_log_pattern(pattern)), task_id) for pattern, task_id in patterns]
+    matched = 0
+    for line in lines:
+        for regex, _ in compiled:
+            if regex.search(line):
+                matched += 1
+    return matched
+
+
+def bench_tail(matcher, lines):
+    """写入临时文件，用 LogTailer 分块读取并匹配"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "combat.log")
+        open(path, 'w', encoding='utf-8').close()
+        tailer = LogTailer(path, from_end=False)
+
+        start = time.perf_counter()
+        matched = 0
+        with open(path, 'a', encoding='utf-8') as f:
+            for i in range(0, len(lines), 5000):
+                f.write("\n".join(lines[i:i + 5000]) + "\n")
+                f.flush()
+                for line in tailer.read_lines():
+                    matched += len(matcher.match(line))
+        elapsed = time.perf_counter() - start
+        tailer.close()
+    return matched, elapsed
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'规则数':>8} {'行数':>8} {'匹配数':>8} {'合并 ns/行':>12} {'逐个 ns/行':>12} {'读取+匹配 ns/行':>16}")
+    for count in (10, 100, 1000):
+        skills = make_skills(count)
+        lines = make_log(skills, rng)
+        patterns = [(f"施放了 「{skill}」", skill) for skill in skills]
+        matcher = LogPatternMatcher(patterns)
+
+        start = time.perf_counter()
+        matched = replay_combined(matcher, lines)
+        combined = time.perf_counter() - start
+
+        per_task_lines = lines if count <= 100 else lines[:LINES // 10]
+        start = time.perf_counter()
+        replay_per_task(patterns, per_task_lines)
+        per_task = time.perf_counter() - start
+
+        _, tail = bench_tail(matcher, lines)
+
+        print(f"{count:>8} {len(lines):>8} {matched:>8} {combined / len(lines) * 1e9:>12.1f} "
+              f"{per_task / len(per_task_lines) * 1e9:>12.1f} {tail / len(lines) * 1e9:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
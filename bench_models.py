@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务数据结构基准测试
+比较字典任务与 __slots__ 任务的内存占用，以及每次界面刷新调用 get_tasks() 的内存分配
+"""
+
+import tracemalloc
+import uuid
+from config_manager import ConfigManager
+from models import Task, TimerState
+
+COUNT = 10000
+TICKS = 1000
+
+
+def make_dicts(count):
+    """旧格式的任务字典"""
+    return [{
+        'id': str(uuid.uuid4()),
+        'name': f'技能{i}',
+        'duration': 60,
+        'hotkey_enabled': True,
+        'hotkey': f'ctrl+{i}',
+        'popup_reminder': True,
+        'voice_reminder': True,
+        'custom_voice': ''
+    } for i in range(count)]
+
+
+def measure(func):
+    """返回 func() 执行期间新增的内存 (字节)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    dicts = make_dicts(COUNT)
+
+    # 任务本身的内存 (不含共享的字符串值)
+    dict_bytes, _ = measure(lambda: [dict(task) for task in dicts])
+    task_bytes, _ = measure(lambda: [Task.from_dict(task) for task in dicts])
+    print(f"每个任务: 字典 {dict_bytes / COUNT:.0f} 字节, Task {task_bytes / COUNT:.0f} 字节")
+
+    # 计时器状态
+    task = Task.from_dict(dicts[0])
+    info_bytes, _ = measure(lambda: [{'task': task, 'duration': 60, 'group': '',
+                                      'charges': 0, 'max_charges': 1} for _ in range(COUNT)])
+    state_bytes, _ = measure(lambda: [TimerState(task) for _ in range(COUNT)])
+    print(f"每个计时器: 字典 {info_bytes / COUNT:.0f} 字节, TimerState {state_bytes / COUNT:.0f} 字节")
+
+    # 每次刷新: 旧实现 get_tasks() 复制列表，新实现返回缓存的快照
+    config_manager = ConfigManager(None, dicts)
+
+    def old_ticks():
+        return [list(dicts) for _ in range(TICKS)]
+
+    def new_ticks():
+        return [config_manager.get_tasks() for _ in range(TICKS)]
+
+    old_bytes, _ = measure(old_ticks)
+    new_bytes, _ = measure(new_ticks)
+    print(f"每次刷新 get_tasks() ({COUNT} 个任务): 旧 {old_bytes / TICKS:.0f} 字节, 新 {new_bytes / TICKS:.0f} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享快照基准测试
+测量不同计时器数量下单次发布和单次读取的耗时，
+以及写入方在另一个进程中持续发布时读取方的吞吐量、重试次数和一致性
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+from timer_snapshot import SnapshotReader, SnapshotWriter, TimerEntry, STATE_RUNNING
+
+ROUNDS = 20000
+DURATION = 2.0
+
+
+def make_entries(count, generation=0.0):
+    return [TimerEntry(f"task{i:03d}", f"技能{i:03d}", time.time() + 30, generation, 30.0, 1.0, STATE_RUNNING)
+            for i in range(count)]
+
+
+def bench_single(path, count):
+    """同一进程内交替发布与读取"""
+    writer = SnapshotWriter(path)
+    reader = SnapshotReader(path)
+    entries = make_entries(count)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        writer.publish(entries)
+    publish = (time.perf_counter() - start) / ROUNDS
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        reader.read()
+    read = (time.perf_counter() - start) / ROUNDS
+
+    reader.close()
+    writer.close()
+    return publish, read
+
+
+def writer_main(path, count, ready, stop):
+    """持续发布，每一代所有槽位的剩余时间相同"""
+    writer = SnapshotWriter(path)
+    ready.set()
+    generation = 0
+    while not stop.is_set():
+        generation += 1
+        writer.publish(make_entries(count, float(generation)))
+    writer.close()
+
+
+def bench_concurrent(path, count):
+    """写入方在子进程中持续发布，主进程读取"""
+    context = multiprocessing.get_context('spawn')
+    ready, stop = context.Event(), context.Event()
+    process = context.Process(target=writer_main, args=(path, count, ready, stop))
+    process.start()
+    ready.wait()
+    reader = SnapshotReader(path)
+
+    reads = torn = updates = 0
+    last_seq = None
+    end = time.perf_counter() + DURATION
+    while time.perf_counter() < end:
+        snapshot = reader.read()
+        reads += 1
+        if len({timer.remaining for timer in snapshot.timers}) > 1:
+            torn += 1
+        if snapshot.seq != last_seq:
+            updates += 1
+            last_seq = snapshot.seq
+
+    stop.set()
+    process.join()
+    retries = reader.retries
+    reader.close()
+    return reads / DURATION, updates / DURATION, retries, torn
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.bin")
+        print(f"{'计时器数':>8} {'发布 µs':>10} {'读取 µs':>10} {'并发读取/秒':>12} {'新快照/秒':>10} {'重试':>8} {'不一致':>8}")
+        for count in (8, 32, 128):
+            publish, read = bench_single(path, count)
+            reads, updates, retries, torn = bench_concurrent(path, count)
+            print(f"{count:>8} {publish * 1e6:>10.1f} {read * 1e6:>10.1f} {reads:>12.0f} {updates:>10.0f} "
+                  f"{retries:>8} {torn:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语音预取基准测试
+测量到期到开始播放的延迟：不预取时到期后才合成语音，预取时到期前已经合成并读入内存。
+安装了 pyttsx3 的 Windows 上使用真实的语音引擎和声卡
+(不预取时以引擎的 started-utterance 事件为准，预取时为交给声卡的时刻)；
+其他平台使用模拟引擎 (合成耗时 SYNTH_SECONDS，首次打开声卡 OPEN_SECONDS)。
+"""
+
+import tempfile
+import time
+from voice_cache import VoiceCache, WINSOUND_AVAILABLE
+from voice_manager import VoiceManager, PYTTSX3_AVAILABLE
+
+ROUNDS = 10
+LEAD = 1.0
+SYNTH_SECONDS = 0.15
+OPEN_SECONDS = 0.03
+
+
+class SimulatedDevice:
+    """模拟声卡：闲置后再次播放需要重新打开"""
+
+    def __init__(self):
+        self.warm_until = 0.0
+
+    def open(self):
+        if time.monotonic() > self.warm_until:
+            time.sleep(OPEN_SECONDS)
+        self.warm_until = time.monotonic() + 5.0
+
+
+class SimulatedEngine:
+    def __init__(self, device):
+        self.device = device
+        self.pending = None
+        self.callbacks = []
+
+    def connect(self, name, callback):
+        self.callbacks.append(callback)
+
+    def say(self, text):
+        self.pending = ('say', text, None)
+
+    def save_to_file(self, text, path):
+        self.pending = ('save', text, path)
+
+    def runAndWait(self):
+        action, text, path = self.pending
+        time.sleep(SYNTH_SECONDS)
+        if action == 'save':
+            with open(path, 'wb') as f:
+                f.write(b'RIFF' + text.encode('utf-8'))
+        else:
+            self.device.open()
+            for callback in self.callbacks:
+                callback(text)
+
+    def stop(self):
+        pass
+
+
+class SimulatedPlayer:
+    def __init__(self, device):
+        self.device = device
+
+    def warm(self):
+        self.device.open()
+
+    def play(self, data):
+        self.device.open()
+
+
+def create_manager(prefetch, directory):
+    if PYTTSX3_AVAILABLE and WINSOUND_AVAILABLE:
+        return VoiceManager(cache=VoiceCache(directory))
+    device = SimulatedDevice()
+    player = SimulatedPlayer(device) if prefetch else None
+    return VoiceManager(engine=SimulatedEngine(device), cache=VoiceCache(directory), player=player)
+
+
+def bench(prefetch):
+    with tempfile.TemporaryDirectory() as directory:
+        manager = create_manager(prefetch, directory)
+        for i in range(ROUNDS):
+            text = f"技能{i} 时间到了"
+            deadline = time.monotonic() + LEAD
+            if prefetch:
+                manager.prefetch(text)
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            manager.speak(text, deadline=deadline)
+            while manager.is_busy():
+                time.sleep(0.01)
+            time.sleep(0.05)
+        manager.cleanup()
+        return manager.get_stats()
+
+
+def main():
+    real = PYTTSX3_AVAILABLE and WINSOUND_AVAILABLE
+    print(f"模式: {'真实语音引擎' if real else '模拟引擎'}, {ROUNDS} 次到期, 提前 {LEAD:.1f} 秒预取")
+    print(f"{'方式':<8}{'命中':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'最大(ms)':>10}")
+    for name, prefetch in (('不预取', False), ('预取', True)):
+        stats = bench(prefetch)
+        kind = 'cached' if stats['cached']['count'] else 'synth'
+        row = stats[kind]
+        print(f"{name:<8}{stats['cached']['count']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    if not real:
+        print("注意：模拟模式不包含真实合成与声卡延迟的差异，只验证预取流程；"
+              "请在安装了 pyttsx3 的 Windows 上测量实际延迟")
+
+
+if __name__ == "__main__":
+    main()
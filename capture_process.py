@@ -0,0 +1,316 @@
+"""
+独立进程中的热键捕获
+
+键盘钩子和热键匹配在一个很小的子进程中运行，不受主进程界面绘制、语音播放或 GIL 占用的影响。
+子进程把匹配到的任务和按键时间写入共享内存环形缓冲区，主进程的读取线程取出后
+交给 TimerManager.on_hotkey_pressed (再经 SPSC 队列到主线程判断开始/停止)。
+
+子进程定期写入心跳，主进程发现心跳超时或子进程退出时自动重启。
+子进程没有配置日志，需要记录的问题 (例如键盘钩子安装失败) 通过命令管道报告给主进程，由主进程写入日志。
+source='synthetic' 时子进程不安装键盘钩子，而是重放给定的按键事件，用于测试。
+"""
+
+import logging
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+# 共享内存布局：头部 64 字节 + 固定大小的槽位
+# 头部：写入序号、读取序号、心跳 (单调时间)、丢弃数
+HEADER = struct.Struct('<QQdQ')
+HEADER_SIZE = 64
+WRITE_OFFSET = 0
+READ_OFFSET = 8
+HEARTBEAT_OFFSET = 16
+DROPPED_OFFSET = 24
+# 槽位：按键时间、绑定代数、任务序号
+SLOT = struct.Struct('<dII')
+U64 = struct.Struct('<Q')
+F64 = struct.Struct('<d')
+
+HEARTBEAT_INTERVAL = 0.2
+HEARTBEAT_TIMEOUT = 2.0
+
+
+class SharedRing:
+    """共享内存中的单生产者单消费者环形缓冲区
+
+    写入方先写槽位再增加写入序号，读取方先读写入序号再读槽位，
+    序号是 8 字节对齐的整数，写入在 x86/ARM64 上不会被读到一半。
+    """
+
+    def __init__(self, name=None, capacity=1024, create=False):
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * SLOT.size
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+
+    def _get(self, offset):
+        return U64.unpack_from(self.buf, offset)[0]
+
+    def _set(self, offset, value):
+        U64.pack_into(self.buf, offset, value)
+
+    def push(self, timestamp, generation, index):
+        """写入一条记录 (生产者)，缓冲区满时丢弃并返回 False"""
+        write = self._get(WRITE_OFFSET)
+        if write - self._get(READ_OFFSET) >= self.capacity:
+            self._set(DROPPED_OFFSET, self._get(DROPPED_OFFSET) + 1)
+            return False
+        SLOT.pack_into(self.buf, HEADER_SIZE + (write % self.capacity) * SLOT.size, timestamp, generation, index)
+        self._set(WRITE_OFFSET, write + 1)
+        return True
+
+    def drain(self):
+        """取出所有记录 (消费者)，返回 [(时间, 代数, 序号)]"""
+        read = self._get(READ_OFFSET)
+        write = self._get(WRITE_OFFSET)
+        records = [
+            SLOT.unpack_from(self.buf, HEADER_SIZE + (i % self.capacity) * SLOT.size)
+            for i in range(read, write)
+        ]
+        self._set(READ_OFFSET, write)
+        return records
+
+    def beat(self):
+        F64.pack_into(self.buf, HEARTBEAT_OFFSET, time.monotonic())
+
+    def heartbeat(self):
+        return F64.unpack_from(self.buf, HEARTBEAT_OFFSET)[0]
+
+    def reset(self):
+        """清空缓冲区 (只在没有子进程运行时调用)"""
+        self.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+
+    def get_stats(self):
+        write, read, _, dropped = HEADER.unpack_from(self.buf, 0)
+        return {'written': write, 'pending': write - read, 'dropped': dropped, 'capacity': self.capacity}
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def capture_main(ring_name, capacity, conn, wakeup, source=None, events=()):
+    """子进程入口
+
+    conn 接收主进程的命令：('bindings', 代数, [(热键, 序号), ...]) 或 ('stop',)，
+    并向主进程发送报告：('hook_failed', 错误信息)
+    """
+    from hotkey_dispatcher import HotkeyDispatcher
+    from hotkey_matcher import HotkeyListener, HotkeyMatcher
+
+    ring = SharedRing(ring_name, capacity)
+    state = {'generation': 0}
+
+    def on_match(index, timestamp):
+        if ring.push(timestamp, state['generation'], index):
+            wakeup.release()
+
+    listener = HotkeyListener(on_match, dispatcher=HotkeyDispatcher())
+
+    def apply(message):
+        if message[0] == 'bindings':
+            _, generation, bindings = message
+            matcher = HotkeyMatcher()
+            for hotkey, index in bindings:
+                try:
+                    matcher.add(hotkey, index)
+                except ValueError:
+                    pass
+            state['generation'] = generation
+            listener.set_matcher(matcher)
+            return True
+        return message[0] != 'stop'
+
+    # 先应用初始绑定再开始捕获
+    if conn.poll(5.0) and not apply(conn.recv()):
+        return
+    if source == 'synthetic':
+        threading.Thread(target=_replay, args=(listener, events), daemon=True).start()
+    else:
+        try:
+            listener.install()
+        except Exception as e:
+            # 安装失败时保持运行 (继续心跳)，避免被反复重启
+            try:
+                conn.send(('hook_failed', f"{type(e).__name__}: {e}"))
+            except (OSError, ValueError):
+                pass
+
+    try:
+        while True:
+            ring.beat()
+            if conn.poll(HEARTBEAT_INTERVAL):
+                if not apply(conn.recv()):
+                    break
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass
+    finally:
+        listener.uninstall()
+        ring.close()
+
+
+def _replay(listener, events):
+    """重放合成按键事件 [(延迟秒数, 'down'/'up', 按键)]"""
+    for delay, event_type, name in events:
+        if delay:
+            time.sleep(delay)
+        listener.handle(event_type, name, time.time())
+
+
+class CaptureProcess:
+    """热键捕获子进程的管理端
+
+    callback(task_id, timestamp) 在读取线程中调用 (通常是 TimerManager.on_hotkey_pressed)。
+    """
+
+    def __init__(self, callback, capacity=1024, source=None, events=(), heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.callback = callback
+        self.source = source
+        self.events = events
+        self.heartbeat_timeout = heartbeat_timeout
+        self.context = multiprocessing.get_context('spawn')
+        self.ring = SharedRing(capacity=capacity, create=True)
+        self.wakeup = self.context.Semaphore(0)
+        self.process = None
+        self.conn = None
+        self.generation = 0
+        self.bindings = {}  # {hotkey: task_id}
+        self.task_lists = {}  # {代数: [task_id, ...]}，用于把序号换回任务ID
+        self.started_at = 0.0
+        self.restarts = 0
+        self.hook_error = None  # 子进程报告的键盘钩子安装错误
+        self.running = False
+        self.reader = None
+        self.lock = threading.Lock()  # 保护子进程与命令管道 (重启在读取线程中进行)
+
+    def set_bindings(self, bindings):
+        """更新热键绑定 {hotkey: task_id}，必要时启动子进程"""
+        self.bindings = dict(bindings)
+        self.generation += 1
+        task_ids = list(self.bindings.values())
+        self.task_lists = {self.generation: task_ids, **{
+            generation: ids for generation, ids in self.task_lists.items() if generation >= self.generation - 2
+        }}
+        if self.process is None:
+            self.start()
+        else:
+            with self.lock:
+                self._send_bindings()
+
+    def _send_bindings(self):
+        message = ('bindings', self.generation, [(hotkey, i) for i, hotkey in enumerate(self.bindings)])
+        try:
+            self.conn.send(message)
+        except (OSError, ValueError):
+            pass  # 子进程已退出，读取线程会重启它
+
+    def start(self):
+        """启动子进程和读取线程"""
+        with self.lock:
+            self._spawn()
+        if self.reader is None:
+            self.running = True
+            self.reader = threading.Thread(target=self._read_loop, name="hotkey-capture-reader", daemon=True)
+            self.reader.start()
+
+    def _spawn(self):
+        self.ring.reset()
+        self.ring.beat()
+        receiver, self.conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=capture_main,
+            args=(self.ring.name, self.ring.capacity, receiver, self.wakeup, self.source, self.events),
+            name="hotkey-capture", daemon=True,
+        )
+        self.process.start()
+        receiver.close()
+        self.started_at = time.monotonic()
+        self._send_bindings()
+
+    def _read_loop(self):
+        """读取线程：等待子进程的唤醒，取出记录；同时检查心跳"""
+        while self.running:
+            self.wakeup.acquire(timeout=HEARTBEAT_INTERVAL)
+            if not self.running:
+                break
+            for timestamp, generation, index in self.ring.drain():
+                task_ids = self.task_lists.get(generation)
+                if task_ids is not None and index < len(task_ids):
+                    self.callback(task_ids[index], timestamp)
+            self._receive_reports()
+            self._check_alive()
+
+    def _receive_reports(self):
+        """读取子进程的报告并写入日志"""
+        with self.lock:
+            try:
+                while self.conn.poll():
+                    report = self.conn.recv()
+                    if report[0] == 'hook_failed':
+                        self.hook_error = report[1]
+                        logger.error("热键捕获进程安装键盘钩子失败: %s", report[1],
+                                     extra=event('capture_hook_failed', error=report[1]))
+            except (EOFError, OSError):
+                pass  # 子进程已退出，_check_alive 会重启它
+
+    def _check_alive(self):
+        """子进程退出或心跳超时时重启"""
+        now = time.monotonic()
+        if now - self.started_at < self.heartbeat_timeout:
+            return  # 子进程还在启动
+        alive = self.process.is_alive()
+        if alive and now - self.ring.heartbeat() < self.heartbeat_timeout:
+            return
+
+        logger.warning("热键捕获进程%s，正在重启", "心跳超时" if alive else "已退出",
+                       extra=event('capture_restart', exitcode=self.process.exitcode))
+        with self.lock:
+            self._terminate()
+            self.restarts += 1
+            self._spawn()
+
+    def _terminate(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(('stop',))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=0.5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.conn.close()
+        self.process = None
+
+    def stop(self):
+        """停止子进程并释放共享内存"""
+        self.running = False
+        self.wakeup.release()
+        if self.reader is not None:
+            self.reader.join(timeout=1.0)
+            self.reader = None
+        with self.lock:
+            self._terminate()
+        self.ring.close(unlink=True)
+
+    def get_stats(self):
+        stats = self.ring.get_stats()
+        stats['restarts'] = self.restarts
+        stats['hook_error'] = self.hook_error
+        stats['alive'] = self.process is not None and self.process.is_alive()
+        return stats
@@ -0,0 +1,109 @@
+import heapq
+import math
+import time
+from PyQt5.QtCore import QTimer, Qt
+
+
+class SystemClock:
+    """系统时钟
+
+    now() 返回单调时间，create_timer() 创建由 QTimer 驱动的单次定时器。
+    """
+
+    def now(self):
+        """单调时间 (秒)"""
+        return time.monotonic()
+
+    def wall(self):
+        """墙上时间 (秒，Unix 时间戳)"""
+        return time.time()
+
+    def create_timer(self, callback):
+        """创建单次定时器"""
+        return _QtTimer(callback)
+
+
+class _QtTimer:
+    """QTimer 包装"""
+
+    def __init__(self, callback):
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(callback)
+
+    def start(self, delay):
+        """delay 秒后触发 (向上取整到毫秒，避免提前触发)"""
+        self.timer.start(max(0, math.ceil(delay * 1000)))
+
+    def stop(self):
+        self.timer.stop()
+
+    def is_active(self):
+        return self.timer.isActive()
+
+
+class ManualClock:
+    """手动推进的时钟 (用于测试)
+
+    时间只在 advance() 时前进，到期的定时器按截止时间顺序触发，
+    截止时间相同的按启动顺序触发，结果完全确定。
+    """
+
+    def __init__(self, start=0.0, wall_offset=1700000000.0):
+        self._now = start
+        self.wall_offset = wall_offset
+        self.heap = []  # [(截止时间, 序号, 定时器, 代数)]
+        self.seq = 0
+
+    def now(self):
+        return self._now
+
+    def wall(self):
+        return self.wall_offset + self._now
+
+    def create_timer(self, callback):
+        return _ManualTimer(self, callback)
+
+    def _schedule(self, timer, deadline):
+        self.seq += 1
+        heapq.heappush(self.heap, (deadline, self.seq, timer, timer.generation))
+
+    def advance(self, seconds):
+        """时间前进 seconds 秒，依次触发到期的定时器"""
+        target = self._now + seconds
+        while self.heap and self.heap[0][0] <= target:
+            deadline, _, timer, generation = heapq.heappop(self.heap)
+            if not timer.active or timer.generation != generation:
+                continue  # 已停止或重新启动过
+            self._now = max(self._now, deadline)
+            timer.active = False
+            timer.callback()
+        self._now = target
+
+    def pending(self):
+        """还在等待触发的定时器数量"""
+        return sum(1 for _, _, timer, generation in self.heap
+                   if timer.active and timer.generation == generation)
+
+
+class _ManualTimer:
+    """ManualClock 的定时器"""
+
+    def __init__(self, clock, callback):
+        self.clock = clock
+        self.callback = callback
+        self.active = False
+        self.generation = 0
+
+    def start(self, delay):
+        self.generation += 1
+        self.active = True
+        self.clock._schedule(self, self.clock.now() + max(0.0, delay))
+
+    def stop(self):
+        self.generation += 1
+        self.active = False
+
+    def is_active(self):
+        return self.active
@@ -1,15 +1,101 @@
+import csv
 import json
+import logging
 import os
 import uuid
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
+from models import Task, TASK_DEFAULTS, TASK_FIELDS
+from event_log import event
+from log_trigger import compile_log_pattern
+from hotkey_dispatcher import MODE_TOGGLE, MODE_RESTART, DEFAULT_RETRIGGER_MS
+from task_chains import ChainGraph, describe_cycle, validate_chain_format, validate_chains
+
+logger = logging.getLogger(__name__)
+
+# 任务默认值
+DEFAULT_TASK = {name: default for name, default in TASK_DEFAULTS if name != 'id'}
+
+# 全局设置默认值 (tasks_config.json 中的 settings)
+DEFAULT_SETTINGS = {
+    'alert_lead_seconds': 0,  # 冷却完毕前多少秒发出预警事件，0 表示不预警
+    'alert_sinks': [],  # 告警输出，例如 [{"type": "file", "path": "alerts.jsonl"}]
+    'combat_log_path': '',  # 战斗日志文件，为空时不启用日志触发
+    'combat_log_encoding': 'utf-8',
+    'session_history_path': 'session_history.jsonl',  # 会话历史文件，为空时不记录
+    'hotkey_capture': 'thread',  # 'process' 时在独立子进程中捕获热键
+    'snapshot_path': '',  # 运行中计时器的共享快照文件，为空时不发布
+    'dashboard_port': 0,  # 网页面板端口，0 表示不启用
+    'dashboard_host': '127.0.0.1',  # 手机等其他设备访问时改为 0.0.0.0
+    'voice_prefetch_seconds': 2,  # 冷却完毕前多少秒预先合成提醒语音，0 表示不预取
+    'stall_threshold_ms': 250,  # 主线程超过多少毫秒无响应时记录调用栈，0 表示不检测
+    'profile_seconds': 10,  # 托盘菜单「性能采样」的采样时长
+    'profile_dir': 'profiles',  # 性能采样文件 (折叠栈) 的保存目录
+}
+
+# 布尔字段 (CSV 中以文本保存)
+BOOL_FIELDS = ('hotkey_enabled', 'popup_reminder', 'voice_reminder')
+
+BOOL_LABELS = {'hotkey_enabled': '启用热键', 'popup_reminder': '弹窗提醒', 'voice_reminder': '语音提醒'}
+
+# 文本字段及其名称 (用于错误信息)
+TEXT_FIELDS = (('hotkey', '热键'), ('group', '冷却分组'), ('shared_cooldown', '共享冷却'),
+               ('log_pattern', '日志匹配规则'), ('custom_voice', '自定义语音'))
+
+
+def parse_bool(value) -> bool:
+    """解析 CSV 中的布尔值"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', '是')
+
+
+def parse_int(value):
+    """解析 CSV 中的整数 (表格软件可能保存为 "300.0")，无法解析时原样返回，交给验证报告错误"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else value
+
 
 class ConfigManager:
-    """配置管理器"""
+    """配置管理器
+    
+    config_file 为 None 时只在内存中保存任务 (用于测试)。
+    任务保存为不可变的 Task，按ID索引；get_tasks() 返回缓存的元组快照，不做复制。
+    """
     
-    def __init__(self, config_file="tasks_config.json"):
+    def __init__(self, config_file="tasks_config.json", tasks=None):
         self.config_file = config_file
-        self.tasks = []
-        self.load_config()
+        self.task_map = {}  # {task_id: Task}，保持任务顺序
+        self._snapshot = ()
+        self.settings = {}  # 只保存配置文件中出现过的设置
+        if config_file is None:
+            self.set_tasks({'id': str(uuid.uuid4()), **task} for task in tasks or [])
+        else:
+            self.load_config()
+    
+    @property
+    def tasks(self):
+        """所有任务的只读快照"""
+        return self._snapshot
+    
+    def set_tasks(self, tasks):
+        """替换全部任务 (接受 Task 或字典)"""
+        self.task_map = {}
+        for task in tasks:
+            if not isinstance(task, Task):
+                task = Task.from_dict(task)
+            self.task_map[task.id] = task
+        self._refresh_snapshot()
+    
+    def _refresh_snapshot(self):
+        """任务变化后重建快照"""
+        self._snapshot = tuple(self.task_map.values())
     
     def load_config(self):
         """加载配置文件"""
@@ -17,17 +103,19 @@ class ConfigManager:
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.tasks = data.get('tasks', [])
+                    tasks = data.get('tasks', [])
+                    self.settings = data.get('settings', {})
                     
                     # 确保每个任务都有ID
-                    for task in self.tasks:
+                    for task in tasks:
                         if 'id' not in task:
                             task['id'] = str(uuid.uuid4())
+                    self.set_tasks(tasks)
                     
-                    print(f"加载了 {len(self.tasks)} 个任务")
+                    logger.info("加载了 %d 个任务", len(self.tasks), extra=event('config_load', count=len(self.tasks)))
             except Exception as e:
-                print(f"加载配置文件失败: {e}")
-                self.tasks = []
+                logger.error("加载配置文件失败: %s", e, extra=event('config_load_failed'))
+                self.set_tasks([])
         else:
             # 创建默认配置
             self.create_default_config()
@@ -57,60 +145,63 @@ class ConfigManager:
             }
         ]
         
-        self.tasks = default_tasks
+        self.set_tasks(default_tasks)
         self.save_config()
-        print("创建了默认配置")
+        logger.info("创建了默认配置", extra=event('config_default'))
     
     def save_config(self):
         """保存配置文件"""
+        if self.config_file is None:
+            return
+        
         try:
             config_data = {
-                'tasks': self.tasks,
+                'tasks': [task.to_dict() for task in self._snapshot],
                 'version': '2.0'
             }
+            if self.settings:
+                config_data['settings'] = self.settings
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
+            # 先写临时文件再替换，避免写到一半的文件被读取
+            temp_file = self.config_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_file, self.config_file)
             
-            print("配置已保存")
+            logger.info("配置已保存", extra=event('config_save', count=len(self._snapshot)))
         except Exception as e:
-            print(f"保存配置文件失败: {e}")
+            logger.error("保存配置文件失败: %s", e, extra=event('config_save_failed'))
+    
+    def get_setting(self, key):
+        """获取全局设置"""
+        return self.settings.get(key, DEFAULT_SETTINGS.get(key))
+    
+    def get_tasks(self) -> Tuple[Task, ...]:
+        """获取所有任务 (不可变快照)"""
+        return self._snapshot
     
-    def get_tasks(self) -> List[Dict]:
-        """获取所有任务"""
-        return self.tasks.copy()
+    def replace_tasks(self, tasks: List[Task]):
+        """替换内存中的任务列表 (用于外部修改配置文件后的热加载，不写回文件)"""
+        self.set_tasks(tasks)
     
-    def get_task_by_id(self, task_id: str) -> Optional[Dict]:
+    def get_task_by_id(self, task_id: str) -> Optional[Task]:
         """根据ID获取任务"""
-        for task in self.tasks:
-            if task['id'] == task_id:
-                return task.copy()
-        return None
+        return self.task_map.get(task_id)
     
     def add_task(self, task_data: Dict):
         """添加任务"""
         # 生成新的ID
         task_data['id'] = str(uuid.uuid4())
         
-        # 设置默认值
-        default_task = {
-            'name': '',
-            'duration': 60,
-            'hotkey_enabled': True,
-            'hotkey': '',
-            'popup_reminder': True,
-            'voice_reminder': True,
-            'custom_voice': ''
-        }
-        
-        # 合并数据
-        new_task = {**default_task, **task_data}
-        
-        self.tasks.append(new_task)
+        # 合并默认值
+        new_task = Task.from_dict({**DEFAULT_TASK, **task_data})
+        
+        self.task_map[new_task.id] = new_task
+        self._refresh_snapshot()
         self.save_config()
         
-        print(f"添加任务: {new_task['name']}")
-        return new_task['id']
+        logger.info("添加任务: %s", new_task.name, extra=event('task_add', new_task.id))
+        return new_task.id
     
     def update_task(self, task_data: Dict):
         """更新任务"""
@@ -118,64 +209,104 @@ class ConfigManager:
         if not task_id:
             return False
         
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                # 保留ID，更新其他数据
-                updated_task = {**task, **task_data}
-                updated_task['id'] = task_id
-                self.tasks[i] = updated_task
-                self.save_config()
-                
-                print(f"更新任务: {updated_task['name']}")
-                return True
+        task = self.task_map.get(task_id)
+        if task is None:
+            return False
+        
+        # 保留ID，更新其他数据
+        changes = {key: value for key, value in task_data.items() if key != 'id'}
+        updated_task = task.replace(**changes)
+        self.task_map[task_id] = updated_task
+        self._refresh_snapshot()
+        self.save_config()
         
-        return False
+        logger.info("更新任务: %s", updated_task.name, extra=event('task_update', updated_task.id))
+        return True
     
     def delete_task(self, task_id: str):
         """删除任务"""
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                deleted_task = self.tasks.pop(i)
-                self.save_config()
-                
-                print(f"删除任务: {deleted_task['name']}")
-                return True
+        deleted_task = self.task_map.pop(task_id, None)
+        if deleted_task is None:
+            return False
         
-        return False
+        self._refresh_snapshot()
+        self.save_config()
+        
+        logger.info("删除任务: %s", deleted_task.name, extra=event('task_delete', deleted_task.id))
+        return True
     
     def clear_all_tasks(self):
         """清空所有任务"""
-        task_count = len(self.tasks)
-        self.tasks = []
+        task_count = len(self.task_map)
+        self.set_tasks([])
         self.save_config()
         
-        print(f"已清空所有任务，共删除 {task_count} 个任务")
+        logger.info("已清空所有任务，共删除 %d 个任务", task_count, extra=event('task_clear', count=task_count))
         return task_count
     
-    def get_task_by_hotkey(self, hotkey: str) -> Optional[Dict]:
+    def get_task_by_hotkey(self, hotkey: str) -> Optional[Task]:
         """根据热键获取任务"""
-        for task in self.tasks:
-            if (task.get('hotkey_enabled', False) and 
-                task.get('hotkey', '').lower() == hotkey.lower()):
-                return task.copy()
+        for task in self._snapshot:
+            if task.hotkey_enabled and task.hotkey.lower() == hotkey.lower():
+                return task
         return None
     
-    def validate_task(self, task_data: Dict) -> List[str]:
-        """验证任务数据"""
+    def validate_fields(self, task_data: Dict) -> List[str]:
+        """验证任务字段 (不含热键冲突)"""
         errors = []
         
         # 检查必填字段
-        if not task_data.get('name', '').strip():
+        name = task_data.get('name', '')
+        if not isinstance(name, str) or not name.strip():
             errors.append("任务名称不能为空")
         
         # 检查倒计时时间
         duration = task_data.get('duration', 0)
-        if not isinstance(duration, int) or duration <= 0:
+        if not isinstance(duration, int) or isinstance(duration, bool) or duration <= 0:
             errors.append("倒计时必须是正整数")
         
+        # 检查充能层数
+        charges = task_data.get('charges', 1)
+        if not isinstance(charges, int) or isinstance(charges, bool) or charges <= 0:
+            errors.append("充能层数必须是正整数")
+        
+        # 检查热键模式和最小触发间隔
+        hotkey_mode = task_data.get('hotkey_mode', MODE_TOGGLE)
+        if not isinstance(hotkey_mode, str) or hotkey_mode not in (MODE_TOGGLE, MODE_RESTART):
+            errors.append(f"热键模式无效: {hotkey_mode}")
+        retrigger_ms = task_data.get('retrigger_ms', DEFAULT_RETRIGGER_MS)
+        if not isinstance(retrigger_ms, int) or isinstance(retrigger_ms, bool) or retrigger_ms < 0:
+            errors.append("最小触发间隔必须是非负整数")
+        
+        # 检查字段类型 (外部文件中可能写成数字等)
+        for field, label in TEXT_FIELDS:
+            if not isinstance(task_data.get(field, ''), str):
+                errors.append(f"{label}必须是文本")
+        for field in BOOL_FIELDS:
+            if not isinstance(task_data.get(field, False), bool):
+                errors.append(f"{BOOL_LABELS[field]}必须是 true 或 false")
+        
+        # 检查战斗日志匹配规则
+        log_pattern = task_data.get('log_pattern', '')
+        if log_pattern and isinstance(log_pattern, str):
+            try:
+                compile_log_pattern(log_pattern)
+            except ValueError as e:
+                errors.append(str(e))
+        
+        # 检查联动规则格式
+        errors.extend(validate_chain_format(task_data.get('chains')))
+        
+        return errors
+    
+    def validate_task(self, task_data: Dict) -> List[str]:
+        """验证任务数据"""
+        errors = self.validate_fields(task_data)
+        
         # 检查热键冲突
-        if task_data.get('hotkey_enabled', False):
-            hotkey = task_data.get('hotkey', '').strip()
+        hotkey = task_data.get('hotkey', '')
+        if task_data.get('hotkey_enabled', False) and isinstance(hotkey, str):
+            hotkey = hotkey.strip()
             if hotkey:
                 current_id = task_data.get('id')
                 for task in self.tasks:
@@ -185,4 +316,215 @@ class ConfigManager:
                         errors.append(f"热键 '{hotkey}' 已被任务 '{task['name']}' 使用")
                         break
         
-        return errors
\ No newline at end of file
+        # 检查联动目标和循环
+        if not errors and task_data.get('chains'):
+            errors.extend(validate_chains(task_data, self.tasks))
+        
+        return errors
+    
+    def claim_hotkey(self, task_data: Dict, hotkey_owners: Dict[str, str]) -> Optional[str]:
+        """在热键索引 {小写热键: 任务名称} 中登记任务的热键，已被占用时返回错误信息"""
+        hotkey = task_data.get('hotkey', '')
+        if not task_data.get('hotkey_enabled', False) or not isinstance(hotkey, str):
+            return None
+        hotkey = hotkey.strip()
+        if not hotkey:
+            return None
+        owner = hotkey_owners.get(hotkey.lower())
+        if owner is not None:
+            return f"热键 '{hotkey}' 已被任务 '{owner}' 使用"
+        hotkey_owners[hotkey.lower()] = task_data.get('name', '')
+        return None
+    
+    def validate_tasks(self, tasks: List[Dict]) -> List[Tuple[int, str]]:
+        """批量验证任务，返回整批的错误列表 [(序号, 错误信息)]"""
+        errors = []
+        
+        # 热键索引只构建一次 {热键: 任务名称}
+        hotkey_owners = {}
+        for task in self.tasks:
+            if task.get('hotkey_enabled', False) and task.get('hotkey', ''):
+                hotkey_owners[task['hotkey'].lower()] = task['name']
+        
+        for index, task_data in enumerate(tasks):
+            for error in self.validate_fields(task_data):
+                errors.append((index, error))
+            
+            conflict = self.claim_hotkey(task_data, hotkey_owners)
+            if conflict:
+                errors.append((index, conflict))
+        
+        # 联动规则：整批加入后不能有缺失的目标或循环
+        if not errors and any(task_data.get('chains') for task_data in tasks):
+            merged = list(self.tasks) + list(tasks)
+            graph = ChainGraph(merged)
+            positions = {task_data.get('id'): index for index, task_data in enumerate(tasks)}
+            for source, _ in graph.missing_targets():
+                errors.append((positions.get(source, -1), "联动规则的目标任务不存在"))
+            cycle = graph.find_cycle()
+            if cycle:
+                errors.append((-1, f"联动规则形成循环: {describe_cycle(cycle, merged)}"))
+        
+        return errors
+    
+    def validate_reloaded_tasks(self, tasks: List[Task]) -> Tuple[List[Task], List[Tuple[Task, str]]]:
+        """检查外部修改后重新加载的任务
+        
+        字段无效或热键与其他任务重复的任务不应用：已有的任务保留修改前的版本，新增的任务跳过。
+        热键冲突时未修改的任务优先，其次是保留修改前版本的任务，最后按顺序检查修改和新增的任务。
+        返回 (可以应用的任务列表, 错误列表 [(任务, 错误信息)])
+        """
+        hotkey_owners = {}
+        results = {}  # {序号: 应用的任务或 None}
+        errors = []  # [(序号, 任务, 错误信息)]
+        edited = []  # 字段有效的修改和新增任务的序号
+        
+        for index, task in enumerate(tasks):
+            if self.task_map.get(task['id']) == task:
+                self.claim_hotkey(task, hotkey_owners)
+                results[index] = task
+        
+        for index, task in enumerate(tasks):
+            if index in results:
+                continue
+            task_errors = self.validate_fields(task)
+            if task_errors:
+                errors.extend((index, task, error) for error in task_errors)
+                results[index] = self.task_map.get(task['id'])
+                if results[index] is not None:
+                    self.claim_hotkey(results[index], hotkey_owners)
+            else:
+                edited.append(index)
+        
+        for index in edited:
+            task = tasks[index]
+            conflict = self.claim_hotkey(task, hotkey_owners)
+            if conflict is None:
+                results[index] = task
+                continue
+            errors.append((index, task, conflict))
+            results[index] = self.task_map.get(task['id'])
+            if results[index] is not None:
+                self.claim_hotkey(results[index], hotkey_owners)
+        
+        valid = [results[index] for index in range(len(tasks)) if results[index] is not None]
+        errors.sort(key=lambda item: item[0])
+        return valid, [(task, error) for _, task, error in errors]
+    
+    def iter_task_file(self, file_path: str) -> Iterator[Dict]:
+        """逐条读取任务包文件 (.json / .jsonl / .csv)
+        
+        .jsonl 和 .csv 逐行读取；.json 是一个整体文档，需要整个读入后再逐条返回，
+        很大的任务包建议使用 .jsonl 或 .csv。条目不一定是字典，由调用者检查。
+        格式错误时抛出 ValueError。
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        
+        if ext == '.csv':
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    # 空单元格按缺省处理；保留ID列，用于改写联动规则的目标
+                    task = {key: value for key, value in row.items()
+                            if (key in DEFAULT_TASK or key == 'id') and value != ''}
+                    for field in BOOL_FIELDS:
+                        if field in task:
+                            task[field] = parse_bool(task[field])
+                    for field in ('duration', 'retrigger_ms', 'charges'):
+                        if field in task:
+                            task[field] = parse_int(task[field])
+                    if 'chains' in task:
+                        try:
+                            task['chains'] = json.loads(task['chains'])
+                        except ValueError:
+                            pass
+                    yield task
+        elif ext == '.jsonl':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            tasks = data.get('tasks', []) if isinstance(data, dict) else data
+            if not isinstance(tasks, list):
+                raise ValueError("任务列表 (tasks) 必须是数组")
+            yield from tasks
+    
+    def import_tasks(self, file_path: str) -> Tuple[int, List[Tuple[int, str]]]:
+        """批量导入任务包
+        
+        整批验证通过后才一次性写入并保存；有任何错误则不做修改。
+        返回 (导入数量, 错误列表)
+        """
+        try:
+            new_tasks = []
+            positions = []  # new_tasks 中每个任务在任务包中的序号
+            errors = []
+            new_ids = {}  # 任务包中的ID -> 新ID，用于改写联动规则的目标
+            for index, task_data in enumerate(self.iter_task_file(file_path)):
+                if not isinstance(task_data, dict):
+                    errors.append((index, "任务格式错误，应为对象"))
+                    continue
+                new_task = {**DEFAULT_TASK, **task_data}
+                new_task['id'] = str(uuid.uuid4())
+                if isinstance(task_data.get('id'), str) and task_data['id']:
+                    new_ids[task_data['id']] = new_task['id']
+                new_tasks.append(new_task)
+                positions.append(index)
+        except (OSError, ValueError) as e:
+            return 0, [(-1, f"读取任务包失败: {e}")]
+        
+        for task_data in new_tasks:
+            if task_data['chains'] and isinstance(task_data['chains'], list):
+                task_data['chains'] = [
+                    {**rule, 'target': new_ids.get(rule['target'], rule['target'])}
+                    if isinstance(rule, dict) and isinstance(rule.get('target'), str) else rule
+                    for rule in task_data['chains']
+                ]
+        new_tasks = [Task.from_dict(task_data) for task_data in new_tasks]
+        
+        errors += [(positions[index] if index >= 0 else index, error)
+                   for index, error in self.validate_tasks(new_tasks)]
+        if errors:
+            errors.sort(key=lambda item: (item[0] < 0, item[0]))
+            return 0, errors
+        
+        for task in new_tasks:
+            self.task_map[task.id] = task
+        self._refresh_snapshot()
+        self.save_config()
+        
+        logger.info("导入了 %d 个任务", len(new_tasks), extra=event('task_import', count=len(new_tasks), path=file_path))
+        return len(new_tasks), []
+    
+    def export_tasks(self, file_path: str, task_ids: Optional[List[str]] = None) -> int:
+        """导出任务包 (.json / .jsonl / .csv)，返回导出数量"""
+        if task_ids is None:
+            tasks = self._snapshot
+        else:
+            wanted = set(task_ids)
+            tasks = [task for task in self._snapshot if task.id in wanted]
+        
+        ext = os.path.splitext(file_path)[1].lower()
+        
+        if ext == '.csv':
+            with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(TASK_FIELDS)
+                for task in tasks:
+                    writer.writerow([
+                        json.dumps(list(value), ensure_ascii=False) if isinstance(value, (list, tuple)) else value
+                        for value in (getattr(task, name) for name in TASK_FIELDS)
+                    ])
+        elif ext == '.jsonl':
+            with open(file_path, 'w', encoding='utf-8') as f:
+                for task in tasks:
+                    f.write(json.dumps(task.to_dict(), ensure_ascii=False) + '\n')
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump({'tasks': [task.to_dict() for task in tasks], 'version': '2.0'},
+                          f, indent=2, ensure_ascii=False)
+        
+        logger.info("导出了 %d 个任务", len(tasks), extra=event('task_export', count=len(tasks), path=file_path))
+        return len(tasks)
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from models import Task
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+
+def diff_tasks(old_tasks, new_tasks):
+    """比较新旧任务列表，返回 {'added': [...], 'removed': [...], 'changed': [...]}"""
+    old_by_id = {task['id']: task for task in old_tasks}
+    new_ids = set()
+
+    added = []
+    changed = []
+    for task in new_tasks:
+        new_ids.add(task['id'])
+        old_task = old_by_id.get(task['id'])
+        if old_task is None:
+            added.append(task)
+        elif old_task != task:
+            changed.append(task)
+
+    removed = [task for task in old_tasks if task['id'] not in new_ids]
+
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def parse_tasks_file(config_file, old_tasks=()):
+    """解析配置文件中的任务列表 (Task)，失败时返回 None"""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        # 文件可能正在写入，等待下一次变化
+        logger.warning("重新加载配置失败: %s", e, extra=event('config_reload_failed'))
+        return None
+
+    tasks = data.get('tasks', [])
+
+    # 没有ID的任务按名称沿用已有ID，避免被当作新任务
+    ids_by_name = {task.get('name'): task['id'] for task in old_tasks}
+    for task in tasks:
+        if 'id' not in task:
+            task['id'] = ids_by_name.get(task.get('name')) or str(uuid.uuid4())
+
+    return [Task.from_dict(task) for task in tasks]
+
+
+class ConfigWatcher(QObject):
+    """配置文件监视器
+
+    文件变化后在后台线程解析，解析结果通过 tasks_reloaded 信号回到主线程。
+    """
+    tasks_reloaded = pyqtSignal(list)
+    _parsed = pyqtSignal(object)
+
+    def __init__(self, config_file, get_current_tasks, debounce_ms=200):
+        super().__init__()
+        self.config_file = os.path.abspath(config_file)
+        self.get_current_tasks = get_current_tasks  # 返回当前内存中的任务列表
+        self.parsing = False
+        self.reparse = False
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watch()
+
+        # 编辑器保存时通常会连续触发多次，合并处理
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.start_parse)
+
+        self._parsed.connect(self.on_parsed)
+
+    def watch(self):
+        """监视配置文件及其所在目录 (原子替换后文件需要重新加入)"""
+        directory = os.path.dirname(self.config_file)
+        if directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+        if os.path.exists(self.config_file) and self.config_file not in self.watcher.files():
+            self.watcher.addPath(self.config_file)
+
+    def on_file_changed(self, path):
+        """配置文件变化"""
+        self.watch()
+        self.debounce_timer.start()
+
+    def on_directory_changed(self, path):
+        """目录变化，只关心配置文件被替换或重新创建的情况"""
+        if os.path.exists(self.config_file) and self.config_file not in self.watcher.files():
+            self.watch()
+            self.debounce_timer.start()
+
+    def start_parse(self):
+        """在后台线程解析配置文件"""
+        if self.parsing:
+            self.reparse = True
+            return
+
+        self.parsing = True
+        old_tasks = list(self.get_current_tasks())
+        thread = threading.Thread(target=self._parse_worker, args=(old_tasks,), daemon=True)
+        thread.start()
+
+    def _parse_worker(self, old_tasks):
+        """后台解析"""
+        tasks = parse_tasks_file(self.config_file, old_tasks)
+        self._parsed.emit(tasks)
+
+    def on_parsed(self, tasks):
+        """解析完成 (主线程)"""
+        self.parsing = False
+        if self.reparse:
+            self.reparse = False
+            self.start_parse()
+            return
+
+        if tasks is not None:
+            self.tasks_reloaded.emit(tasks)
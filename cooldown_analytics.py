@@ -0,0 +1,161 @@
+"""
+冷却效率分析
+
+基于会话历史 (session_history.py 记录的 TimerManager 事件) 计算每个技能的：
+冷却中时间、就绪但未使用的时间、利用率，就绪到下一次使用的延迟 (平均值与分位数)，
+以及多个技能 (例如防御技能) 同时处于冷却中的重叠时间。
+
+全部计算都在 NumPy 数组上完成，不逐个事件循环。
+"""
+
+import logging
+from session_history import read_session_history, EVENT_OPEN, SESSION_FILE
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("numpy 未安装，冷却效率分析将不可用")
+
+# 事件类型编码
+KIND_OPEN = 0
+KIND_START = 1
+KIND_STOP = 2
+KIND_FINISH = 3
+KIND_CODES = {EVENT_OPEN: KIND_OPEN, 'start': KIND_START, 'stop': KIND_STOP, 'finish': KIND_FINISH}
+
+
+class CooldownAnalytics:
+    """会话历史的数组形式与统计
+
+    records: [(墙上时间, 事件类型, task_id)]，按时间排序
+    """
+
+    def __init__(self, records):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("冷却效率分析需要安装 numpy")
+
+        count = len(records)
+        self.task_ids = sorted({task_id for _, _, task_id in records if task_id is not None})
+        index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+
+        times = np.fromiter((record[0] for record in records), np.float64, count)
+        kinds = np.fromiter((KIND_CODES.get(record[1], -1) for record in records), np.int8, count)
+        tasks = np.fromiter((index.get(record[2], -1) for record in records), np.int32, count)
+
+        # 每条 open 事件开始一个新会话，关闭程序的时间不参与统计
+        runs = np.cumsum(kinds == KIND_OPEN)
+        run_count = int(runs[-1]) + 1 if count else 0
+        first = np.searchsorted(runs, np.arange(run_count), side='left')
+        last = np.maximum(np.searchsorted(runs, np.arange(run_count), side='right') - 1, first)
+        self.run_start = times[first]
+        self.run_end = times[last]
+        self.span = float(np.sum(self.run_end - self.run_start))
+
+        # 按 (任务, 时间) 排序，每个任务的事件是一段连续的切片
+        order = np.lexsort((times, tasks))
+        self.times = times[order]
+        self.kinds = kinds[order]
+        self.runs = runs[order]
+        self.task_bounds = np.searchsorted(tasks[order], np.arange(len(self.task_ids) + 1))
+        self._intervals = {}
+
+    @classmethod
+    def from_file(cls, path=SESSION_FILE, since=None):
+        """从会话历史文件读取"""
+        return cls(read_session_history(path, since))
+
+    def _task_events(self, task_id):
+        k = self.task_ids.index(task_id)
+        part = slice(self.task_bounds[k], self.task_bounds[k + 1])
+        return self.times[part], self.kinds[part], self.runs[part]
+
+    def cooldown_intervals(self, task_id):
+        """冷却区间 (开始时间, 结束时间, 是否在下一次使用前就绪, 下一次使用时间)，都是数组
+
+        冷却在完成、停止、再次使用或会话结束时结束，同一任务的区间互不重叠。
+        """
+        cached = self._intervals.get(task_id)
+        if cached is not None:
+            return cached
+
+        times, kinds, runs = self._task_events(task_id)
+        use_mask = kinds == KIND_START
+        uses = times[use_mask]
+        use_runs = runs[use_mask]
+        ends = times[(kinds == KIND_STOP) | (kinds == KIND_FINISH)]
+
+        # 每次使用之后的第一个完成/停止事件
+        end_after = np.append(ends, np.inf)[np.searchsorted(ends, uses, side='left')]
+        # 同一会话中的下一次使用
+        same_run = np.append(use_runs[1:] == use_runs[:-1], False)
+        next_use = np.where(same_run, np.append(uses[1:], np.inf), np.inf)
+        run_end = self.run_end[use_runs]
+
+        cooldown_end = np.minimum(np.minimum(end_after, next_use), run_end)
+        ready_before_next = same_run & (end_after <= next_use)
+        result = (uses, cooldown_end, ready_before_next, next_use)
+        self._intervals[task_id] = result
+        return result
+
+    def task_metrics(self, task_id):
+        """单个任务的统计"""
+        uses, cooldown_end, ready_before_next, next_use = self.cooldown_intervals(task_id)
+        cooldown_time = float(np.sum(cooldown_end - uses))
+        delays = (next_use - cooldown_end)[ready_before_next]
+
+        metrics = {
+            'uses': int(uses.size),
+            'cooldown_time': cooldown_time,
+            'ready_time': max(0.0, self.span - cooldown_time),  # 就绪但未使用
+            'utilization': cooldown_time / self.span if self.span > 0 else 0.0,
+            'delay_mean': None,
+            'delay_p50': None,
+            'delay_p90': None,
+        }
+        if delays.size:
+            p50, p90 = np.percentile(delays, [50, 90])
+            metrics.update(delay_mean=float(delays.mean()), delay_p50=float(p50), delay_p90=float(p90))
+        return metrics
+
+    def all_metrics(self):
+        """所有任务的统计 {task_id: {...}}"""
+        return {task_id: self.task_metrics(task_id) for task_id in self.task_ids}
+
+    def overlap(self, task_ids):
+        """多个技能同时冷却的时间
+
+        返回 (重叠矩阵, 全部冷却中的时间)，矩阵第 i 行第 j 列是两个技能同时冷却的秒数，
+        对角线是各自的冷却时间。
+        """
+        task_ids = [task_id for task_id in task_ids if task_id in self.task_ids]
+        size = len(task_ids)
+        if not size:
+            return np.zeros((0, 0)), 0.0
+
+        points, rows, deltas = [], [], []
+        for row, task_id in enumerate(task_ids):
+            starts, ends = self.cooldown_intervals(task_id)[:2]
+            points += [starts, ends]
+            rows += [np.full(starts.size, row), np.full(ends.size, row)]
+            deltas += [np.ones(starts.size), -np.ones(ends.size)]
+        points = np.concatenate(points)
+        rows = np.concatenate(rows)
+        deltas = np.concatenate(deltas)
+        if points.size < 2:
+            return np.zeros((size, size)), 0.0
+
+        # 时间相同时先处理结束，首尾相接的区间不算重叠
+        order = np.lexsort((deltas, points))
+        points = points[order]
+        changes = np.zeros((size, points.size))
+        changes[rows[order], np.arange(points.size)] = deltas[order]
+        active = (np.cumsum(changes, axis=1) > 0)[:, :-1]  # 每段时间各技能是否在冷却中
+        segments = np.diff(points)
+
+        matrix = (active * segments) @ active.T
+        all_down = float(segments[active.all(axis=0)].sum())
+        return matrix, all_down
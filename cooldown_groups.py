@@ -0,0 +1,211 @@
+import heapq
+from clock import SystemClock
+
+# 浮点误差容限，避免刚好到期的计时器被反复重新设置
+EPSILON = 1e-6
+
+
+class VirtualClock:
+    """虚拟时钟
+
+    虚拟时间 = base_virtual + (真实时间 - base_real) * rate。
+    改变速率时只需要重新设置基准点，已有的截止时间保持不变。
+    """
+
+    def __init__(self, source, rate=1.0):
+        self.source = source  # 真实时间来源，例如 SystemClock().now
+        self.base_real = source()
+        self.base_virtual = 0.0
+        self.rate = rate
+
+    def now(self, real_now=None):
+        """当前虚拟时间"""
+        if real_now is None:
+            real_now = self.source()
+        return self.base_virtual + (real_now - self.base_real) * self.rate
+
+    def set_rate(self, rate, real_now=None):
+        """设置速率 (1.0 为正常，2.0 表示冷却快一倍，0 表示暂停)"""
+        if rate < 0:
+            raise ValueError("速率不能为负数")
+        if real_now is None:
+            real_now = self.source()
+        self.base_virtual = self.now(real_now)
+        self.base_real = real_now
+        self.rate = rate
+
+    def advance(self, seconds):
+        """虚拟时间向前跳 seconds 秒 (相当于所有剩余时间减少 seconds)"""
+        self.base_virtual += seconds
+
+    def real_time(self, virtual_time):
+        """虚拟时刻对应的真实时刻 (暂停时为 inf)，速率不变时不随调用时间变化"""
+        if self.rate <= 0:
+            return float('inf')
+        return self.base_real + (virtual_time - self.base_virtual) / self.rate
+
+    def to_real(self, virtual_seconds):
+        """把虚拟时长换算成真实时长"""
+        if self.rate <= 0:
+            return float('inf')
+        return virtual_seconds / self.rate
+
+
+class CooldownGroup:
+    """冷却分组
+
+    同一分组的计时器共享一个虚拟时钟和一个定时器，截止时间以虚拟时间保存在堆中。
+    改变速率或整体减少剩余时间只需要调整时钟并重新设置这一个定时器。
+    set_lead() 注册提前通知 (预警、语音预取等)，在到期前 lead 秒 (虚拟时间) 调用 callback(task_id)。
+    """
+
+    def __init__(self, name, on_expire, clock=None):
+        self.name = name
+        self.on_expire = on_expire  # 到期回调 on_expire(task_id, 虚拟截止时间, 计划到期的真实时刻)
+        clock = clock or SystemClock()
+        self.clock = VirtualClock(clock.now)
+        self.deadlines = {}  # {task_id: 虚拟截止时间}
+        self.leads = {}  # 提前通知 {名称: (提前量, 回调)}
+        self.early = {}  # {(task_id, 名称): 虚拟通知时间}
+        self.heap = []  # [(虚拟时间, 序号, task_id, 提前通知名称或 None)]，取消的条目延迟删除
+        self.seq = 0
+
+        self.timer = clock.create_timer(self.on_timeout)
+
+    def set_lead(self, name, lead, callback):
+        """注册提前通知，对之后设置的截止时间生效；lead 为 0 时取消"""
+        if lead > 0 and callback:
+            self.leads[name] = (lead, callback)
+        elif self.leads.pop(name, None) is not None:
+            self.early = {key: at for key, at in self.early.items() if key[1] != name}
+
+    def schedule(self, task_id, duration):
+        """在 duration 秒 (虚拟时间) 后到期"""
+        self.set_deadline(task_id, self.clock.now() + duration)
+
+    def schedule_many(self, items):
+        """批量调度 [(task_id, duration)]，只重新设置一次定时器"""
+        now = self.clock.now()
+        for task_id, duration in items:
+            self._push(task_id, now + duration, now)
+        self.rearm()
+
+    def set_deadline(self, task_id, deadline):
+        """设置虚拟截止时间"""
+        self._push(task_id, deadline)
+        self.rearm()
+
+    def _push(self, task_id, deadline, now=None):
+        """写入截止时间和提前通知时间 (旧的堆条目会在 _peek 时被丢弃)"""
+        self.deadlines[task_id] = deadline
+        self.seq += 1
+        heapq.heappush(self.heap, (deadline, self.seq, task_id, None))
+
+        self._discard_early(task_id)
+        if now is None:
+            now = self.clock.now()
+        for name, (lead, _) in self.leads.items():
+            notify_at = deadline - lead
+            if notify_at > now + EPSILON:
+                self.early[(task_id, name)] = notify_at
+                self.seq += 1
+                heapq.heappush(self.heap, (notify_at, self.seq, task_id, name))
+
+    def _discard_early(self, task_id):
+        for name in self.leads:
+            self.early.pop((task_id, name), None)
+
+    def cancel(self, task_id):
+        """取消计时"""
+        self._discard_early(task_id)
+        if self.deadlines.pop(task_id, None) is not None:
+            self.rearm()
+
+    def remaining(self, task_id):
+        """剩余真实时间 (秒)，分组暂停时返回冻结的剩余冷却时间"""
+        deadline = self.deadlines.get(task_id)
+        if deadline is None:
+            return 0.0
+        if self.clock.rate <= 0:
+            return max(0.0, deadline - self.clock.now())
+        return max(0.0, self.clock.to_real(deadline - self.clock.now()))
+
+    def real_deadline(self, task_id):
+        """截止时间对应的真实时刻 (clock.now 的时间基准)，分组暂停或没有计时时为 inf"""
+        deadline = self.deadlines.get(task_id)
+        if deadline is None:
+            return float('inf')
+        return self.clock.real_time(deadline)
+
+    def virtual_remaining(self, task_id):
+        """剩余虚拟时间 (秒)"""
+        deadline = self.deadlines.get(task_id)
+        if deadline is None:
+            return 0.0
+        return max(0.0, deadline - self.clock.now())
+
+    def cancel_many(self, task_ids):
+        """批量取消，只重新设置一次定时器"""
+        for task_id in task_ids:
+            self._discard_early(task_id)
+            self.deadlines.pop(task_id, None)
+        if not self.deadlines:
+            self.heap.clear()
+        self.rearm()
+
+    def set_rate(self, rate):
+        """设置分组速率"""
+        self.clock.set_rate(rate)
+        self.rearm()
+
+    def reduce_remaining(self, seconds):
+        """分组内所有计时器的剩余时间减少 seconds 秒"""
+        jumped_at = self.clock.source()
+        self.clock.advance(seconds)
+        self.on_timeout(jumped_at)
+
+    def _peek(self):
+        """堆顶的有效条目"""
+        while self.heap:
+            deadline, _, task_id, name = self.heap[0]
+            current = self.deadlines.get(task_id) if name is None else self.early.get((task_id, name))
+            if current == deadline:
+                return deadline
+            heapq.heappop(self.heap)
+        return None
+
+    def rearm(self):
+        """按最早的截止时间重新设置定时器"""
+        deadline = self._peek()
+        if deadline is None or self.clock.rate <= 0:
+            self.timer.stop()
+            return
+
+        self.timer.start(max(0.0, self.clock.to_real(deadline - self.clock.now())))
+
+    def on_timeout(self, due=None):
+        """处理已经到期的计时器
+
+        due 为到期的真实时刻 (减少剩余时间时为操作的时刻)；定时器触发时按截止时间换算，
+        不包括定时器本身的延迟。
+        """
+        now = self.clock.now()
+        expired = []
+        while True:
+            deadline = self._peek()
+            if deadline is None or deadline > now + EPSILON:
+                break
+            _, _, task_id, name = heapq.heappop(self.heap)
+            if name is None:
+                del self.deadlines[task_id]
+                self._discard_early(task_id)
+            else:
+                del self.early[(task_id, name)]
+            expired.append((task_id, deadline, name))
+
+        self.rearm()
+        for task_id, deadline, name in expired:
+            if name is None:
+                self.on_expire(task_id, deadline, self.clock.real_time(deadline) if due is None else due)
+            elif name in self.leads:
+                self.leads[name][1](task_id)
@@ -0,0 +1,127 @@
+"""
+结构化日志
+
+各模块通过 logging.getLogger(__name__) 记录日志，用 extra=event(...) 附带事件名和任务ID。
+记录先放入内存环形缓冲区 (供界面查看最近历史)，再经 QueueHandler 交给后台线程
+写入滚动日志文件，调用方不会被磁盘或控制台输出阻塞。
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from collections import deque
+
+LOG_FILE = "cdtimer.log"
+
+
+def event(name, task_id=None, **fields):
+    """生成结构化日志字段，用作 logger 的 extra 参数"""
+    return {
+        'event': name,
+        'task_id': task_id,
+        'monotonic': time.monotonic(),
+        'fields': fields or None,
+    }
+
+
+class RingBufferHandler(logging.Handler):
+    """把最近的日志记录保存在内存中 (有界，旧记录自动丢弃)"""
+
+    def __init__(self, capacity=1000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def recent(self, count=None):
+        """最近的 count 条记录 (按时间顺序)"""
+        records = list(self.records)
+        if count is not None:
+            records = records[-count:]
+        return records
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出一行 JSON"""
+
+    def format(self, record):
+        data = {
+            'time': round(record.created, 3),
+            'monotonic': round(getattr(record, 'monotonic', 0.0) or 0.0, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'task_id': getattr(record, 'task_id', None),
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def format_record(record):
+    """格式化为便于阅读的一行文本"""
+    text = time.strftime('%H:%M:%S', time.localtime(record.created))
+    text += f".{int(record.msecs):03d} {record.levelname:<7}"
+    name = getattr(record, 'event', None)
+    if name:
+        text += f" [{name}]"
+    return f"{text} {record.getMessage()}"
+
+
+class EventLog:
+    """日志系统：内存环形缓冲区 + 后台滚动文件"""
+
+    def __init__(self, log_file=LOG_FILE, capacity=1000, max_bytes=1024 * 1024, backup_count=3,
+                 level=logging.INFO, console=False):
+        self.buffer = RingBufferHandler(capacity)
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+
+        handlers = []
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter('%(message)s'))
+            handlers.append(console_handler)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers)
+        self.started = False
+
+        self.logger = logging.getLogger()
+        self.logger.setLevel(level)
+        self.logger.addHandler(self.buffer)
+        self.logger.addHandler(self.queue_handler)
+
+    def start(self):
+        """启动后台写入线程"""
+        self.listener.start()
+        self.started = True
+        return self
+
+    def stop(self):
+        """写完剩余记录并停止后台线程"""
+        self.logger.removeHandler(self.buffer)
+        self.logger.removeHandler(self.queue_handler)
+        if self.started:
+            self.listener.stop()
+            self.started = False
+        for handler in self.listener.handlers:
+            handler.close()
+
+    def recent(self, count=None):
+        """最近的日志记录"""
+        return self.buffer.recent(count)
+
+    def dump(self, count=200):
+        """最近历史的文本形式"""
+        return "\n".join(format_record(record) for record in self.recent(count))
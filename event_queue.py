@@ -0,0 +1,64 @@
+from collections import deque
+
+
+class SpscQueue:
+    """有界单生产者单消费者队列
+
+    生产者 (键盘钩子线程) 只调用 push()，消费者 (Qt 主线程) 只调用 drain()。
+    deque 的 append/popleft 在 CPython 中是原子操作，两端都不需要加锁。
+    队列满时丢弃新事件并计数，保证钩子线程永远不会阻塞。
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.items = deque()
+        self.wakeup_pending = False  # 已经通知过消费者、尚未开始取出
+        self.pushed = 0
+        self.dropped = 0
+        self.high_water = 0  # 队列长度的最大值
+        self.drains = 0
+
+    def push(self, item):
+        """放入一个事件，返回是否需要唤醒消费者
+
+        只有消费者还没被通知时才返回 True，连续的事件只唤醒一次。
+        """
+        size = len(self.items)
+        if size >= self.capacity:
+            self.dropped += 1
+            return False
+
+        self.items.append(item)
+        self.pushed += 1
+        if size + 1 > self.high_water:
+            self.high_water = size + 1
+
+        if self.wakeup_pending:
+            return False
+        self.wakeup_pending = True
+        return True
+
+    def drain(self):
+        """按放入顺序取出当前所有事件"""
+        # 先清除标记再取出，取出期间放入的事件会重新唤醒，不会丢失
+        self.wakeup_pending = False
+        items = self.items
+        batch = []
+        while items:
+            batch.append(items.popleft())
+        self.drains += 1
+        return batch
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_stats(self):
+        """获取队列统计 (放入、丢弃、最大积压、取出批次)"""
+        return {
+            'pushed': self.pushed,
+            'dropped': self.dropped,
+            'high_water': self.high_water,
+            'drains': self.drains,
+            'pending': len(self.items),
+            'capacity': self.capacity,
+        }
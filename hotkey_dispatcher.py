@@ -0,0 +1,61 @@
+import threading
+
+# 热键模式
+MODE_TOGGLE = 'toggle'    # 运行中则停止，否则开始
+MODE_RESTART = 'restart'  # 总是重新开始，从不停止
+
+# 默认的最小重复触发间隔 (毫秒)
+DEFAULT_RETRIGGER_MS = 300
+
+
+class HotkeyDispatcher:
+    """热键分发层
+
+    过滤按住按键时的自动重复，限制同一任务的触发频率，
+    并根据任务的热键模式决定开始还是停止。
+    """
+
+    def __init__(self, default_retrigger_ms=DEFAULT_RETRIGGER_MS):
+        self.default_retrigger_ms = default_retrigger_ms
+        self.held_keys = set()  # 当前按下的按键
+        self.last_trigger = {}  # 最近一次触发时间 {task_id: timestamp}
+        self.suppressed = {'repeat': 0, 'interval': 0}  # 被忽略的事件数
+        self.lock = threading.Lock()
+
+    def key_down(self, key):
+        """按键按下，自动重复时返回 False"""
+        with self.lock:
+            if key in self.held_keys:
+                self.suppressed['repeat'] += 1
+                return False
+            self.held_keys.add(key)
+            return True
+
+    def key_up(self, key):
+        """按键抬起"""
+        with self.lock:
+            self.held_keys.discard(key)
+
+    def decide(self, task, running, timestamp):
+        """决定热键动作，返回 'start'、'stop' 或 None (忽略)"""
+        task_id = task['id']
+        interval = task.get('retrigger_ms', self.default_retrigger_ms) / 1000.0
+
+        with self.lock:
+            last = self.last_trigger.get(task_id)
+            if last is not None and timestamp - last < interval:
+                self.suppressed['interval'] += 1
+                return None
+            self.last_trigger[task_id] = timestamp
+
+        # 充能技能每次按下都使用一层充能
+        if task.get('hotkey_mode', MODE_TOGGLE) == MODE_RESTART or task.get('charges', 1) > 1:
+            return 'start'
+        return 'stop' if running else 'start'
+
+    def get_stats(self):
+        """获取被忽略的事件统计"""
+        with self.lock:
+            stats = dict(self.suppressed)
+        stats['total'] = stats['repeat'] + stats['interval']
+        return stats
@@ -0,0 +1,204 @@
+import re
+import time
+import keyboard
+
+# 修饰键位掩码
+MOD_CTRL = 1
+MOD_SHIFT = 2
+MOD_ALT = 4
+MOD_WIN = 8
+
+MODIFIER_BITS = {
+    'ctrl': MOD_CTRL, 'control': MOD_CTRL, 'left ctrl': MOD_CTRL, 'right ctrl': MOD_CTRL,
+    'shift': MOD_SHIFT, 'left shift': MOD_SHIFT, 'right shift': MOD_SHIFT,
+    'alt': MOD_ALT, 'left alt': MOD_ALT, 'right alt': MOD_ALT, 'alt gr': MOD_ALT,
+    'windows': MOD_WIN, 'left windows': MOD_WIN, 'right windows': MOD_WIN,
+    'win': MOD_WIN, 'meta': MOD_WIN, 'command': MOD_WIN,
+}
+
+# 按键别名 (Qt 的 QKeySequence 与 keyboard 库的命名不同)
+KEY_ALIASES = {
+    'escape': 'esc',
+    'del': 'delete',
+    'return': 'enter',
+    'pgup': 'page up', 'pageup': 'page up',
+    'pgdown': 'page down', 'pagedown': 'page down', 'pgdn': 'page down',
+    'ins': 'insert',
+    'backspace': 'backspace', 'back': 'backspace',
+    'spacebar': 'space',
+    'up arrow': 'up', 'down arrow': 'down', 'left arrow': 'left', 'right arrow': 'right',
+}
+
+# 按住 Shift 时 keyboard 库报告的是上档字符 (美式键盘布局)，匹配前换回原来的按键
+SHIFTED_KEYS = dict(zip('!@#$%^&*()_+{}|:"<>?~', '1234567890-=[]\\;\',./`'))
+
+# 序列步骤之间的分隔符，例如 "G, 1"；"Ctrl+," 中的逗号是按键本身
+STEP_SEPARATOR = re.compile(r'(?<!\+),\s*')
+
+
+def normalize_key(name):
+    """规范化按键名称 (上档字符换回原来的按键，例如 "!" -> "1")"""
+    name = name.strip().lower()
+    name = KEY_ALIASES.get(name, name)
+    return SHIFTED_KEYS.get(name, name)
+
+
+def parse_hotkey(text):
+    """解析热键字符串，返回步骤元组 ((修饰键掩码, 按键), ...)
+
+    支持 "F1"、"Ctrl+1"、"Ctrl+Shift+Q" 以及序列 "G, 1"。
+    """
+    steps = []
+    for step in STEP_SEPARATOR.split(text.strip()):
+        if not step:
+            continue
+
+        parts = step.split('+')
+        if len(parts) > 1 and parts[-1] == '':
+            # "Ctrl++" 表示加号键
+            parts = parts[:-2] + ['+']
+
+        mods = 0
+        key = None
+        last = len(parts) - 1
+        for i, part in enumerate(parts):
+            name = normalize_key(part)
+            bit = MODIFIER_BITS.get(name)
+            if bit is not None and i != last:
+                mods |= bit
+            else:
+                key = name
+                if part.strip() in SHIFTED_KEYS:
+                    mods |= MOD_SHIFT  # "Shift+!" 与 "!" 都表示 Shift+1
+
+        if not key:
+            raise ValueError(f"无效的热键: {text}")
+        steps.append((mods, key))
+
+    if not steps:
+        raise ValueError(f"无效的热键: {text}")
+    return tuple(steps)
+
+
+class _TrieNode:
+    """前缀树节点"""
+    __slots__ = ('children', 'task_id')
+
+    def __init__(self):
+        self.children = {}  # {(修饰键掩码, 按键): _TrieNode}
+        self.task_id = None
+
+
+class HotkeyMatcher:
+    """热键匹配器
+
+    所有热键预编译成一棵以 (修饰键状态, 按键) 为键的前缀树，
+    每次按键只做常数次字典查找，与绑定的任务数量无关。
+    """
+
+    def __init__(self, bindings=None, sequence_timeout=1.0):
+        self.root = _TrieNode()
+        self.sequence_timeout = sequence_timeout
+        self.node = self.root  # 当前序列匹配位置
+        self.last_time = 0.0
+
+        for hotkey, task_id in (bindings or {}).items():
+            self.add(hotkey, task_id)
+
+    def add(self, hotkey, task_id):
+        """添加热键绑定"""
+        node = self.root
+        for step in parse_hotkey(hotkey):
+            child = node.children.get(step)
+            if child is None:
+                child = node.children[step] = _TrieNode()
+            node = child
+        node.task_id = task_id
+
+    def reset(self):
+        """重置序列状态"""
+        self.node = self.root
+
+    def feed(self, mods, key, timestamp):
+        """输入一次按键，匹配成功时返回任务ID"""
+        node = self.node
+        step = (mods, key)
+
+        if node is not self.root and timestamp - self.last_time > self.sequence_timeout:
+            node = self.root
+
+        child = node.children.get(step)
+        if child is None and node is not self.root:
+            # 序列中断，从头开始匹配这次按键
+            child = self.root.children.get(step)
+
+        if child is None:
+            self.node = self.root
+            return None
+
+        self.last_time = timestamp
+        # 还有后续步骤时停留在当前节点，等待下一次按键
+        self.node = child if child.children else self.root
+        return child.task_id
+
+
+class HotkeyListener:
+    """底层键盘钩子
+
+    只安装一个 keyboard 钩子，自己维护修饰键状态并把按键交给 HotkeyMatcher。
+    传入 dispatcher 时由它过滤按住按键产生的自动重复。
+    """
+
+    def __init__(self, callback, matcher=None, dispatcher=None):
+        self.callback = callback  # callback(task_id, timestamp)
+        self.matcher = matcher or HotkeyMatcher()
+        self.dispatcher = dispatcher
+        self.mods = 0
+        self.hook = None
+
+    def set_matcher(self, matcher):
+        """替换匹配器 (整体替换引用，钩子线程无需加锁)"""
+        self.matcher = matcher
+
+    def install(self):
+        """安装键盘钩子"""
+        if self.hook is None:
+            self.hook = keyboard.hook(self.on_key_event)
+
+    def uninstall(self):
+        """卸载键盘钩子"""
+        if self.hook is not None:
+            try:
+                keyboard.unhook(self.hook)
+            except (KeyError, ValueError):
+                pass
+            self.hook = None
+
+    def on_key_event(self, event):
+        """keyboard 库回调 (钩子线程)"""
+        if event.name:
+            self.handle(event.event_type, event.name, event.time or time.time())
+
+    def handle(self, event_type, name, timestamp):
+        """处理一次按键事件"""
+        name = normalize_key(name)
+        bit = MODIFIER_BITS.get(name)
+
+        if bit is not None:
+            if event_type == 'down':
+                self.mods |= bit
+            else:
+                self.mods &= ~bit
+            return
+
+        if event_type != 'down':
+            if self.dispatcher:
+                self.dispatcher.key_up(name)
+            return
+
+        if self.dispatcher and not self.dispatcher.key_down(name):
+            return  # 自动重复
+
+        task_id = self.matcher.feed(self.mods, name, timestamp)
+        if task_id is not None:
+            self.callback(task_id, timestamp)
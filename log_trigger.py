@@ -0,0 +1,271 @@
+"""
+战斗日志触发
+
+后台线程增量读取游戏写出的战斗日志 (记录读取位置，处理文件被截断或替换)，
+每一行用所有任务的文字规则合并成的 Aho-Corasick 自动机扫描一次，正则规则逐个匹配，
+匹配到的任务通过信号在主线程中开始计时。
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, pyqtSignal
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+# 以 "re:" 开头的规则是正则表达式，否则按普通文本匹配
+REGEX_PREFIX = 're:'
+
+
+def compile_log_pattern(text):
+    """把日志匹配规则转换为正则表达式源码，规则无效时抛出 ValueError"""
+    text = text.strip()
+    if not text:
+        raise ValueError("日志匹配规则为空")
+    if not text.startswith(REGEX_PREFIX):
+        return re.escape(text)
+
+    source = text[len(REGEX_PREFIX):]
+    try:
+        compiled = re.compile(source)
+    except re.error as e:
+        raise ValueError(f"日志匹配规则无效: {e}") from None
+    if compiled.groupindex:
+        raise ValueError("日志匹配规则不能包含命名分组")
+    return source
+
+
+class AhoCorasick:
+    """多个文字的 Aho-Corasick 自动机
+
+    一遍扫描报告所有命中，包括相互重叠或包含的文字 (例如 "火球术" 中的 "火球" 和 "球术")。
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]  # 每个状态的转移 {字符: 状态}
+        self.fail = [0]
+        self.output = [[]]  # 到达该状态时命中的文字
+        for word in words:
+            state = 0
+            for char in word:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(word)
+
+        # 按层计算失配转移，并合并失配状态的命中
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0) if state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def finditer(self, text):
+        """依次产生 (起始位置, 文字)，按结束位置排列"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in output[state]:
+                yield end - len(word), word
+
+
+class LogPatternMatcher:
+    """日志行匹配器
+
+    普通文字规则合并成一个 Aho-Corasick 自动机，每行只扫描一遍并报告所有重叠的命中；
+    正则规则各自单独匹配，不会因为与文字或其他正则重叠而漏掉。相同的规则对应多个任务时只匹配一次。
+    """
+
+    def __init__(self, bindings=()):
+        self.literal_tasks = {}  # {文字: [task_id, ...]}
+        regex_tasks = {}  # {正则源码: [task_id, ...]}
+        for pattern, task_id in bindings:
+            source = compile_log_pattern(pattern)
+            pattern = pattern.strip()
+            if pattern.startswith(REGEX_PREFIX):
+                regex_tasks.setdefault(source, []).append(task_id)
+            else:
+                self.literal_tasks.setdefault(pattern, []).append(task_id)
+
+        self.automaton = AhoCorasick(self.literal_tasks) if self.literal_tasks else None
+        self.regexes = [(re.compile(source), task_ids) for source, task_ids in regex_tasks.items()]
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """根据任务的 log_pattern 字段创建，无效的规则会被跳过"""
+        bindings = []
+        for task in tasks:
+            pattern = task.get('log_pattern', '')
+            if not pattern:
+                continue
+            try:
+                compile_log_pattern(pattern)
+            except ValueError as e:
+                logger.warning("任务 [%s] %s", task['name'], e, extra=event('log_pattern_invalid', task['id']))
+                continue
+            bindings.append((pattern, task['id']))
+        return cls(bindings)
+
+    def match(self, line):
+        """返回这一行触发的任务ID列表 (按命中的起始位置排列，不重复)"""
+        hits = []  # [(起始位置, 结束位置, [task_id, ...])]
+        if self.automaton is not None:
+            for start, word in self.automaton.finditer(line):
+                hits.append((start, start + len(word), self.literal_tasks[word]))
+        for regex, ids in self.regexes:
+            found = regex.search(line)
+            if found:
+                hits.append((found.start(), found.end(), ids))
+
+        task_ids = []
+        for _, _, ids in sorted(hits, key=lambda hit: hit[:2]):
+            for task_id in ids:
+                if task_id not in task_ids:
+                    task_ids.append(task_id)
+        return task_ids
+
+
+class LogTailer:
+    """增量读取日志文件
+
+    记录读取位置，每次只读取新增的部分；不完整的最后一行留到下次。
+    文件变短 (被截断) 或被替换成新文件 (轮转) 时从头开始读取新文件。
+    """
+
+    def __init__(self, path, encoding='utf-8', from_end=True):
+        self.path = path
+        self.encoding = encoding
+        self.from_end = from_end  # 首次打开时跳过已有内容
+        self.file = None
+        self.identity = None  # (st_dev, st_ino)
+        self.offset = 0
+        self.partial = b''
+        self.rotations = 0
+
+    def _open(self, from_end):
+        try:
+            self.file = open(self.path, 'rb')
+        except OSError:
+            self.file = None
+            return False
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.offset = stat.st_size if from_end else 0
+        self.partial = b''
+        return True
+
+    def _rotated(self):
+        """文件是否被截断或替换"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False  # 文件暂时不存在，继续读取旧文件剩余的内容
+        return (stat.st_dev, stat.st_ino) != self.identity or stat.st_size < self.offset
+
+    def read_lines(self):
+        """读取新增的完整行"""
+        if self.file is None:
+            opened = self._open(self.from_end)
+            self.from_end = False  # 之后出现的文件都从头读取
+            if not opened:
+                return []
+
+        lines = self._read()
+        if self._rotated():
+            lines += self._read()  # 读完旧文件剩余的内容
+            self.file.close()
+            self.rotations += 1
+            if self._open(from_end=False):
+                lines += self._read()
+        return lines
+
+    def _read(self):
+        self.file.seek(self.offset)
+        data = self.file.read()
+        if not data:
+            return []
+        self.offset += len(data)
+
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        return data[:end].decode(self.encoding, errors='replace').splitlines()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CombatLogTrigger(QObject):
+    """战斗日志触发源
+
+    轮询线程读取新增的日志行并匹配，匹配结果通过 triggered 信号排队到主线程。
+    """
+    triggered = pyqtSignal(str)  # task_id
+
+    def __init__(self, path, encoding='utf-8', poll_interval=0.05):
+        super().__init__()
+        self.tailer = LogTailer(path, encoding)
+        self.poll_interval = poll_interval
+        self.matcher = LogPatternMatcher()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.lines = 0
+        self.matches = 0
+
+    def set_tasks(self, tasks):
+        """任务变化时重新编译匹配器 (整体替换引用，读取线程无需加锁)"""
+        self.matcher = LogPatternMatcher.from_tasks(tasks)
+
+    def start(self):
+        """启动轮询线程"""
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="combat-log", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止轮询线程"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.tailer.close()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("读取战斗日志失败: %s", e, extra=event('combat_log_error'))
+            self.stop_event.wait(self.poll_interval)
+
+    def poll(self):
+        """读取并匹配一次新增的日志行"""
+        matcher = self.matcher
+        for line in self.tailer.read_lines():
+            self.lines += 1
+            for task_id in matcher.match(line):
+                self.matches += 1
+                self.triggered.emit(task_id)
+
+    def get_stats(self):
+        """读取统计"""
+        return {'lines': self.lines, 'matches': self.matches, 'rotations': self.tailer.rotations}
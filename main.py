@@ -1,17 +1,35 @@
 import sys
 import json
+import logging
+import multiprocessing
 import os
+import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QPushButton, QLabel, QLineEdit,
+    QTableWidget, QTableWidgetItem, QTableView, QPushButton, QLabel, QLineEdit,
     QSpinBox, QCheckBox, QComboBox, QMessageBox, QSystemTrayIcon,
     QMenu, QAction, QHeaderView, QFrame, QGroupBox, QGridLayout,
-    QAbstractItemView, QStyledItemDelegate, QFileDialog
+    QAbstractItemView, QStyledItemDelegate, QFileDialog, QPlainTextEdit
 )
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QEvent
-from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QKeySequence, QPixmap
+from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QKeySequence, QPixmap, QTextCursor
 from timer_manager import TimerManager
 from config_manager import ConfigManager
+from notification_manager import NotificationAggregator
+from config_watcher import ConfigWatcher, diff_tasks
+from event_log import EventLog, event as log_event
+from alert_sinks import AlertDispatcher, create_sink
+from log_trigger import CombatLogTrigger, compile_log_pattern
+from session_history import SessionRecorder
+from cooldown_analytics import CooldownAnalytics, NUMPY_AVAILABLE
+from capture_process import CaptureProcess
+from timer_snapshot import SnapshotWriter
+from web_dashboard import DashboardServer
+from stall_watchdog import StallWatchdog
+from task_table_model import TaskTableModel, COL_HOTKEY, CHOICE_COLUMNS, edit_changes
+from task_chains import CHAIN_EVENTS, CHAIN_ACTIONS, ChainGraph, describe_cycle, validate_chains
+
+logger = logging.getLogger(__name__)
 
 
 class ModernButton(QPushButton):
@@ -81,16 +99,17 @@ class TaskEditDialog(QWidget):
     """任务编辑对话框"""
     task_saved = pyqtSignal(dict)
 
-    def __init__(self, task_data=None, parent=None):
+    def __init__(self, task_data=None, parent=None, tasks=()):
         super().__init__(parent)
         self.task_data = task_data
+        self.tasks = tasks  # 所有任务，用于选择联动目标和检查循环
         self.init_ui()
         if task_data:
             self.load_task_data()
 
     def init_ui(self):
         self.setWindowTitle("编辑任务" if self.task_data else "添加任务")
-        self.setFixedSize(800, 700)  # 调整窗口大小
+        self.setFixedSize(800, 900)  # 调整窗口大小
         self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint)
 
         # ========== 最简化样式 - 确保正常显示 ==========
@@ -140,6 +159,38 @@ class TaskEditDialog(QWidget):
         duration_row_layout.addWidget(self.duration_spin)
         basic_layout.addLayout(duration_row_layout)
 
+        # 充能层数行
+        charges_row_layout = QHBoxLayout()
+        charges_row_layout.setSpacing(15)
+        charges_row_layout.addWidget(QLabel("充能层数:"))
+        self.charges_spin = QSpinBox()
+        self.charges_spin.setRange(1, 99)
+        self.charges_spin.setValue(1)
+        self.charges_spin.setSuffix(" 层")
+        charges_row_layout.addWidget(self.charges_spin)
+        basic_layout.addSpacing(10)
+        basic_layout.addLayout(charges_row_layout)
+
+        # 冷却分组行
+        group_row_layout = QHBoxLayout()
+        group_row_layout.setSpacing(15)
+        group_row_layout.addWidget(QLabel("冷却分组:"))
+        self.group_edit = QLineEdit()
+        self.group_edit.setPlaceholderText("可选，同组技能可统一加速或减少冷却")
+        group_row_layout.addWidget(self.group_edit)
+        basic_layout.addSpacing(10)
+        basic_layout.addLayout(group_row_layout)
+
+        # 共享冷却行
+        shared_row_layout = QHBoxLayout()
+        shared_row_layout.setSpacing(15)
+        shared_row_layout.addWidget(QLabel("共享冷却:"))
+        self.shared_edit = QLineEdit()
+        self.shared_edit.setPlaceholderText("可选，同名的技能共享冷却，触发一个即全部开始")
+        shared_row_layout.addWidget(self.shared_edit)
+        basic_layout.addSpacing(10)
+        basic_layout.addLayout(shared_row_layout)
+
         basic_group.setLayout(basic_layout)
         layout.addWidget(basic_group)
 
@@ -169,6 +220,34 @@ class TaskEditDialog(QWidget):
         hotkey_input_layout.addWidget(self.hotkey_edit)
         hotkey_layout.addLayout(hotkey_input_layout)
 
+        # 热键模式与防抖间隔
+        hotkey_mode_layout = QHBoxLayout()
+        hotkey_mode_layout.setSpacing(15)
+        hotkey_mode_layout.addWidget(QLabel("热键模式:"))
+        self.hotkey_mode_combo = QComboBox()
+        self.hotkey_mode_combo.addItem("切换开始/停止", "toggle")
+        self.hotkey_mode_combo.addItem("只重新开始", "restart")
+        hotkey_mode_layout.addWidget(self.hotkey_mode_combo)
+        hotkey_mode_layout.addWidget(QLabel("最小触发间隔:"))
+        self.retrigger_spin = QSpinBox()
+        self.retrigger_spin.setRange(0, 10000)
+        self.retrigger_spin.setSingleStep(50)
+        self.retrigger_spin.setValue(300)
+        self.retrigger_spin.setSuffix(" 毫秒")
+        hotkey_mode_layout.addWidget(self.retrigger_spin)
+        hotkey_layout.addSpacing(10)
+        hotkey_layout.addLayout(hotkey_mode_layout)
+
+        # 战斗日志匹配规则
+        log_pattern_layout = QHBoxLayout()
+        log_pattern_layout.setSpacing(15)
+        log_pattern_layout.addWidget(QLabel("战斗日志:"))
+        self.log_pattern_edit = QLineEdit()
+        self.log_pattern_edit.setPlaceholderText("可选，日志中出现该文字时自动开始，正则以 re: 开头")
+        log_pattern_layout.addWidget(self.log_pattern_edit)
+        hotkey_layout.addSpacing(10)
+        hotkey_layout.addLayout(log_pattern_layout)
+
         hotkey_group.setLayout(hotkey_layout)
         layout.addWidget(hotkey_group)
 
@@ -252,6 +331,31 @@ class TaskEditDialog(QWidget):
         layout.addWidget(reminder_group)
         
 
+        # ========== 联动规则组 ==========
+        chain_group = QGroupBox("联动规则")
+        chain_layout = QVBoxLayout()
+        chain_layout.setContentsMargins(25, 20, 25, 15)
+
+        self.chain_table = QTableWidget(0, 3)
+        self.chain_table.setHorizontalHeaderLabels(["本任务触发", "动作", "目标任务"])
+        self.chain_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.chain_table.verticalHeader().setVisible(False)
+        self.chain_table.setFixedHeight(110)
+        chain_layout.addWidget(self.chain_table)
+
+        chain_button_layout = QHBoxLayout()
+        add_chain_btn = ModernButton("添加规则", "#6c757d")
+        add_chain_btn.clicked.connect(lambda: self.add_chain_row())
+        remove_chain_btn = ModernButton("删除规则", "#6c757d")
+        remove_chain_btn.clicked.connect(self.remove_chain_row)
+        chain_button_layout.addStretch()
+        chain_button_layout.addWidget(add_chain_btn)
+        chain_button_layout.addWidget(remove_chain_btn)
+        chain_layout.addLayout(chain_button_layout)
+
+        chain_group.setLayout(chain_layout)
+        layout.addWidget(chain_group)
+
         # 按钮
         button_layout = QHBoxLayout()
         button_layout.setSpacing(10)
@@ -274,8 +378,15 @@ class TaskEditDialog(QWidget):
         if self.task_data:
             self.name_edit.setText(self.task_data.get('name', ''))
             self.duration_spin.setValue(self.task_data.get('duration', 60))
+            self.charges_spin.setValue(self.task_data.get('charges', 1))
+            self.group_edit.setText(self.task_data.get('group', ''))
+            self.shared_edit.setText(self.task_data.get('shared_cooldown', ''))
             self.hotkey_enabled.setChecked(self.task_data.get('hotkey_enabled', True))
             self.hotkey_edit.setText(self.task_data.get('hotkey', ''))
+            mode_index = self.hotkey_mode_combo.findData(self.task_data.get('hotkey_mode', 'toggle'))
+            self.hotkey_mode_combo.setCurrentIndex(max(mode_index, 0))
+            self.retrigger_spin.setValue(self.task_data.get('retrigger_ms', 300))
+            self.log_pattern_edit.setText(self.task_data.get('log_pattern', ''))
 
             # 设置下拉框
             popup_text = "是" if self.task_data.get('popup_reminder', True) else "否"
@@ -286,6 +397,40 @@ class TaskEditDialog(QWidget):
 
             self.custom_voice_edit.setText(self.task_data.get('custom_voice', ''))
 
+            for rule in self.task_data.get('chains') or ():
+                self.add_chain_row(rule)
+
+    def add_chain_row(self, rule=None):
+        """添加一条联动规则 (触发事件、动作、目标任务)"""
+        rule = rule or {}
+        row = self.chain_table.rowCount()
+        self.chain_table.insertRow(row)
+        current_id = self.task_data.get('id') if self.task_data else None
+        for column, (choices, value) in enumerate((
+            (CHAIN_EVENTS.items(), rule.get('on', 'finish')),
+            (CHAIN_ACTIONS.items(), rule.get('action', 'start')),
+            (((task['id'], task['name']) for task in self.tasks if task['id'] != current_id), rule.get('target')),
+        )):
+            combo = QComboBox()
+            for data, text in choices:
+                combo.addItem(text, data)
+            combo.setCurrentIndex(max(combo.findData(value), 0))
+            self.chain_table.setCellWidget(row, column, combo)
+
+    def remove_chain_row(self):
+        row = self.chain_table.currentRow()
+        if row >= 0:
+            self.chain_table.removeRow(row)
+
+    def get_chains(self):
+        """界面中的联动规则列表 (没有目标的行被忽略)"""
+        chains = []
+        for row in range(self.chain_table.rowCount()):
+            on, action, target = (self.chain_table.cellWidget(row, column).currentData() for column in range(3))
+            if target:
+                chains.append({'on': on, 'action': action, 'target': target})
+        return chains
+
     def save_task(self):
         """保存任务"""
         name = self.name_edit.text().strip()
@@ -293,41 +438,249 @@ class TaskEditDialog(QWidget):
             QMessageBox.warning(self, "错误", "请输入任务名称")
             return
 
+        log_pattern = self.log_pattern_edit.text().strip()
+        if log_pattern:
+            try:
+                compile_log_pattern(log_pattern)
+            except ValueError as e:
+                QMessageBox.warning(self, "错误", str(e))
+                return
+
         task_data = {
             'id': self.task_data.get('id') if self.task_data else None,
             'name': name,
             'duration': self.duration_spin.value(),
+            'charges': self.charges_spin.value(),
+            'group': self.group_edit.text().strip(),
+            'shared_cooldown': self.shared_edit.text().strip(),
             'hotkey_enabled': self.hotkey_enabled.isChecked(),
             'hotkey': self.hotkey_edit.text().strip(),
+            'hotkey_mode': self.hotkey_mode_combo.currentData(),
+            'retrigger_ms': self.retrigger_spin.value(),
+            'log_pattern': log_pattern,
             'popup_reminder': self.popup_combo.currentText() == "是",
             'voice_reminder': self.voice_combo.currentText() == "是",
-            'custom_voice': self.custom_voice_edit.text().strip()
+            'custom_voice': self.custom_voice_edit.text().strip(),
+            'chains': self.get_chains(),
         }
 
+        # 联动规则不能在同一时刻形成循环
+        errors = validate_chains(task_data, self.tasks)
+        if errors:
+            QMessageBox.warning(self, "错误", "\n".join(errors))
+            return
+
         self.task_saved.emit(task_data)
         self.close()
 
 
-class EditableTableWidget(QTableWidget):
-    """可编辑的表格控件"""
+class LogViewer(QWidget):
+    """最近日志查看窗口"""
 
-    def __init__(self, parent=None):
+    def __init__(self, event_log, parent=None):
         super().__init__(parent)
-        self.parent_window = parent
+        self.event_log = event_log
+        self.setWindowTitle("最近日志")
+        self.resize(760, 480)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint)
+
+        layout = QVBoxLayout()
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text_edit)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh)
+        save_button = QPushButton("保存到文件")
+        save_button.clicked.connect(self.save_to_file)
+        button_layout.addStretch()
+        button_layout.addWidget(refresh_button)
+        button_layout.addWidget(save_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.refresh()
+
+    def refresh(self):
+        """重新读取内存中的最近日志"""
+        self.text_edit.setPlainText(self.event_log.dump() or "(暂无日志)")
+        self.text_edit.moveCursor(QTextCursor.End)
+
+    def save_to_file(self):
+        """把最近日志保存为文本文件"""
+        path, _ = QFileDialog.getSaveFileName(self, "保存日志", "cdtimer_recent.log", "日志文件 (*.log *.txt)")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.event_log.dump(count=None) + "\n")
+        except OSError as e:
+            QMessageBox.warning(self, "保存失败", str(e))
+
+
+class AnalyticsView(QWidget):
+    """冷却效率分析窗口"""
+
+    PERIODS = [("最近 1 天", 1), ("最近 7 天", 7), ("最近 30 天", 30), ("全部", None)]
+
+    def __init__(self, history_path, get_tasks, parent=None):
+        super().__init__(parent)
+        self.history_path = history_path
+        self.get_tasks = get_tasks
+        self.analytics = None
+        self.setWindowTitle("冷却效率分析")
+        self.resize(860, 560)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint)
+
+        layout = QVBoxLayout()
+
+        option_layout = QHBoxLayout()
+        option_layout.addWidget(QLabel("时间范围:"))
+        self.period_combo = QComboBox()
+        for text, days in self.PERIODS:
+            self.period_combo.addItem(text, days)
+        self.period_combo.setCurrentIndex(1)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        option_layout.addWidget(self.period_combo)
+        option_layout.addSpacing(20)
+        option_layout.addWidget(QLabel("重叠分析分组:"))
+        self.group_combo = QComboBox()
+        self.group_combo.currentIndexChanged.connect(self.refresh_overlap)
+        option_layout.addWidget(self.group_combo)
+        option_layout.addStretch()
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh)
+        option_layout.addWidget(refresh_button)
+        layout.addLayout(option_layout)
+
+        self.metrics_table = QTableWidget()
+        self.metrics_table.setColumnCount(8)
+        self.metrics_table.setHorizontalHeaderLabels(
+            ["任务", "使用次数", "冷却中", "就绪未用", "利用率", "平均延迟", "延迟 P50", "延迟 P90"])
+        self.metrics_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.metrics_table, 3)
+
+        self.overlap_label = QLabel()
+        layout.addWidget(self.overlap_label)
+        self.overlap_table = QTableWidget()
+        self.overlap_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.overlap_table, 2)
+        self.setLayout(layout)
+
+        self.refresh()
+
+    @staticmethod
+    def format_seconds(value):
+        if value is None:
+            return "-"
+        if value >= 3600:
+            return f"{value / 3600:.1f} 小时"
+        if value >= 60:
+            return f"{value / 60:.1f} 分"
+        return f"{value:.1f} 秒"
+
+    def task_names(self):
+        return {task['id']: task['name'] for task in self.get_tasks()}
+
+    def refresh(self):
+        """重新读取会话历史并计算"""
+        days = self.period_combo.currentData()
+        since = time.time() - days * 86400 if days else None
+        self.analytics = CooldownAnalytics.from_file(self.history_path, since)
+
+        names = self.task_names()
+        metrics = self.analytics.all_metrics()
+        self.metrics_table.setRowCount(len(metrics))
+        for row, (task_id, item) in enumerate(metrics.items()):
+            values = [
+                names.get(task_id, task_id),
+                str(item['uses']),
+                self.format_seconds(item['cooldown_time']),
+                self.format_seconds(item['ready_time']),
+                f"{item['utilization'] * 100:.1f}%",
+                self.format_seconds(item['delay_mean']),
+                self.format_seconds(item['delay_p50']),
+                self.format_seconds(item['delay_p90']),
+            ]
+            for column, value in enumerate(values):
+                self.metrics_table.setItem(row, column, QTableWidgetItem(value))
+
+        current = self.group_combo.currentText()
+        groups = sorted({task.get('group', '') for task in self.get_tasks()} - {''})
+        self.group_combo.blockSignals(True)
+        self.group_combo.clear()
+        self.group_combo.addItems(groups)
+        if current in groups:
+            self.group_combo.setCurrentText(current)
+        self.group_combo.blockSignals(False)
+        self.refresh_overlap()
+
+    def refresh_overlap(self):
+        """显示所选分组中技能同时冷却的时间"""
+        group = self.group_combo.currentText()
+        tasks = [task for task in self.get_tasks() if group and task.get('group', '') == group]
+        matrix, all_down = self.analytics.overlap([task['id'] for task in tasks])
+        tasks = [task for task in tasks if task['id'] in self.analytics.task_ids]
+
+        self.overlap_table.setRowCount(len(tasks))
+        self.overlap_table.setColumnCount(len(tasks))
+        labels = [task['name'] for task in tasks]
+        self.overlap_table.setHorizontalHeaderLabels(labels)
+        self.overlap_table.setVerticalHeaderLabels(labels)
+        for row in range(len(tasks)):
+            for column in range(len(tasks)):
+                self.overlap_table.setItem(row, column, QTableWidgetItem(self.format_seconds(matrix[row, column])))
+
+        if group:
+            self.overlap_label.setText(f"分组 [{group}] 全部技能同时冷却中: {self.format_seconds(all_down)}"
+                                       f"（统计时长 {self.format_seconds(self.analytics.span)}）")
+        else:
+            self.overlap_label.setText("给技能设置冷却分组后，可以查看同组技能 (例如防御技能) 同时冷却的时间")
+
+
+class ChoiceDelegate(QStyledItemDelegate):
+    """是/否 下拉选择，只在编辑时创建下拉框"""
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItems(["是", "否"])
+        combo.activated.connect(lambda: self.commitData.emit(combo))
+        return combo
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
+
+
+class HotkeyDelegate(QStyledItemDelegate):
+    """热键列使用 HotkeyEdit 编辑"""
+
+    def createEditor(self, parent, option, index):
+        return HotkeyEdit(parent)
+
+    def setEditorData(self, editor, index):
+        editor.setText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text().strip(), Qt.EditRole)
+
+
+class TaskTableView(QTableView):
+    """任务表格视图 (只绘制可见的行)"""
 
     def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Delete:
-            current_item = self.currentItem()
-            if current_item and current_item.column() == 2:  # 热键列
-                current_item.setText("")
-                self.save_current_row()
+        index = self.currentIndex()
+        if (event.key() == Qt.Key_Delete and index.isValid() and index.column() == COL_HOTKEY
+                and self.state() != QAbstractItemView.EditingState):
+            self.model().setData(index, "", Qt.EditRole)  # Delete 清除热键
+            return
         super().keyPressEvent(event)
 
-    def save_current_row(self):
-        """保存当前行的修改"""
-        if hasattr(self.parent_window, 'save_table_changes'):
-            self.parent_window.save_table_changes()
-
 
 class MainWindow(QMainWindow):
     """主窗口"""
@@ -335,18 +688,53 @@ class MainWindow(QMainWindow):
     start_timer_signal = pyqtSignal(str)
     stop_timer_signal = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, event_log=None):
         super().__init__()
+        self.event_log = event_log or EventLog(log_file=None)  # 未传入时只保留内存中的记录
+        self.log_viewer = None
         self.config_manager = ConfigManager()
-        self.timer_manager = TimerManager(self)
+        self.timer_manager = TimerManager(self, config_manager=self.config_manager,
+                                          alert_dispatcher=self.create_alert_dispatcher())
+        if self.config_manager.get_setting('hotkey_capture') == 'process':
+            # 在独立子进程中捕获热键
+            self.timer_manager.capture_process = CaptureProcess(self.timer_manager.on_hotkey_pressed)
+        self.timer_manager.set_warning_lead(self.config_manager.get_setting('alert_lead_seconds') or 0)
+        self.timer_manager.set_prefetch_lead(self.config_manager.get_setting('voice_prefetch_seconds') or 0)
+        # 记录会话历史，供冷却效率分析使用
+        self.session_recorder = None
+        history_path = self.config_manager.get_setting('session_history_path')
+        if history_path:
+            self.session_recorder = SessionRecorder(history_path)
+            self.timer_manager.timer_event.connect(self.session_recorder.on_timer_event)
+        # 运行中计时器的共享快照，供外部程序读取 (settings.snapshot_path 为空时不启用)
+        snapshot_path = self.config_manager.get_setting('snapshot_path')
+        if snapshot_path:
+            try:
+                self.timer_manager.snapshot_writer = SnapshotWriter(snapshot_path)
+                self.timer_manager.publish_snapshot()
+            except OSError as e:
+                logger.error("无法创建计时器快照 %s: %s", snapshot_path, e, extra=log_event('snapshot_open_failed'))
+        self.analytics_view = None
+        # 主线程卡顿检测 (settings.stall_threshold_ms 为 0 时不启用)
+        self.watchdog = self.create_watchdog()
         # 连接信号到槽函数
         self.start_timer_signal.connect(self.timer_manager.start_timer)
         self.stop_timer_signal.connect(self.timer_manager.stop_timer)
+        self.timer_manager.timers_changed.connect(self.on_timers_changed)
         self.init_ui()
         self.init_tray()
         self.load_tasks()
         # 确保热键立即加载
         self.timer_manager.update_hotkeys()
+        # 战斗日志触发 (settings.combat_log_path 为空时不启用)
+        self.log_trigger = self.create_log_trigger()
+        # 网页面板 (settings.dashboard_port 为 0 时不启用)
+        self.dashboard = self.create_dashboard()
+        # 监视配置文件，外部修改后热加载
+        self.config_watcher = ConfigWatcher(
+            self.config_manager.config_file, lambda: self.config_manager.tasks
+        )
+        self.config_watcher.tasks_reloaded.connect(self.on_config_reloaded)
 
     def get_app_icon(self):
         """获取应用程序图标"""
@@ -379,18 +767,18 @@ class MainWindow(QMainWindow):
             QMainWindow {
                 background-color: #f8f9fa;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #dee2e6;
                 border-radius: 8px;
                 gridline-color: #dee2e6;
                 font-size: 12px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f1f3f4;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
@@ -438,27 +826,55 @@ class MainWindow(QMainWindow):
         self.delete_btn = ModernButton("删除任务", "#dc3545")
         self.delete_btn.clicked.connect(self.delete_task)
 
+        self.import_btn = ModernButton("导入", "#6c757d")
+        self.import_btn.clicked.connect(self.import_tasks)
+
+        self.export_btn = ModernButton("导出", "#6c757d")
+        self.export_btn.clicked.connect(self.export_tasks)
+
+        self.analytics_btn = ModernButton("效率分析", "#6c757d")
+        self.analytics_btn.clicked.connect(self.show_analytics)
+
         self.start_btn = ModernButton("开始计时", "#28a745")
         self.start_btn.clicked.connect(self.start_timer)
 
         self.stop_btn = ModernButton("停止计时", "#ffc107")
         self.stop_btn.clicked.connect(self.stop_timer)
 
+        self.reset_btn = ModernButton("全部重置", "#dc3545")
+        self.reset_btn.clicked.connect(lambda: self.timer_manager.reset_all())
+
         button_layout.addWidget(self.add_btn)
         button_layout.addWidget(self.edit_btn)
         button_layout.addWidget(self.delete_btn)
+        button_layout.addWidget(self.import_btn)
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.analytics_btn)
         button_layout.addStretch()
         button_layout.addWidget(self.start_btn)
         button_layout.addWidget(self.stop_btn)
+        button_layout.addWidget(self.reset_btn)
 
         layout.addLayout(button_layout)
 
-        # 任务表格
-        self.task_table = EditableTableWidget(self)
-        self.task_table.setColumnCount(7)
-        self.task_table.setHorizontalHeaderLabels([
-            "任务名称", "倒计时(秒)", "热键", "状态", "弹窗提醒", "语音提醒", "剩余时间"
-        ])
+        # 搜索框：按名称、热键或拼音首字母筛选
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索任务名称、热键或拼音首字母")
+        self.search_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.search_edit)
+
+        # 任务表格：模型 + 视图，只为可见的行取数据，编辑时才创建编辑控件
+        self.task_model = TaskTableModel(self.timer_manager, self)
+        self.task_table = TaskTableView(self)
+        self.task_table.setModel(self.task_model)
+        self.task_table.setItemDelegateForColumn(COL_HOTKEY, HotkeyDelegate(self.task_table))
+        self.choice_delegate = ChoiceDelegate(self.task_table)
+        for column in CHOICE_COLUMNS:
+            self.task_table.setItemDelegateForColumn(column, self.choice_delegate)
+        self.task_table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked
+                                        | QAbstractItemView.EditKeyPressed)
+        self.task_table.verticalHeader().setDefaultSectionSize(30)
+        self.search_edit.textChanged.connect(self.task_model.set_filter)
 
         # 设置表格列宽
         header = self.task_table.horizontalHeader()
@@ -469,21 +885,23 @@ class MainWindow(QMainWindow):
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(6, QHeaderView.ResizeToContents)
+        header.setResizeContentsPrecision(0)  # 自适应列宽只测量可见的行
 
-        self.task_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
 
         # 连接表格编辑信号
-        self.task_table.itemChanged.connect(self.on_table_item_changed)
-        self.task_table.cellDoubleClicked.connect(self.on_cell_double_clicked)
+        self.task_model.edited.connect(self.on_table_item_changed)
 
         layout.addWidget(self.task_table)
 
         central_widget.setLayout(layout)
 
-        # 状态更新定时器
+        # 状态更新定时器：只在有计时器运行且窗口可见时工作，
+        # 并对齐到下一次剩余秒数变化的时刻
         self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_table_status)
-        self.update_timer.start(1000)  # 每秒更新一次
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setTimerType(Qt.PreciseTimer)
+        self.update_timer.timeout.connect(self.on_refresh_timeout)
 
     def init_tray(self):
         """初始化系统托盘"""
@@ -498,7 +916,24 @@ class MainWindow(QMainWindow):
         quit_action = QAction("退出", self)
         quit_action.triggered.connect(QApplication.quit)
 
+        log_action = QAction("最近日志", self)
+        log_action.triggered.connect(self.show_recent_log)
+
+        stop_all_action = QAction("全部停止", self)
+        stop_all_action.triggered.connect(lambda: self.timer_manager.stop_all())
+
+        reset_all_action = QAction("全部重置", self)
+        reset_all_action.triggered.connect(lambda: self.timer_manager.reset_all())
+
+        profile_action = QAction("性能采样", self)
+        profile_action.triggered.connect(self.start_profile)
+
         tray_menu.addAction(show_action)
+        tray_menu.addAction(log_action)
+        tray_menu.addAction(profile_action)
+        tray_menu.addSeparator()
+        tray_menu.addAction(stop_all_action)
+        tray_menu.addAction(reset_all_action)
         tray_menu.addSeparator()
         tray_menu.addAction(quit_action)
 
@@ -509,6 +944,148 @@ class MainWindow(QMainWindow):
         self.tray_icon.setIcon(self.get_app_icon())
         self.tray_icon.show()
 
+        # 通知聚合器，合并短时间内的多条弹窗
+        self.notification_aggregator = NotificationAggregator(self.show_tray_message)
+
+    def create_alert_dispatcher(self):
+        """根据 settings.alert_sinks 创建告警输出，没有配置时返回 None"""
+        sinks = []
+        for spec in self.config_manager.get_setting('alert_sinks') or []:
+            try:
+                sinks.append(create_sink(spec))
+            except (TypeError, ValueError) as e:
+                logger.warning("告警输出配置无效 %s: %s", spec, e, extra=log_event('alert_sink_invalid'))
+        return AlertDispatcher(sinks) if sinks else None
+
+    def create_log_trigger(self):
+        """根据 settings.combat_log_path 创建战斗日志触发源"""
+        path = self.config_manager.get_setting('combat_log_path')
+        if not path:
+            return None
+        trigger = CombatLogTrigger(path, self.config_manager.get_setting('combat_log_encoding'))
+        trigger.triggered.connect(self.timer_manager.start_timer)
+        trigger.set_tasks(self.config_manager.get_tasks())
+        trigger.start()
+        logger.info("监视战斗日志: %s", path, extra=log_event('combat_log_start', path=path))
+        return trigger
+
+    def create_dashboard(self):
+        """根据 settings.dashboard_port 启动网页面板"""
+        port = self.config_manager.get_setting('dashboard_port')
+        if not port:
+            return None
+        host = self.config_manager.get_setting('dashboard_host')
+        try:
+            dashboard = DashboardServer(self.timer_manager, port, host)
+        except OSError as e:
+            logger.error("无法启动网页面板 %s:%s: %s", host, port, e, extra=log_event('dashboard_failed'))
+            return None
+        dashboard.start()
+        QApplication.instance().aboutToQuit.connect(dashboard.stop)
+        return dashboard
+
+    def create_watchdog(self):
+        """根据 settings.stall_threshold_ms 启动主线程卡顿检测"""
+        threshold_ms = self.config_manager.get_setting('stall_threshold_ms')
+        watchdog = StallWatchdog(threshold_ms / 1000, parent=self)
+        watchdog.profile_finished.connect(
+            lambda path: self.show_tray_message("性能采样完成", f"已保存到 {path}"))
+        if threshold_ms:
+            watchdog.start(active=self.is_watch_needed())
+        QApplication.instance().aboutToQuit.connect(watchdog.stop)
+        return watchdog
+
+    def start_profile(self):
+        """采样主线程调用栈 settings.profile_seconds 秒，写入折叠栈文件"""
+        seconds = self.config_manager.get_setting('profile_seconds')
+        path = os.path.join(self.config_manager.get_setting('profile_dir'),
+                            time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+        if self.watchdog.start_profile(seconds, path):
+            self.show_tray_message("性能采样", f"正在采样 {seconds} 秒…")
+        else:
+            self.show_tray_message("性能采样", "上一次采样还没有结束")
+
+    def update_log_trigger(self):
+        """任务变化后重新编译战斗日志匹配规则"""
+        if self.log_trigger is not None:
+            self.log_trigger.set_tasks(self.config_manager.get_tasks())
+
+    def show_analytics(self):
+        """显示冷却效率分析"""
+        if not NUMPY_AVAILABLE:
+            QMessageBox.warning(self, "无法分析", "冷却效率分析需要安装 numpy：pip install numpy")
+            return
+        history_path = self.config_manager.get_setting('session_history_path')
+        if not history_path:
+            QMessageBox.information(self, "无法分析", "会话历史记录已关闭 (settings.session_history_path)")
+            return
+
+        if self.analytics_view is None:
+            self.analytics_view = AnalyticsView(history_path, self.config_manager.get_tasks, self)
+        else:
+            self.analytics_view.refresh()
+        self.analytics_view.show()
+        self.analytics_view.raise_()
+
+    def show_recent_log(self):
+        """显示最近日志"""
+        if self.log_viewer is None:
+            self.log_viewer = LogViewer(self.event_log, self)
+        else:
+            self.log_viewer.refresh()
+        self.log_viewer.show()
+        self.log_viewer.raise_()
+
+    def is_display_visible(self):
+        """窗口是否可见且未最小化"""
+        return self.isVisible() and not self.isMinimized()
+
+    def is_watch_needed(self):
+        """有运行中的计时器或窗口可见时才需要卡顿检测，空闲时不产生唤醒"""
+        return self.is_display_visible() or bool(self.timer_manager.active_timers)
+
+    def schedule_refresh(self):
+        """按下一次显示变化的时间重新设置刷新定时器，空闲时停止"""
+        self.watchdog.set_active(self.is_watch_needed())
+        delay = None
+        if self.is_display_visible():
+            delay = self.timer_manager.get_next_display_change()
+
+        if delay is None:
+            self.update_timer.stop()
+            return
+
+        # 稍微延后，确保整数秒已经变化
+        self.update_timer.start(int(delay * 1000) + 5)
+
+    def on_refresh_timeout(self):
+        """刷新定时器到期"""
+        self.update_table_status()
+        self.schedule_refresh()
+
+    def on_timers_changed(self):
+        """计时器状态变化，立即刷新并重新对齐"""
+        if self.is_display_visible():
+            self.update_table_status()
+        self.schedule_refresh()
+
+    def showEvent(self, event):
+        """窗口显示时恢复刷新"""
+        super().showEvent(event)
+        self.on_timers_changed()
+
+    def hideEvent(self, event):
+        """窗口隐藏时停止刷新"""
+        super().hideEvent(event)
+        self.update_timer.stop()
+        self.watchdog.set_active(self.is_watch_needed())
+
+    def changeEvent(self, event):
+        """最小化时停止刷新，还原时恢复"""
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.on_timers_changed()
+
     def closeEvent(self, event):
         """关闭事件 - 最小化到托盘"""
         event.ignore()
@@ -522,28 +1099,25 @@ class MainWindow(QMainWindow):
 
     def add_task(self):
         """添加任务"""
-        dialog = TaskEditDialog(parent=self)
+        dialog = TaskEditDialog(parent=self, tasks=self.config_manager.get_tasks())
         dialog.task_saved.connect(self.save_task)
         dialog.show()
 
     def edit_task(self):
         """编辑任务"""
-        current_row = self.task_table.currentRow()
-        if current_row < 0:
+        task_data = self.get_current_task()
+        if task_data is None:
             QMessageBox.warning(self, "提示", "请选择要编辑的任务")
             return
 
-        tasks = self.config_manager.get_tasks()
-        if current_row < len(tasks):
-            task_data = tasks[current_row]
-            dialog = TaskEditDialog(task_data, parent=self)
-            dialog.task_saved.connect(self.save_task)
-            dialog.show()
+        dialog = TaskEditDialog(task_data, parent=self, tasks=self.config_manager.get_tasks())
+        dialog.task_saved.connect(self.save_task)
+        dialog.show()
 
     def delete_task(self):
         """删除任务"""
-        current_row = self.task_table.currentRow()
-        if current_row < 0:
+        task = self.get_current_task()
+        if task is None:
             QMessageBox.warning(self, "提示", "请选择要删除的任务")
             return
 
@@ -553,14 +1127,48 @@ class MainWindow(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            tasks = self.config_manager.get_tasks()
-            if current_row < len(tasks):
-                task = tasks[current_row]
-                # 停止计时器
-                self.timer_manager.stop_timer(task['id'])
-                # 删除任务
-                self.config_manager.delete_task(task['id'])
-                self.load_tasks()
+            # 停止计时器
+            self.timer_manager.stop_timer(task['id'])
+            # 删除任务
+            self.config_manager.delete_task(task['id'])
+            self.load_tasks()
+
+    def import_tasks(self):
+        """批量导入任务包"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入任务", "", "任务包 (*.json *.jsonl *.csv)"
+        )
+        if not file_path:
+            return
+
+        count, errors = self.config_manager.import_tasks(file_path)
+        if errors:
+            lines = [f"第 {index + 1} 个任务: {error}" if index >= 0 else error
+                     for index, error in errors[:10]]
+            if len(errors) > 10:
+                lines.append(f"... 共 {len(errors)} 个错误")
+            QMessageBox.warning(self, "导入失败", "\n".join(lines))
+            return
+
+        self.load_tasks()
+        self.timer_manager.update_hotkeys()
+        self.update_log_trigger()
+        QMessageBox.information(self, "导入完成", f"成功导入 {count} 个任务")
+
+    def export_tasks(self):
+        """批量导出任务包"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出任务", "tasks_export.json", "JSON (*.json);;JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if not file_path:
+            return
+
+        try:
+            count = self.config_manager.export_tasks(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
+            return
+        QMessageBox.information(self, "导出完成", f"成功导出 {count} 个任务")
 
     def save_task(self, task_data):
         """保存任务"""
@@ -573,209 +1181,131 @@ class MainWindow(QMainWindow):
 
         self.load_tasks()
         self.timer_manager.update_hotkeys()
+        self.update_log_trigger()
 
     def load_tasks(self):
         """加载任务到表格"""
-        tasks = self.config_manager.get_tasks()
-        self.task_table.setRowCount(len(tasks))
-
-        # 暂时断开信号连接，避免加载时触发保存
-        self.task_table.itemChanged.disconnect()
-
-        for row, task in enumerate(tasks):
-            # 任务名称 - 可编辑
-            name_item = QTableWidgetItem(task['name'])
-            name_item.setFlags(name_item.flags() | Qt.ItemIsEditable)
-            self.task_table.setItem(row, 0, name_item)
-
-            # 倒计时 - 可编辑
-            duration_item = QTableWidgetItem(str(task['duration']))
-            duration_item.setFlags(duration_item.flags() | Qt.ItemIsEditable)
-            self.task_table.setItem(row, 1, duration_item)
-
-            # 热键 - 特殊编辑方式
-            hotkey_text = task['hotkey'] if task['hotkey_enabled'] and task['hotkey'] else ""
-            hotkey_item = QTableWidgetItem(hotkey_text)
-            hotkey_item.setFlags(hotkey_item.flags() | Qt.ItemIsEditable)
-            self.task_table.setItem(row, 2, hotkey_item)
-
-            # 状态 - 完全只读
-            status = "运行中" if self.timer_manager.is_timer_running(task['id']) else "停止"
-            status_item = QTableWidgetItem(status)
-            status_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)  # 只允许选择，不允许编辑
-            self.task_table.setItem(row, 3, status_item)
-
-            # 弹窗提醒 - 下拉选择
-            popup_text = "是" if task['popup_reminder'] else "否"
-            popup_combo = QComboBox()
-            popup_combo.addItems(["是", "否"])
-            popup_combo.setCurrentText(popup_text)
-            popup_combo.currentTextChanged.connect(lambda text, r=row: self.on_popup_changed(r, text))
-            self.task_table.setCellWidget(row, 4, popup_combo)
-
-            # 语音提醒 - 下拉选择
-            voice_text = "是" if task['voice_reminder'] else "否"
-            voice_combo = QComboBox()
-            voice_combo.addItems(["是", "否"])
-            voice_combo.setCurrentText(voice_text)
-            voice_combo.currentTextChanged.connect(lambda text, r=row: self.on_voice_changed(r, text))
-            self.task_table.setCellWidget(row, 5, voice_combo)
-
-            # 剩余时间 - 只读
-            remaining = self.timer_manager.get_remaining_time(task['id'])
-            remaining_text = f"{remaining}秒" if remaining > 0 else "-"
-            remaining_item = QTableWidgetItem(remaining_text)
-            remaining_item.setFlags(remaining_item.flags() & ~Qt.ItemIsEditable)
-            self.task_table.setItem(row, 6, remaining_item)
-
-        # 重新连接信号
-        self.task_table.itemChanged.connect(self.on_table_item_changed)
+        self.task_model.set_tasks(self.config_manager.get_tasks())
+
+    def on_config_reloaded(self, new_tasks):
+        """配置文件被外部修改，只应用变化的部分"""
+        old_tasks = self.config_manager.tasks
+        new_tasks, errors = self.config_manager.validate_reloaded_tasks(new_tasks)
+        for task, error in errors:
+            logger.warning("外部修改的任务 '%s' 无效，未应用: %s", task.get('name'), error,
+                           extra=log_event('config_reload_invalid', task['id'], error=error))
+        diff = diff_tasks(old_tasks, new_tasks)
+        if not (diff['added'] or diff['removed'] or diff['changed']):
+            return
+
+        self.config_manager.replace_tasks(new_tasks)
+        cycle = ChainGraph(new_tasks).find_cycle()
+        if cycle:
+            # 外部修改没有经过保存时的检查，运行时每轮联动中每个任务最多开始一次
+            logger.warning("联动规则形成循环: %s", describe_cycle(cycle, new_tasks), extra=log_event('chain_cycle'))
+
+        # 计时器：删除的任务静默移除，修改的任务保留已过去的时间
+        for task in diff['removed']:
+            self.timer_manager.discard_timer(task['id'])
+        for task in diff['changed']:
+            self.timer_manager.apply_task_update(task)
+
+        # 表格：任务顺序不变时只刷新内容变化的行，并保留选择和滚动位置
+        dirty_ids = {task['id'] for task in diff['added'] + diff['changed']}
+        self.task_model.set_tasks(new_tasks, dirty_ids)
+
+        # 热键：只有热键相关字段变化时才重新绑定
+        old_by_id = {task['id']: task for task in old_tasks}
+        hotkey_fields = ('hotkey', 'hotkey_enabled')
+        hotkeys_changed = any(
+            task.get('hotkey_enabled') and task.get('hotkey')
+            for task in diff['added'] + diff['removed']
+        ) or any(
+            any(task.get(field) != old_by_id[task['id']].get(field) for field in hotkey_fields)
+            for task in diff['changed']
+        )
+        if hotkeys_changed:
+            self.timer_manager.update_hotkeys()
+        self.update_log_trigger()
+
+        logger.info("配置已热加载: 新增 %d, 删除 %d, 修改 %d",
+                    len(diff['added']), len(diff['removed']), len(diff['changed']),
+                    extra=log_event('config_reload', added=len(diff['added']),
+                                removed=len(diff['removed']), changed=len(diff['changed'])))
 
     def update_table_status(self):
         """更新表格状态"""
-        tasks = self.config_manager.get_tasks()
-        for row, task in enumerate(tasks):
-            if row < self.task_table.rowCount():
-                # 更新状态 - 确保只读
-                status = "运行中" if self.timer_manager.is_timer_running(task['id']) else "停止"
-                status_item = QTableWidgetItem(status)
-                status_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)  # 只允许选择，不允许编辑
-                self.task_table.setItem(row, 3, status_item)
-
-                # 更新剩余时间 - 确保只读
-                remaining = self.timer_manager.get_remaining_time(task['id'])
-                remaining_text = f"{remaining}秒" if remaining > 0 else "-"
-                remaining_item = QTableWidgetItem(remaining_text)
-                remaining_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)  # 只允许选择，不允许编辑
-                self.task_table.setItem(row, 6, remaining_item)
+        self.task_model.refresh_timers()
+
+    def get_current_task(self):
+        """当前行对应的任务，没有当前行时返回 None"""
+        return self.task_model.task_at(self.task_table.currentIndex().row())
+
+    def get_selected_task_ids(self):
+        """选中行对应的任务ID (按行号排序)"""
+        rows = sorted({index.row() for index in self.task_table.selectionModel().selectedRows()})
+        return [self.task_model.task_at(row)['id'] for row in rows]
 
     def start_timer(self):
-        """开始计时"""
-        current_row = self.task_table.currentRow()
-        if current_row < 0:
+        """开始计时 (选中多行时一起开始)"""
+        task_ids = self.get_selected_task_ids()
+        if not task_ids:
             QMessageBox.warning(self, "提示", "请选择要开始计时的任务")
             return
 
-        tasks = self.config_manager.get_tasks()
-        if current_row < len(tasks):
-            task = tasks[current_row]
-            self.timer_manager.start_timer(task['id'])
+        if len(task_ids) == 1:
+            self.timer_manager.start_timer(task_ids[0])
+        else:
+            self.timer_manager.start_group(task_ids)
 
     def stop_timer(self):
-        """停止计时"""
-        current_row = self.task_table.currentRow()
-        if current_row < 0:
+        """停止计时 (选中多行时一起停止)"""
+        task_ids = self.get_selected_task_ids()
+        if not task_ids:
             QMessageBox.warning(self, "提示", "请选择要停止计时的任务")
             return
 
-        tasks = self.config_manager.get_tasks()
-        if current_row < len(tasks):
-            task = tasks[current_row]
-            self.timer_manager.stop_timer(task['id'])
+        if len(task_ids) == 1:
+            self.timer_manager.stop_timer(task_ids[0])
+        else:
+            self.timer_manager.stop_timers(task_ids)
 
-    def on_cell_double_clicked(self, row, column):
-        """处理单元格双击事件"""
-        if column == 2:  # 热键列
-            self.edit_hotkey(row)
-
-    def on_popup_changed(self, row, text):
-        """弹窗提醒改变"""
-        tasks = self.config_manager.get_tasks()
-        if row < len(tasks):
-            task = tasks[row]
-            task['popup_reminder'] = (text == "是")
-            self.config_manager.update_task(task)
-
-    def on_voice_changed(self, row, text):
-        """语音提醒改变"""
-        tasks = self.config_manager.get_tasks()
-        if row < len(tasks):
-            task = tasks[row]
-            task['voice_reminder'] = (text == "是")
-            self.config_manager.update_task(task)
-
-    def edit_hotkey(self, row):
-        """编辑热键"""
-        current_item = self.task_table.item(row, 2)
-        if current_item:
-            # 获取当前单元格的宽度
-            current_width = self.task_table.columnWidth(2)
-            
-            # 创建临时的热键编辑器
-            hotkey_editor = HotkeyEdit()
-            hotkey_editor.setText(current_item.text())
-            
-            # 设置固定宽度，防止单元格变宽
-            hotkey_editor.setFixedWidth(current_width - 4)  # 减去一些边距
-            hotkey_editor.setSizePolicy(hotkey_editor.sizePolicy().horizontalPolicy(), hotkey_editor.sizePolicy().verticalPolicy())
-
-            # 设置为表格的编辑器
-            self.task_table.setCellWidget(row, 2, hotkey_editor)
-            hotkey_editor.setFocus()
-
-            # 当失去焦点时保存
-            def save_hotkey():
-                new_hotkey = hotkey_editor.text()
-                self.task_table.removeCellWidget(row, 2)
-                current_item.setText(new_hotkey)
-                self.save_table_changes()
-
-            hotkey_editor.editingFinished.connect(save_hotkey)
-
-    def on_table_item_changed(self, item):
-        """处理表格项目改变事件"""
-        if item.column() in [0, 1, 2]:  # 只处理可编辑的列
-            self.save_table_changes()
-
-    def save_table_changes(self):
-        """保存表格修改"""
-        tasks = self.config_manager.get_tasks()
-
-        for row in range(self.task_table.rowCount()):
-            if row < len(tasks):
-                task = tasks[row]
-
-                # 更新任务名称
-                name_item = self.task_table.item(row, 0)
-                if name_item:
-                    new_name = name_item.text().strip()
-                    if new_name:
-                        task['name'] = new_name
-
-                # 更新倒计时
-                duration_item = self.task_table.item(row, 1)
-                if duration_item:
-                    try:
-                        new_duration = int(duration_item.text())
-                        if new_duration > 0:
-                            task['duration'] = new_duration
-                    except ValueError:
-                        # 恢复原值
-                        duration_item.setText(str(task['duration']))
-
-                # 更新热键
-                hotkey_item = self.task_table.item(row, 2)
-                if hotkey_item:
-                    new_hotkey = hotkey_item.text().strip()
-                    task['hotkey'] = new_hotkey
-                    task['hotkey_enabled'] = bool(new_hotkey)
-
-                # 保存任务
-                self.config_manager.update_task(task)
-
-        # 更新热键绑定
-        self.timer_manager.update_hotkeys()
+    def on_table_item_changed(self, row, column, text):
+        """保存一个单元格的编辑：只检查、修改并保存这一个任务"""
+        task = self.task_model.task_at(row)
+        if task is None:
+            return
+        changes = edit_changes(column, text)
+        errors = self.config_manager.validate_task({**task.to_dict(), **changes})
+        if errors:
+            self.task_model.update_task(task)  # 恢复原值
+            QMessageBox.warning(self, "错误", "\n".join(errors))
+            return
 
-    def show_notification(self, title, message):
-        """显示通知"""
+        self.config_manager.update_task({'id': task['id'], **changes})
+        self.task_model.update_task(self.config_manager.get_task_by_id(task['id']))
+        # 只有热键列变化时才重新绑定热键
+        if column == COL_HOTKEY:
+            self.timer_manager.update_hotkeys()
+
+    def show_notification(self, title, message, name=None):
+        """显示通知 (经过聚合器合并与限流)"""
+        self.notification_aggregator.push(title, message, name)
+
+    def show_tray_message(self, title, message):
+        """弹出托盘通知"""
         self.tray_icon.showMessage(title, message, QSystemTrayIcon.Information, 3000)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后的程序启动热键捕获子进程时需要
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)  # 关闭窗口不退出程序
 
-    window = MainWindow()
+    event_log = EventLog(console=sys.stdout is not None).start()
+    app.aboutToQuit.connect(event_log.stop)
+
+    window = MainWindow(event_log)
     window.show()
 
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+任务与计时器状态的紧凑数据类型
+
+Task 是不可变的，可以直接交给调用者而不用复制；
+序列化时按照读入时的字段顺序输出，保持 tasks_config.json 的格式不变。
+"""
+
+# 任务字段及默认值 (顺序即新建任务时的字段顺序)
+TASK_DEFAULTS = (
+    ('id', None),
+    ('name', ''),
+    ('duration', 60),
+    ('hotkey_enabled', True),
+    ('hotkey', ''),
+    ('hotkey_mode', 'toggle'),
+    ('retrigger_ms', 300),
+    ('group', ''),
+    ('shared_cooldown', ''),
+    ('charges', 1),
+    ('log_pattern', ''),
+    ('chains', ()),  # 联动规则，见 task_chains.py
+    ('popup_reminder', True),
+    ('voice_reminder', True),
+    ('custom_voice', ''),
+)
+
+TASK_FIELDS = tuple(name for name, _ in TASK_DEFAULTS)
+_DEFAULTS = dict(TASK_DEFAULTS)
+
+# 相同的字段顺序共用一个元组
+_key_orders = {}
+
+
+def _intern_keys(keys):
+    keys = tuple(keys)
+    return _key_orders.setdefault(keys, keys)
+
+
+class Task:
+    """任务 (不可变)
+
+    支持 task['name'] / task.get('name') 的只读访问方式，
+    修改时使用 replace() 生成新的任务。
+    """
+    __slots__ = TASK_FIELDS + ('_keys', '_extra')
+
+    def __init__(self, **fields):
+        for name, default in TASK_DEFAULTS:
+            object.__setattr__(self, name, fields.pop(name, default))
+        object.__setattr__(self, '_keys', _intern_keys(TASK_FIELDS))
+        object.__setattr__(self, '_extra', fields or None)
+
+    @classmethod
+    def from_dict(cls, data):
+        """从配置字典创建，记住字段顺序和未知字段"""
+        task = cls.__new__(cls)
+        for name, default in TASK_DEFAULTS:
+            object.__setattr__(task, name, data.get(name, default))
+        extra = {key: value for key, value in data.items() if key not in _DEFAULTS}
+        object.__setattr__(task, '_keys', _intern_keys(data.keys()))
+        object.__setattr__(task, '_extra', extra or None)
+        return task
+
+    def to_dict(self):
+        """转换为配置字典 (字段顺序与读入时相同)"""
+        extra = self._extra
+        return {
+            key: extra[key] if extra and key in extra else getattr(self, key)
+            for key in self._keys
+        }
+
+    def replace(self, **changes):
+        """返回修改了部分字段的新任务 (新增的字段追加到末尾)"""
+        keys = self._keys
+        new_keys = tuple(key for key in changes if key not in keys)
+        if new_keys:
+            keys = _intern_keys(keys + new_keys)
+
+        task = Task.__new__(Task)
+        for name in TASK_FIELDS:
+            object.__setattr__(task, name, changes.pop(name) if name in changes else getattr(self, name))
+        extra = {**self._extra, **changes} if self._extra else changes
+        object.__setattr__(task, '_keys', keys)
+        object.__setattr__(task, '_extra', extra or None)
+        return task
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in TASK_FIELDS)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Task 是不可变的，请使用 replace()")
+
+    def __getitem__(self, key):
+        if key in _DEFAULTS:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return self._values() == other._values() and self._extra == other._extra
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, name={self.name!r}, duration={self.duration!r})"
+
+
+class TimerState:
+    """运行中的计时器状态
+
+    截止时间保存在所属冷却分组中，这里只保存任务快照和充能信息。
+    """
+    __slots__ = ('task', 'duration', 'group', 'charges', 'max_charges', 'due')
+
+    def __init__(self, task, group='', charges=0, max_charges=1):
+        self.task = task
+        self.duration = task['duration']
+        self.group = group
+        self.charges = charges  # 当前可用充能
+        self.max_charges = max_charges
+        self.due = None  # 最近一次计划到期的时刻 (clock.now 基准)，用于统计提醒延迟
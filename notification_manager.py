@@ -0,0 +1,86 @@
+from clock import SystemClock
+
+
+class NotificationAggregator:
+    """通知聚合器
+
+    短时间窗口内的多条通知会被合并成一条托盘弹窗，
+    并且两次弹窗之间至少间隔 min_interval_ms 毫秒。
+    """
+
+    def __init__(self, show_func, window_ms=400, min_interval_ms=1500, max_names=5, clock=None):
+        self.clock = clock or SystemClock()
+        self.show_func = show_func  # 实际弹窗函数 show_func(title, message)
+        self.window_ms = window_ms
+        self.min_interval_ms = min_interval_ms
+        self.max_names = max_names
+
+        self.pending = []  # 待合并的通知 [(title, message, name)]
+        self.last_shown = None  # 上次弹窗时间 (clock.now)
+        self.shown_count = 0  # 实际弹窗次数
+        self.suppressed_count = 0  # 被合并掉的通知数
+
+        self.flush_timer = self.clock.create_timer(self.flush)
+
+    def push(self, title, message, name=None):
+        """加入一条通知，窗口结束后统一弹出"""
+        self.pending.append((title, message, name))
+
+        if not self.flush_timer.is_active():
+            self.flush_timer.start(self._next_delay_ms() / 1000.0)
+
+    def _next_delay_ms(self):
+        """计算距离下次允许弹窗的等待时间"""
+        delay = self.window_ms
+        if self.last_shown is not None:
+            elapsed_ms = (self.clock.now() - self.last_shown) * 1000
+            delay = max(delay, self.min_interval_ms - elapsed_ms)
+        return delay
+
+    def flush(self):
+        """合并并弹出待处理的通知"""
+        if not self.pending:
+            return
+
+        events = self.pending
+        self.pending = []
+
+        title, message = self.merge(events)
+        self.suppressed_count += len(events) - 1
+        self.shown_count += 1
+        self.last_shown = self.clock.now()
+
+        self.show_func(title, message)
+
+    def merge(self, events):
+        """把多条通知合并成一条 (title, message)"""
+        if len(events) == 1:
+            title, message, _ = events[0]
+            return title, message
+
+        # 按标题分组，保持出现顺序
+        groups = {}
+        for title, message, name in events:
+            groups.setdefault(title, []).append(name or message)
+
+        lines = [self._format_group(title, names) for title, names in groups.items()]
+
+        if len(groups) == 1:
+            return next(iter(groups)), lines[0]
+        return f"技能提醒 ({len(events)} 条)", "\n".join(lines)
+
+    def _format_group(self, title, names):
+        """格式化同一类通知，例如 "3 个技能时间到了: 离渊, 鹰扬诀, 动愈守中" """
+        shown = names[:self.max_names]
+        text = ", ".join(shown)
+        if len(names) > len(shown):
+            text += " 等"
+        return f"{len(names)} 个技能{title}: {text}"
+
+    def get_stats(self):
+        """获取统计信息"""
+        return {
+            'shown': self.shown_count,
+            'suppressed': self.suppressed_count,
+            'pending': len(self.pending)
+        }
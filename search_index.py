@@ -0,0 +1,95 @@
+"""
+任务搜索索引
+
+按任务名称、热键和中文名称的拼音首字母 (需要 pypinyin) 做子串搜索。
+每个字符对应包含它的任务集合，新的查询先按字符求交集得到候选，再逐个确认子串；
+在上一次查询后面继续输入时，只在上一次的结果中缩小范围，不重新扫描所有任务。
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypinyin import lazy_pinyin, Style
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+    logger.warning("pypinyin 未安装，任务搜索将不支持拼音首字母")
+
+
+def pinyin_initials(text):
+    """中文的拼音首字母，例如 动愈守中 -> dysz (非中文字符保持不变)"""
+    if not PYPINYIN_AVAILABLE:
+        return ''
+    return ''.join(lazy_pinyin(text, style=Style.FIRST_LETTER)).replace(' ', '').lower()
+
+
+def search_keys(task):
+    """任务的可搜索文本 (小写)"""
+    keys = [task['name'].lower()]
+    if task.get('hotkey'):
+        keys.append(task['hotkey'].lower())
+    initials = pinyin_initials(task['name'])
+    if initials and initials != keys[0]:
+        keys.append(initials)
+    return tuple(keys)
+
+
+class TaskSearchIndex:
+    """任务名称 / 热键 / 拼音首字母的子串索引"""
+
+    def __init__(self, tasks=()):
+        self.build(tasks)
+
+    def build(self, tasks):
+        """重建索引"""
+        self.order = [task['id'] for task in tasks]
+        self.position = {task_id: i for i, task_id in enumerate(self.order)}
+        self.keys = {}
+        self.chars = {}  # {字符: {task_id}}
+        for task in tasks:
+            self._add(task)
+        self.last_query = None
+        self.last_result = None
+
+    def _add(self, task):
+        keys = search_keys(task)
+        self.keys[task['id']] = keys
+        for char in set(''.join(keys)):
+            self.chars.setdefault(char, set()).add(task['id'])
+
+    def _remove(self, task_id):
+        for char in set(''.join(self.keys.pop(task_id, ()))):
+            ids = self.chars.get(char)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.chars[char]
+
+    def update(self, task):
+        """单个任务的名称或热键变化后更新索引 (任务顺序不变)"""
+        if task['id'] not in self.position:
+            return
+        self._remove(task['id'])
+        self._add(task)
+        self.last_query = None
+
+    def search(self, query):
+        """返回匹配的任务ID (保持任务顺序)，查询为空时返回全部"""
+        query = query.strip().lower()
+        if not query:
+            return list(self.order)
+
+        if self.last_query and query.startswith(self.last_query):
+            # 继续输入：结果只会变少，在上一次的结果中筛选
+            candidates = self.last_result
+        else:
+            sets = sorted((self.chars.get(char, set()) for char in set(query)), key=len)
+            candidates = set.intersection(*sets) if sets[0] else set()
+            candidates = sorted(candidates, key=self.position.__getitem__)
+
+        result = [task_id for task_id in candidates if any(query in key for key in self.keys[task_id])]
+        self.last_query = query
+        self.last_result = result
+        return result
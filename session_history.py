@@ -0,0 +1,73 @@
+"""
+会话历史
+
+记录计时器的开始、停止和完成事件，每个事件一行 JSON，供冷却效率分析使用。
+程序每次启动写入一条 open 事件，分析时据此把历史分成多个会话，不把关闭程序的时间算进去。
+"""
+
+import json
+import logging
+import time
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE = "session_history.jsonl"
+
+# 记录的事件类型
+EVENT_OPEN = 'open'
+RECORDED_EVENTS = ('start', 'stop', 'finish')
+
+
+class SessionRecorder:
+    """把 TimerManager.timer_event 追加写入会话历史文件"""
+
+    def __init__(self, path=SESSION_FILE, clock=None):
+        self.path = path
+        self.file = None
+        self.count = 0
+        try:
+            self.file = open(path, 'a', encoding='utf-8')
+        except OSError as e:
+            logger.error("无法打开会话历史 %s: %s", path, e, extra=event('session_open_failed'))
+            return
+        self._write({'t': clock.wall() if clock else time.time(), 'event': EVENT_OPEN})
+
+    def on_timer_event(self, kind, task_id, wall):
+        """TimerManager.timer_event 的槽函数"""
+        if kind in RECORDED_EVENTS:
+            self._write({'t': wall, 'event': kind, 'task_id': task_id})
+
+    def _write(self, record):
+        if self.file is None:
+            return
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_session_history(path=SESSION_FILE, since=None):
+    """读取会话历史，返回 [(墙上时间, 事件类型, task_id)]，按时间排序
+
+    since 为墙上时间时只返回之后的事件；损坏的行会被跳过。
+    """
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                    record = (float(data['t']), data['event'], data.get('task_id'))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if since is None or record[0] >= since:
+                    records.append(record)
+    except OSError:
+        return []
+    records.sort(key=lambda record: record[0])
+    return records
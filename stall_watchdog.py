@@ -0,0 +1,175 @@
+"""
+主线程卡顿检测与采样分析
+
+主线程中的 QTimer 定期发出心跳，后台监视线程发现心跳超过阈值没有更新时，
+通过 sys._current_frames() 取得主线程此刻的调用栈写入日志，可以看出是哪段代码阻塞了事件循环。
+空闲时 (set_active(False)) 心跳定时器和监视线程都停下等待，不产生任何唤醒。
+
+采样分析在后台线程中每隔几毫秒记录一次主线程的调用栈，结束后写成折叠栈格式
+(每行 "根;...;叶 次数")，可以直接用 flamegraph.pl 或 speedscope 生成火焰图。
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from event_log import event
+
+logger = logging.getLogger(__name__)
+
+
+def frame_name(frame):
+    """折叠栈中的帧名称: 文件名:函数名"""
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+def fold_stack(frame):
+    """调用栈折叠为 "根;...;叶" """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """对一个线程按固定间隔采样调用栈"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()  # {折叠栈: 次数}
+        self.samples = 0
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.counts[fold_stack(frame)] += 1
+            self.samples += 1
+
+    def run(self, seconds, stop_event=None):
+        """采样 seconds 秒 (stop_event 被设置时提前结束)"""
+        stop_event = stop_event or threading.Event()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.sample()
+            if stop_event.wait(self.interval):
+                break
+
+    def write(self, path):
+        """写入折叠栈文件"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StallWatchdog(QObject):
+    """主线程卡顿监视器
+
+    在主线程中创建并调用 start()。心跳超过 threshold 秒没有更新时记录一次卡顿和主线程调用栈，
+    心跳恢复后记录卡顿的总时长。set_active(False) 暂停检测 (例如没有运行中的计时器且窗口隐藏时)。
+    """
+    profile_finished = pyqtSignal(str)  # 采样分析完成 (文件路径)，在主线程中发出
+
+    def __init__(self, threshold=0.25, interval=0.1, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.interval = interval
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stalled = False
+        self.stall_count = 0
+        self.max_stall = 0.0
+        self.last_stack = ''
+        self.stop_event = threading.Event()
+        self.active = threading.Event()  # 是否正在检测
+        self.thread = None
+        self.profile_thread = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.timeout.connect(self.beat)
+
+    def start(self, active=True):
+        self.thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self.thread.start()
+        self.set_active(active)
+
+    def set_active(self, active):
+        """开始或暂停检测 (在主线程中调用)"""
+        if active == self.active.is_set() or self.thread is None:
+            return
+        if active:
+            self.last_beat = time.monotonic()
+            self.heartbeat.start(int(self.interval * 1000))
+            self.active.set()
+        else:
+            self.beat()  # 主线程此刻有响应，结束可能正在记录的卡顿
+            self.active.clear()
+            self.heartbeat.stop()
+
+    def beat(self):
+        """主线程心跳"""
+        now = time.monotonic()
+        if self.stalled:
+            duration = now - self.last_beat
+            self.stalled = False
+            self.max_stall = max(self.max_stall, duration)
+            logger.warning("主线程恢复响应，卡顿 %.0f 毫秒", duration * 1000,
+                           extra=event('stall_end', ms=round(duration * 1000)))
+        self.last_beat = now
+
+    def _watch(self):
+        while not self.stop_event.is_set():
+            if not self.active.is_set():
+                self.active.wait()  # 暂停期间不唤醒，stop() 也会设置 active
+                continue
+            if self.stop_event.wait(self.interval):
+                break
+            behind = time.monotonic() - self.last_beat
+            if behind <= self.threshold or self.stalled or not self.active.is_set():
+                continue
+            self.stalled = True
+            self.stall_count += 1
+            frame = sys._current_frames().get(self.main_thread_id)
+            self.last_stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+            logger.warning("主线程 %.0f 毫秒无响应，当前调用栈:\n%s", behind * 1000, self.last_stack,
+                           extra=event('stall', ms=round(behind * 1000), stack=self.last_stack))
+
+    def start_profile(self, seconds, path):
+        """在后台采样主线程 seconds 秒并写入折叠栈文件，已经在采样时返回 False"""
+        if self.profile_thread is not None and self.profile_thread.is_alive():
+            return False
+        self.profile_thread = threading.Thread(target=self._profile, args=(seconds, path),
+                                               name="sampling-profiler", daemon=True)
+        self.profile_thread.start()
+        logger.info("开始性能采样 %s 秒", seconds, extra=event('profile_start', seconds=seconds))
+        return True
+
+    def _profile(self, seconds, path):
+        profiler = SamplingProfiler(self.main_thread_id)
+        profiler.run(seconds, self.stop_event)
+        try:
+            profiler.write(path)
+        except OSError as e:
+            logger.error("写入性能采样失败 %s: %s", path, e, extra=event('profile_failed', path=path))
+            return
+        logger.info("性能采样完成: %d 次采样 -> %s", profiler.samples, path,
+                    extra=event('profile_done', path=path, samples=profiler.samples))
+        self.profile_finished.emit(path)
+
+    def get_stats(self):
+        return {'stalls': self.stall_count, 'max_stall_ms': round(self.max_stall * 1000)}
+
+    def stop(self):
+        self.heartbeat.stop()
+        self.stop_event.set()
+        self.active.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
@@ -0,0 +1,128 @@
+"""
+任务联动规则
+
+任务的 chains 字段声明联动规则，例如 "A 完成时开始 B"、"C 开始时停止 D"：
+
+    "chains": [
+        {"on": "finish", "action": "start", "target": "<任务ID>"},
+        {"on": "start", "action": "stop", "target": "<任务ID>"}
+    ]
+
+TimerManager 用 ChainGraph 查找触发事件对应的动作，在触发事件的同一次调度中直接执行。
+"开始时开始另一个任务" 会在同一时刻继续触发，这类规则不能形成循环，保存配置时检查。
+"""
+
+from typing import Dict, List, Optional
+
+# 触发事件与动作
+CHAIN_EVENTS = {'start': '开始时', 'finish': '完成时'}
+CHAIN_ACTIONS = {'start': '开始', 'stop': '停止'}
+
+
+def validate_chain_format(chains) -> List[str]:
+    """检查规则格式 (不检查目标是否存在)"""
+    if not chains:
+        return []
+    if not isinstance(chains, (list, tuple)):
+        return ["联动规则必须是列表"]
+    errors = []
+    for rule in chains:
+        if not isinstance(rule, dict):
+            errors.append("联动规则格式错误")
+        elif not isinstance(rule.get('on'), str) or rule['on'] not in CHAIN_EVENTS:
+            errors.append(f"联动规则的触发事件无效: {rule.get('on')}")
+        elif not isinstance(rule.get('action'), str) or rule['action'] not in CHAIN_ACTIONS:
+            errors.append(f"联动规则的动作无效: {rule.get('action')}")
+        elif not rule.get('target') or not isinstance(rule.get('target'), str):
+            errors.append("联动规则缺少目标任务")
+    return errors
+
+
+def _start_node(task):
+    """同一共享冷却的任务总是一起开始，视为一个节点"""
+    shared = task.get('shared_cooldown', '')
+    return ('shared', shared) if shared else ('task', task['id'])
+
+
+class ChainGraph:
+    """联动规则的事件图 {(触发事件, 任务ID): [(动作, 目标任务ID)]}"""
+
+    def __init__(self, tasks):
+        self.tasks = {task['id']: task for task in tasks}
+        self.rules = {}
+        for task in tasks:
+            for rule in task.get('chains') or ():
+                if isinstance(rule, dict):
+                    key = (rule.get('on'), task['id'])
+                    self.rules.setdefault(key, []).append((rule.get('action'), rule.get('target')))
+
+    def actions(self, kind, task_id):
+        """触发事件对应的动作 [(动作, 目标任务ID)]，目标已删除的规则会被跳过"""
+        return [(action, target) for action, target in self.rules.get((kind, task_id), ())
+                if target in self.tasks]
+
+    def missing_targets(self):
+        """引用了不存在任务的规则 [(任务ID, 目标任务ID)]"""
+        return [(task_id, target) for (_, task_id), actions in self.rules.items()
+                for _, target in actions if target not in self.tasks]
+
+    def find_cycle(self) -> Optional[List[str]]:
+        """查找同一时刻的循环 ("开始时开始" 规则)，返回循环上的任务ID，没有时返回 None"""
+        edges = {}  # {节点: [(目标节点, 任务ID, 目标任务ID)]}
+        for (kind, task_id), actions in self.rules.items():
+            source = self.tasks.get(task_id)
+            if kind != 'start' or source is None:
+                continue
+            for action, target in actions:
+                if action == 'start' and target in self.tasks:
+                    edges.setdefault(_start_node(source), []).append(
+                        (_start_node(self.tasks[target]), task_id, target))
+
+        # 迭代深度优先搜索，回到搜索路径上的节点即为循环
+        # trail[i] 是从 stack[i] 到 stack[i + 1] 的规则 (任务ID, 目标任务ID)
+        visiting, done = {}, set()
+        for root in edges:
+            if root in done:
+                continue
+            stack, trail = [(root, iter(edges[root]))], []
+            visiting[root] = 0
+            while stack:
+                node, children = stack[-1]
+                for child, task_id, target in children:
+                    if child in visiting:
+                        return [source for source, _ in trail[visiting[child]:]] + [task_id, target]
+                    if child not in done:
+                        visiting[child] = len(stack)
+                        trail.append((task_id, target))
+                        stack.append((child, iter(edges.get(child, ()))))
+                        break
+                else:
+                    stack.pop()
+                    del visiting[node]
+                    done.add(node)
+                    if trail:
+                        trail.pop()
+        return None
+
+
+def describe_cycle(cycle, tasks) -> str:
+    """循环的文字描述，例如 A → B → A"""
+    names = {task['id']: task['name'] for task in tasks}
+    return " → ".join(names.get(task_id, task_id) for task_id in cycle)
+
+
+def validate_chains(task_data: Dict, tasks) -> List[str]:
+    """检查保存 task_data 后整个任务列表的联动规则：格式、目标是否存在、是否形成循环"""
+    errors = validate_chain_format(task_data.get('chains'))
+    if errors:
+        return errors
+
+    task_id = task_data.get('id')
+    merged = [task for task in tasks if task['id'] != task_id] + [task_data]
+    graph = ChainGraph(merged)
+    if any(source == task_id for source, _ in graph.missing_targets()):
+        errors.append("联动规则的目标任务不存在")
+    cycle = graph.find_cycle()
+    if cycle:
+        errors.append(f"联动规则形成循环: {describe_cycle(cycle, merged)}")
+    return errors
@@ -0,0 +1,212 @@
+"""
+任务表格的数据模型
+
+表格视图只向模型查询可见行的数据，任务再多也不会预先创建单元格和下拉框。
+搜索时模型只暴露匹配的行 (见 search_index.py)，行号通过 task_at() 换算成任务。
+"""
+
+from bisect import bisect_left
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from search_index import TaskSearchIndex
+
+COLUMNS = ("任务名称", "倒计时(秒)", "热键", "状态", "弹窗提醒", "语音提醒", "剩余时间")
+COL_NAME, COL_DURATION, COL_HOTKEY, COL_STATUS, COL_POPUP, COL_VOICE, COL_REMAINING = range(len(COLUMNS))
+EDITABLE_COLUMNS = (COL_NAME, COL_DURATION, COL_HOTKEY, COL_POPUP, COL_VOICE)
+CHOICE_COLUMNS = (COL_POPUP, COL_VOICE)  # 是/否 下拉选择
+
+
+def edit_changes(column, text):
+    """单元格编辑对应的任务字段修改 {字段: 新值}，由 ConfigManager.validate_task 检查"""
+    if column == COL_NAME:
+        return {'name': text.strip()}
+    if column == COL_DURATION:
+        try:
+            return {'duration': int(text)}
+        except ValueError:
+            return {'duration': text}  # 保留原文本，检查时报告 "倒计时必须是正整数"
+    if column == COL_HOTKEY:
+        hotkey = text.strip()
+        return {'hotkey': hotkey, 'hotkey_enabled': bool(hotkey)}
+    if column == COL_POPUP:
+        return {'popup_reminder': text == "是"}
+    if column == COL_VOICE:
+        return {'voice_reminder': text == "是"}
+    return {}
+
+
+class TaskTableModel(QAbstractTableModel):
+    """任务列表模型
+
+    编辑后的文本先保存在 pending 中并发出 edited(行, 列, 新值)，
+    由主窗口保存到配置，再用 update_task() 同步这一行 (保存失败时同样用它恢复原值)。
+    """
+    edited = pyqtSignal(int, int, str)
+
+    def __init__(self, timer_manager, parent=None):
+        super().__init__(parent)
+        self.timer_manager = timer_manager
+        self.tasks = []
+        self.rows = []  # 显示的行 -> self.tasks 中的序号
+        self.search_index = TaskSearchIndex()
+        self.query = ''
+        self.pending = {}  # 尚未保存的编辑 {(task_id, 列): 文本}
+
+    # ---------- Qt 模型接口 ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.cell_text(index.row(), index.column())
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in EDITABLE_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() not in EDITABLE_COLUMNS:
+            return False
+        row, column = index.row(), index.column()
+        value = str(value)
+        if value == self.cell_text(row, column):
+            return False
+        self.pending[(self.tasks[self.rows[row]]['id'], column)] = value
+        self.dataChanged.emit(index, index)
+        self.edited.emit(row, column, value)
+        return True
+
+    # ---------- 行与任务 ----------
+
+    def task_at(self, row):
+        """显示的第 row 行对应的任务，越界时返回 None"""
+        if 0 <= row < len(self.rows):
+            return self.tasks[self.rows[row]]
+        return None
+
+    def cell_text(self, row, column):
+        """单元格文本 (有未保存的编辑时返回编辑后的文本)"""
+        task = self.tasks[self.rows[row]]
+        pending = self.pending.get((task['id'], column))
+        if pending is not None:
+            return pending
+        if column == COL_NAME:
+            return task['name']
+        if column == COL_DURATION:
+            return str(task['duration'])
+        if column == COL_HOTKEY:
+            return task['hotkey'] if task['hotkey_enabled'] and task['hotkey'] else ""
+        if column == COL_STATUS:
+            return self.status_text(task)
+        if column == COL_POPUP:
+            return "是" if task['popup_reminder'] else "否"
+        if column == COL_VOICE:
+            return "是" if task['voice_reminder'] else "否"
+        return self.remaining_text(task)
+
+    def status_text(self, task):
+        """状态列文本，充能技能显示当前层数"""
+        charges = self.timer_manager.get_charges(task['id'])
+        if charges is not None:
+            return f"充能 {charges[0]}/{charges[1]}"
+        if self.timer_manager.is_timer_running(task['id']):
+            return "运行中"
+        max_charges = task.get('charges', 1)
+        return f"充能 {max_charges}/{max_charges}" if max_charges > 1 else "停止"
+
+    def remaining_text(self, task):
+        """剩余时间列文本，充能技能显示下一层充能的恢复时间"""
+        remaining = self.timer_manager.get_remaining_time(task['id'])
+        if remaining <= 0:
+            return "-"
+        if self.timer_manager.get_charges(task['id']) is not None:
+            return f"下一层 {remaining}秒"
+        return f"{remaining}秒"
+
+    # ---------- 更新 ----------
+
+    def set_tasks(self, tasks, dirty_ids=None):
+        """同步任务列表
+
+        任务顺序不变时只通知变化的行 (dirty_ids 为 None 时通知全部行)，保留选择和滚动位置；
+        否则重置模型。
+        """
+        tasks = list(tasks)
+        self.pending.clear()
+        same_order = len(tasks) == len(self.tasks) and all(
+            new['id'] == old['id'] for new, old in zip(tasks, self.tasks))
+        if not same_order:
+            self.beginResetModel()
+            self.tasks = tasks
+            self.search_index.build(tasks)
+            self.rows = self._filter_rows()
+            self.endResetModel()
+            return
+
+        self.tasks = tasks
+        if dirty_ids is None:
+            self.search_index.build(tasks)
+        else:
+            for task_id in dirty_ids:
+                self.search_index.update(tasks[self.search_index.position[task_id]])
+        if self.query:
+            self.set_filter(self.query, force=True)
+        elif self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(COLUMNS) - 1))
+
+    def update_task(self, task):
+        """同步单个任务 (任务顺序不变)，丢弃这一行未保存的编辑，只通知这一行"""
+        position = self.search_index.position.get(task['id'])
+        if position is None:
+            return
+        self.tasks[position] = task
+        for column in EDITABLE_COLUMNS:
+            self.pending.pop((task['id'], column), None)
+        self.search_index.update(task)
+
+        # self.rows 按任务顺序排列，二分查找这一行
+        row = bisect_left(self.rows, position)
+        visible = row < len(self.rows) and self.rows[row] == position
+        if self.query:
+            matches = any(self.query.lower() in key for key in self.search_index.keys[task['id']])
+            if matches != visible:
+                self.set_filter(self.query, force=True)  # 修改后不再匹配 (或开始匹配)，重新筛选
+                return
+        if visible:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def set_filter(self, query, force=False):
+        """按名称、热键或拼音首字母筛选"""
+        query = query.strip()
+        if query == self.query and not force:
+            return
+        self.query = query
+        rows = self._filter_rows()
+        if rows != self.rows:
+            self.beginResetModel()
+            self.rows = rows
+            self.endResetModel()
+        elif self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(COLUMNS) - 1))
+
+    def _filter_rows(self):
+        if not self.query:
+            return list(range(len(self.tasks)))
+        position = self.search_index.position
+        return [position[task_id] for task_id in self.search_index.search(self.query)]
+
+    def refresh_timers(self):
+        """计时器变化后刷新状态和剩余时间列 (视图只重绘可见的行)"""
+        if self.rows:
+            self.dataChanged.emit(self.index(0, COL_STATUS), self.index(len(self.rows) - 1, COL_REMAINING))
@@ -174,7 +174,7 @@ class TestWindow(QWidget):
         """清空日志"""
         self.log_text.clear()
         
-    def show_notification(self, title, message):
+    def show_notification(self, title, message, name=None):
         """显示通知 (供timer_manager调用)"""
         self.log(f"通知: {title} - {message}")
         
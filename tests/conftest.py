@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+使用 offscreen Qt 平台和手动推进的时钟，不需要真实窗口和等待真实时间
+"""
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+from clock import ManualClock
+from config_manager import ConfigManager
+from timer_manager import TimerManager
+from voice_manager import VoiceManager
+
+
+class FakeEngine:
+    """假的语音引擎，只记录文本"""
+
+    def __init__(self):
+        self.spoken = []
+
+    def say(self, text):
+        self.spoken.append(text)
+
+    def runAndWait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class FakeWindow:
+    """假的主窗口，记录通知"""
+
+    def __init__(self):
+        self.notifications = []
+
+    def show_notification(self, title, message, name=None):
+        self.notifications.append((title, message))
+
+
+def make_task(name, duration, **fields):
+    """生成测试任务"""
+    task = {
+        'id': name,
+        'name': name,
+        'duration': duration,
+        'hotkey_enabled': False,
+        'hotkey': '',
+        'popup_reminder': True,
+        'voice_reminder': True,
+        'custom_voice': ''
+    }
+    task.update(fields)
+    return task
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def clock():
+    return ManualClock()
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+@pytest.fixture
+def window():
+    return FakeWindow()
+
+
+@pytest.fixture
+def make_manager(qapp, clock, engine, window):
+    """根据任务列表创建 TimerManager"""
+    def factory(tasks):
+        config_manager = ConfigManager(None, tasks)
+        voice_manager = VoiceManager(engine=engine, clock=clock, threaded=False)
+        return TimerManager(window, clock=clock, voice_manager=voice_manager,
+                            config_manager=config_manager)
+    return factory
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+告警输出插件测试
+"""
+
+import threading
+import time
+
+from conftest import make_task
+from alert_sinks import AlertDispatcher, AlertEvent, AlertSink, create_sink, FileSink
+
+
+class RecordingDispatcher:
+    """同步记录发布的事件"""
+
+    def __init__(self):
+        self.alerts = []
+
+    def publish(self, alert):
+        self.alerts.append((alert.kind, alert.task_id, round(alert.remaining, 3)))
+
+
+class BlockingSink(AlertSink):
+    """处理事件时一直等待，模拟卡住的输出"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.release = threading.Event()
+
+    def handle(self, alert):
+        self.release.wait(5)
+
+
+class ListSink(AlertSink):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.received = []
+        self.done = threading.Event()
+
+    def handle(self, alert):
+        self.received.append(alert.kind)
+        self.done.set()
+
+
+def test_lead_warning_follows_group_clock(make_manager, clock):
+    manager = make_manager([make_task('a', 10), make_task('b', 1)])
+    dispatcher = RecordingDispatcher()
+    manager.alert_dispatcher = dispatcher
+    manager.set_warning_lead(3)
+
+    manager.start_timer('a')
+    manager.start_timer('b')  # 比提前量还短，不预警
+    manager.set_group_rate('', 2.0)
+    clock.advance(3.5)
+    assert ('warning', 'a', 1.5) in dispatcher.alerts
+    clock.advance(2)
+    kinds = [(kind, task_id) for kind, task_id, _ in dispatcher.alerts]
+    assert kinds == [('start', 'a'), ('start', 'b'), ('finish', 'b'), ('warning', 'a'), ('finish', 'a')]
+
+
+def test_slow_sink_does_not_block_others(tmp_path):
+    slow = BlockingSink(timeout=0.05, queue_limit=1)
+    fast = ListSink()
+    dispatcher = AlertDispatcher([slow, fast, create_sink({'type': 'file', 'path': str(tmp_path / 'a.jsonl')})])
+    try:
+        dispatcher.publish(AlertEvent('start', 'a', 'A'))
+        assert fast.done.wait(2)
+        for _ in range(3):
+            dispatcher.publish(AlertEvent('finish', 'a', 'A'))
+
+        stats = dispatcher.get_stats()
+        assert stats['BlockingSink']['dropped'] + stats['BlockingSink']['timeouts'] >= 2
+        slow.release.set()
+    finally:
+        dispatcher.shutdown()
+    assert fast.received[0] == 'start'
+    assert isinstance(dispatcher.states[2].sink, FileSink)
+
+
+def test_two_hung_sinks_do_not_starve_a_third():
+    hung = [BlockingSink(name=f"hung{i}", timeout=0.05) for i in range(2)]
+    fast = ListSink()
+    dispatcher = AlertDispatcher(hung + [fast])
+    try:
+        dispatcher.publish(AlertEvent('start', 'a', 'A'))
+        assert fast.done.wait(2)
+        fast.done.clear()
+        time.sleep(0.1)
+        # 两个输出都卡在 handle() 中超过了超时，第三个输出仍然收到之后的事件
+        dispatcher.publish(AlertEvent('finish', 'a', 'A'))
+        assert fast.done.wait(2)
+        assert fast.received == ['start', 'finish']
+        assert all(dispatcher.get_stats()[sink.name]['timeouts'] == 1 for sink in hung)
+    finally:
+        for sink in hung:
+            sink.release.set()
+        dispatcher.shutdown()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+会话历史与冷却效率分析测试
+"""
+
+import pytest
+
+from conftest import make_task
+from session_history import SessionRecorder, read_session_history
+
+np = pytest.importorskip("numpy")
+from cooldown_analytics import CooldownAnalytics  # noqa: E402
+
+
+def test_recorder_follows_timer_events(make_manager, clock, tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    manager = make_manager([make_task('a', 10), make_task('b', 30)])
+    recorder = SessionRecorder(path, clock)
+    manager.timer_event.connect(recorder.on_timer_event)
+
+    manager.start_timer('a')
+    clock.advance(15)  # a 在 10 秒时就绪，15 秒时再次使用
+    manager.start_timer('a')
+    manager.start_timer('b')
+    clock.advance(5)
+    manager.stop_timer('b')
+    clock.advance(20)
+    recorder.close()
+
+    records = read_session_history(path)
+    assert [kind for _, kind, _ in records] == ['open', 'start', 'finish', 'start', 'start', 'stop', 'finish']
+
+    analytics = CooldownAnalytics(records)
+    metrics = analytics.task_metrics('a')
+    assert metrics['uses'] == 2
+    assert metrics['cooldown_time'] == pytest.approx(20)
+    assert metrics['delay_mean'] == pytest.approx(5)
+    assert analytics.span == pytest.approx(25)
+
+
+def test_sessions_and_overlap_are_vectorized():
+    records = [
+        (0, 'open', None),
+        (10, 'start', 'a'), (40, 'finish', 'a'),
+        (20, 'start', 'b'), (50, 'finish', 'b'),
+        (100, 'start', 'a'),  # 程序在这之后关闭，冷却在会话结束时截止
+        (110, 'start', 'x'),
+        (1000, 'open', None),
+        (1010, 'start', 'b'), (1040, 'finish', 'b'),
+        (1050, 'start', 'x'),
+    ]
+    analytics = CooldownAnalytics(records)
+    assert analytics.span == pytest.approx(160)
+    assert analytics.task_metrics('a')['cooldown_time'] == pytest.approx(40)
+    assert analytics.task_metrics('a')['delay_mean'] == pytest.approx(60)
+
+    matrix, all_down = analytics.overlap(['a', 'b'])
+    assert matrix[0, 1] == pytest.approx(20)
+    assert matrix[1, 1] == pytest.approx(60)
+    assert all_down == pytest.approx(20)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+任务联动测试 (虚拟时间)
+"""
+
+import json
+from conftest import make_task
+from config_manager import ConfigManager
+
+
+def rule(on, action, target):
+    return {'on': on, 'action': action, 'target': target}
+
+
+def test_chains_fire_in_the_same_tick(make_manager, clock):
+    manager = make_manager([
+        make_task('一阶段', 10, chains=[rule('finish', 'start', '二阶段')]),
+        make_task('二阶段', 20, chains=[rule('start', 'stop', '护盾'), rule('start', 'start', '读条')]),
+        make_task('护盾', 60),
+        make_task('读条', 5, chains=[rule('finish', 'start', '读条')]),  # 完成后重复，不是同一时刻的循环
+    ])
+    events = []
+    manager.timer_event.connect(lambda kind, task_id, wall: events.append((kind, task_id, wall)))
+
+    manager.start_timer('一阶段')
+    manager.start_timer('护盾')
+    clock.advance(10)
+    assert sorted(manager.active_timers) == ['二阶段', '读条']
+    assert [(kind, task_id) for kind, task_id, _ in events[2:]] == [
+        ('finish', '一阶段'), ('start', '二阶段'), ('stop', '护盾'), ('start', '读条')]
+    assert len({wall for _, _, wall in events[2:]}) == 1
+
+    clock.advance(5)
+    assert manager.get_remaining_time('读条') == 5
+
+
+def test_same_tick_cycles_are_rejected_on_save(tmp_path):
+    config = ConfigManager(None, [
+        make_task('a', 10, chains=[rule('start', 'start', 'b')]),
+        make_task('b', 10, shared_cooldown='gcd'),
+        make_task('c', 10, shared_cooldown='gcd'),
+    ])
+    errors = config.validate_task(make_task('c', 10, shared_cooldown='gcd', chains=[rule('start', 'start', 'a')]))
+    assert errors == ["联动规则形成循环: a → c → a"]
+    assert config.validate_task(make_task('c', 10, chains=[rule('finish', 'start', 'a')])) == []
+    assert config.validate_task(make_task('c', 10, chains=[rule('start', 'start', 'x')])) == ["联动规则的目标任务不存在"]
+
+    # 导入时把任务包中的ID改写为新ID
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({'tasks': [
+        make_task('p1', 10, chains=[rule('start', 'start', 'p2')]),
+        make_task('p2', 10, chains=[rule('start', 'start', 'p1')]),
+    ]}), encoding='utf-8')
+    count, errors = config.import_tasks(str(path))
+    assert count == 0 and errors == [(-1, "联动规则形成循环: p1 → p2 → p1")]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+配置热加载测试
+"""
+
+import json
+
+from conftest import make_task
+from config_watcher import diff_tasks, parse_tasks_file
+from models import Task
+
+
+def write_config(path, tasks):
+    path.write_text(json.dumps({'tasks': tasks}, ensure_ascii=False), encoding='utf-8')
+
+
+def test_diff_tasks():
+    old = [Task.from_dict(make_task(name, 10)) for name in ('离渊', '鹰扬诀', '鹰眼')]
+    new = [old[0], old[1].replace(duration=20), Task.from_dict(make_task('猎手', 30))]
+    diff = diff_tasks(old, new)
+    assert [task['id'] for task in diff['added']] == ['猎手']
+    assert [task['id'] for task in diff['removed']] == ['鹰眼']
+    assert [task['id'] for task in diff['changed']] == ['鹰扬诀']
+    assert diff_tasks(old, list(old)) == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_parse_keeps_ids_of_tasks_without_id(tmp_path):
+    path = tmp_path / "tasks_config.json"
+    old = [Task.from_dict(make_task('离渊', 10))]
+    write_config(path, [{'name': '离渊', 'duration': 15}, {'name': '猎手', 'duration': 30}])
+    tasks = parse_tasks_file(str(path), old)
+    assert tasks[0].id == '离渊'
+    assert tasks[1].id not in ('离渊', '猎手')
+
+    path.write_text('{"tasks": [', encoding='utf-8')
+    assert parse_tasks_file(str(path), old) is None
+
+
+def test_reload_skips_invalid_tasks(tmp_path, make_manager, clock):
+    manager = make_manager([make_task('离渊', 10), make_task('鹰扬诀', 60)])
+    config = manager.config_manager
+    manager.start_timer('离渊')
+    manager.start_timer('鹰扬诀')
+    clock.advance(4)
+
+    # 外部编辑: 倒计时写成字符串、新增一个无效任务、正常修改另一个任务
+    path = tmp_path / "tasks_config.json"
+    write_config(path, [make_task('离渊', '70'), make_task('鹰扬诀', 30), make_task('猎手', 0),
+                        make_task('鹰眼', 10, retrigger_ms='300', hotkey_mode='hold')])
+    new_tasks, errors = config.validate_reloaded_tasks(parse_tasks_file(str(path), config.tasks))
+    assert [(task['id'], error) for task, error in errors] == [
+        ('离渊', "倒计时必须是正整数"), ('猎手', "倒计时必须是正整数"),
+        ('鹰眼', "热键模式无效: hold"), ('鹰眼', "最小触发间隔必须是非负整数")]
+    assert [(task.id, task.duration) for task in new_tasks] == [('离渊', 10), ('鹰扬诀', 30)]
+
+    diff = diff_tasks(config.tasks, new_tasks)
+    assert diff['changed'] == [new_tasks[1]] and not diff['added'] and not diff['removed']
+    config.replace_tasks(new_tasks)
+    for task in diff['changed']:
+        manager.apply_task_update(task)
+
+    # 无效的修改不影响计时，有效的修改保留已经过去的时间
+    assert manager.get_remaining_time('离渊') == 6
+    assert manager.get_remaining_time('鹰扬诀') == 26
+
+
+def test_reload_rejects_duplicate_hotkeys_and_bad_names(tmp_path, make_manager):
+    manager = make_manager([make_task('离渊', 10, hotkey='f1', hotkey_enabled=True),
+                            make_task('鹰扬诀', 20, hotkey='f2', hotkey_enabled=True),
+                            make_task('鹰眼', 30, hotkey='f3', hotkey_enabled=True)])
+    config = manager.config_manager
+
+    # 离渊 改用 鹰扬诀 的热键；鹰眼 与 猎手 交换为新热键；新增任务使用已占用的热键、名称为 null
+    path = tmp_path / "tasks_config.json"
+    write_config(path, [
+        make_task('离渊', 10, hotkey='F2', hotkey_enabled=True),
+        make_task('鹰扬诀', 20, hotkey='f2', hotkey_enabled=True),
+        make_task('鹰眼', 30, hotkey='f4', hotkey_enabled=True),
+        make_task('猎手', 40, hotkey='f3', hotkey_enabled=True),
+        make_task('动愈守中', 70, hotkey='f4', hotkey_enabled=True),
+        dict(make_task('无名', 5), name=None),
+    ])
+    new_tasks, errors = config.validate_reloaded_tasks(parse_tasks_file(str(path), config.tasks))
+    assert [(task['id'], error) for task, error in errors] == [
+        ('离渊', "热键 'F2' 已被任务 '鹰扬诀' 使用"),
+        ('动愈守中', "热键 'f4' 已被任务 '鹰眼' 使用"),
+        ('无名', "任务名称不能为空"),
+    ]
+    assert [(task.id, task.hotkey) for task in new_tasks] == [
+        ('离渊', 'f1'), ('鹰扬诀', 'f2'), ('鹰眼', 'f4'), ('猎手', 'f3')]
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+网页面板测试
+"""
+
+import http.client
+import json
+from conftest import make_task
+from web_dashboard import Broadcaster, DashboardServer
+
+
+def read_event(response):
+    """读取一条 SSE 消息，返回 (事件名, 数据)"""
+    fields = {}
+    while True:
+        line = response.fp.readline().decode('utf-8').rstrip('\n')
+        if not line:
+            if fields:
+                return fields['event'], json.loads(fields['data'])
+            continue
+        key, _, value = line.partition(': ')
+        fields[key] = value
+
+
+def test_clients_receive_snapshot_then_deltas(make_manager, clock):
+    manager = make_manager([make_task('离渊', 10), make_task('动愈守中', 70)])
+    manager.start_timer('动愈守中')
+    dashboard = DashboardServer(manager, 0)
+    dashboard.start()
+
+    responses = []
+    for _ in range(3):
+        connection = http.client.HTTPConnection('127.0.0.1', dashboard.port, timeout=5)
+        connection.request('GET', '/events')
+        response = connection.getresponse()
+        assert response.status == 200
+        name, data = read_event(response)
+        assert name == 'snapshot'
+        assert [timer['task_id'] for timer in data['timers']] == ['动愈守中']
+        assert data['timers'][0]['deadline'] == data['server_time'] + 70
+        responses.append(response)
+
+    start_wall = clock.wall()
+    manager.start_timer('离渊')
+    clock.advance(10)
+    for response in responses:
+        # 只发送变化的计时器，未变化的 动愈守中 不会重复发送
+        name, timer = read_event(response)
+        assert (name, timer['task_id'], timer['deadline']) == ('timer', '离渊', start_wall + 10)
+        assert read_event(response) == ('start', {'task_id': '离渊', 'wall': start_wall})
+        assert read_event(response) == ('remove', {'task_id': '离渊'})
+        assert read_event(response)[0] == 'finish'
+
+    assert dashboard.get_stats()['clients'] == 3
+    dashboard.stop()
+
+
+def test_lagging_client_is_resynced():
+    broadcaster = Broadcaster(capacity=4)
+    broadcaster.publish([('timer', {'task_id': str(i)}) for i in range(3)], {'a': {'task_id': 'a'}})
+    assert len(broadcaster.wait(1, 0)) == 2
+
+    broadcaster.publish([('timer', {'task_id': str(i)}) for i in range(3)])
+    assert broadcaster.wait(1, 0) is None
+    assert broadcaster.resyncs == 1
+    seq, message = broadcaster.snapshot()
+    assert seq == 6 and b'event: snapshot' in message
+    assert broadcaster.wait(seq, 0.01) == []
+
+
+def test_unchanged_timers_are_not_resent_when_wall_clock_drifts(make_manager, clock):
+    manager = make_manager([make_task('离渊', 10), make_task('动愈守中', 70, group='haste')])
+    manager.start_timer('动愈守中')
+    dashboard = DashboardServer(manager, 0)
+    sent = []
+    dashboard.broadcaster.publish = lambda messages, state=None: sent.append([
+        (name, data['task_id'], data.get('deadline')) for name, data in messages])
+    try:
+        dashboard.on_timers_changed()
+        assert sent.pop() == [('timer', '动愈守中', clock.wall() + 70)]
+
+        # 墙上时间被校准 (与单调时钟的差值变化)，没有变化的计时器不重复发送
+        clock.wall_offset += 0.0137
+        clock.advance(1.2345)
+        manager.start_timer('离渊')
+        dashboard.on_timers_changed()
+        assert sent.pop() == [('timer', '离渊', round(clock.wall() + 10, 3))]
+        dashboard.on_timers_changed()
+        assert sent == []
+
+        manager.set_group_rate('haste', 0)
+        dashboard.on_timers_changed()
+        assert sent.pop() == [('timer', '动愈守中', None)]
+        clock.advance(5)
+        dashboard.on_timers_changed()
+        assert sent == []
+    finally:
+        dashboard.httpd.server_close()
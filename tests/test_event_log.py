@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+结构化日志测试
+"""
+
+import json
+import logging
+
+from config_manager import ConfigManager
+from conftest import make_task
+from event_log import EventLog, event
+
+
+def test_records_go_to_ring_buffer_and_rotating_file(tmp_path):
+    log_file = tmp_path / "cdtimer.log"
+    event_log = EventLog(log_file=str(log_file), capacity=3).start()
+    try:
+        logger = logging.getLogger('timer_manager')
+        for i in range(5):
+            logger.info("任务 [%s] 开始计时", i, extra=event('timer_start', str(i), duration=10))
+    finally:
+        event_log.stop()
+
+    recent = event_log.recent()
+    assert [record.task_id for record in recent] == ['2', '3', '4']
+    assert "[timer_start] 任务 [4] 开始计时" in event_log.dump()
+
+    lines = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    assert len(lines) == 5
+    assert lines[0]['event'] == 'timer_start'
+    assert lines[0]['task_id'] == '0'
+    assert lines[0]['duration'] == 10
+    assert lines[0]['monotonic'] > 0
+
+
+def test_import_and_export_log_their_path(tmp_path):
+    log_file = tmp_path / "cdtimer.log"
+    pack = str(tmp_path / "pack.json")
+    event_log = EventLog(log_file=str(log_file)).start()
+    try:
+        assert ConfigManager(None, [make_task('离渊', 10)]).export_tasks(pack) == 1
+        assert ConfigManager(None, []).import_tasks(pack) == (1, [])
+    finally:
+        event_log.stop()
+
+    lines = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    assert [(line['event'], line['count'], line['path']) for line in lines
+            if line['event'] in ('task_export', 'task_import')] == [('task_export', 1, pack), ('task_import', 1, pack)]
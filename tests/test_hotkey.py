@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+热键匹配与分发测试
+"""
+
+import threading
+
+from conftest import make_task
+from event_queue import SpscQueue
+from hotkey_dispatcher import HotkeyDispatcher
+from hotkey_matcher import HotkeyListener, HotkeyMatcher, MOD_CTRL, MOD_SHIFT, parse_hotkey
+
+
+def test_parse_hotkey():
+    assert parse_hotkey('Ctrl+1') == ((MOD_CTRL, '1'),)
+    assert parse_hotkey('G, 1') == ((0, 'g'), (0, '1'))
+    assert parse_hotkey('PgUp') == ((0, 'page up'),)
+
+
+def test_sequence_and_timeout():
+    matcher = HotkeyMatcher({'G, 1': 'seq', 'F1': 'f1'})
+    assert matcher.feed(0, 'g', 0.0) is None
+    assert matcher.feed(0, '1', 0.5) == 'seq'
+    assert matcher.feed(0, 'g', 1.0) is None
+    assert matcher.feed(0, '1', 3.0) is None
+    assert matcher.feed(0, 'f1', 3.1) == 'f1'
+
+
+def test_shifted_key_names_match_the_unshifted_binding():
+    assert parse_hotkey('Shift+!') == parse_hotkey('Shift+1') == ((MOD_SHIFT, '1'),)
+    pressed = []
+    listener = HotkeyListener(lambda task_id, ts: pressed.append(task_id),
+                              HotkeyMatcher({'Shift+1': 'a', 'Ctrl+Shift+-': 'b'}))
+
+    # 按住 Shift 时 keyboard 报告上档字符
+    listener.handle('down', 'shift', 0.0)
+    listener.handle('down', '!', 0.1)
+    listener.handle('up', '!', 0.2)
+    listener.handle('down', 'ctrl', 0.3)
+    listener.handle('down', '_', 0.4)
+    assert pressed == ['a', 'b']
+
+
+def test_auto_repeat_and_interval_are_suppressed():
+    dispatcher = HotkeyDispatcher()
+    pressed = []
+    listener = HotkeyListener(lambda task_id, ts: pressed.append(ts),
+                              HotkeyMatcher({'f1': 'a'}), dispatcher)
+
+    for i in range(10):
+        listener.handle('down', 'f1', i * 0.03)
+    listener.handle('up', 'f1', 0.4)
+    assert pressed == [0.0]
+    assert dispatcher.get_stats()['repeat'] == 9
+
+    task = {'id': 'a'}
+    assert dispatcher.decide(task, False, 0.0) == 'start'
+    assert dispatcher.decide(task, True, 0.1) is None
+    assert dispatcher.decide(task, True, 0.5) == 'stop'
+    assert dispatcher.decide({'id': 'a', 'hotkey_mode': 'restart'}, True, 1.0) == 'start'
+
+
+def test_spsc_queue_order_wakeup_and_drops():
+    queue = SpscQueue(capacity=3)
+    assert queue.push(1) is True
+    assert queue.push(2) is False  # 已经唤醒过
+    assert queue.push(3) is False
+    assert queue.push(4) is False  # 队列已满
+    assert queue.drain() == [1, 2, 3]
+    assert queue.push(5) is True
+
+    stats = queue.get_stats()
+    assert stats['dropped'] == 1
+    assert stats['high_water'] == 3
+    assert stats['pending'] == 1
+
+
+def test_hotkey_events_are_decided_on_main_thread(make_manager, qapp):
+    manager = make_manager([make_task('a', 30, retrigger_ms=0)])
+    manager.hotkey_tasks = {'a': manager.get_config_manager().get_task_by_id('a')}
+
+    # 钩子线程快速连按 5 次，状态判断全部在主线程按顺序进行
+    hook = threading.Thread(
+        target=lambda: [manager.on_hotkey_pressed('a', i * 0.01) for i in range(5)])
+    hook.start()
+    hook.join()
+    assert not manager.is_timer_running('a')
+
+    qapp.processEvents()
+    assert manager.is_timer_running('a')  # 开始、停止、开始、停止、开始
+    stats = manager.get_hotkey_stats()['queue']
+    assert stats['pushed'] == 5 and stats['drains'] == 1 and stats['pending'] == 0
+
+
+def test_capture_process_ring_with_synthetic_source(make_manager, qapp):
+    import time
+    from capture_process import CaptureProcess
+
+    manager = make_manager([make_task('a', 30, retrigger_ms=0, hotkey_enabled=True, hotkey='F1')])
+    capture = CaptureProcess(manager.on_hotkey_pressed, source='synthetic', heartbeat_timeout=1.0,
+                             events=[(0.1, 'down', 'f1'), (0, 'down', 'f1'), (0, 'up', 'f1')])
+    manager.capture_process = capture
+    try:
+        manager.update_hotkeys()
+        deadline = time.monotonic() + 10
+        while not manager.is_timer_running('a') and time.monotonic() < deadline:
+            qapp.processEvents()
+            time.sleep(0.01)
+        assert manager.is_timer_running('a')  # 自动重复在子进程中过滤，只开始一次
+        assert capture.get_stats()['written'] == 1
+
+        # 子进程异常退出后自动重启并重新应用绑定
+        capture.process.kill()
+        deadline = time.monotonic() + 10
+        while capture.restarts == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert capture.restarts == 1
+    finally:
+        capture.stop()
+
+
+def test_capture_process_logs_hook_failure_reported_by_child(caplog):
+    import multiprocessing
+    from capture_process import CaptureProcess
+
+    capture = CaptureProcess(lambda task_id, timestamp: None)
+    capture.conn, child = multiprocessing.Pipe()
+    try:
+        child.send(('hook_failed', '没有键盘设备'))
+        with caplog.at_level('ERROR', logger='capture_process'):
+            capture._receive_reports()
+        assert [record.event for record in caplog.records] == ['capture_hook_failed']
+        assert caplog.records[0].fields == {'error': '没有键盘设备'}
+        assert capture.get_stats()['hook_error'] == '没有键盘设备'
+
+        child.close()
+        capture._receive_reports()  # 子进程退出后不抛出异常
+    finally:
+        capture.conn.close()
+        capture.ring.close(unlink=True)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+任务包导入 / 导出测试
+"""
+
+import json
+import time
+
+import pytest
+from config_manager import ConfigManager
+from conftest import make_task
+from models import TASK_FIELDS
+
+
+def task_fields(config):
+    """去掉ID后的任务字段 (导入时会分配新ID，联动规则统一为元组)"""
+    return [{name: tuple(task.chains) if name == 'chains' else getattr(task, name)
+             for name in TASK_FIELDS if name != 'id'}
+            for task in config.get_tasks()]
+
+
+@pytest.mark.parametrize('ext', ['json', 'jsonl', 'csv'])
+def test_export_import_round_trip(tmp_path, ext):
+    source = ConfigManager(None, [
+        make_task('离渊', 10, hotkey='f1', hotkey_enabled=True, charges=2),
+        make_task('鹰扬诀', 20, custom_voice='鹰扬, 好了', popup_reminder=False),
+        make_task('Boss 读条', 5, log_pattern='re:施放.*读条'),
+    ])
+    first, second, third = source.get_tasks()
+    source.update_task({**second.to_dict(), 'chains': [{'on': 'finish', 'action': 'start', 'target': third.id}]})
+
+    path = str(tmp_path / f"pack.{ext}")
+    assert source.export_tasks(path) == 3
+
+    target = ConfigManager(None, [])
+    assert target.import_tasks(path) == (3, [])
+    assert task_fields(target)[0] == task_fields(source)[0]
+    assert task_fields(target)[2] == task_fields(source)[2]
+
+    # 联动目标改写为导入后的新ID
+    imported = target.get_tasks()
+    assert imported[1].chains[0]['target'] == imported[2].id
+    assert imported[2].id != third.id
+
+
+def test_partial_export_writes_only_selected_tasks(tmp_path):
+    source = ConfigManager(None, [make_task('离渊', 10), make_task('鹰扬诀', 20)])
+    path = tmp_path / "pack.json"
+    assert source.export_tasks(str(path), [source.get_tasks()[1].id]) == 1
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert [task['name'] for task in data['tasks']] == ['鹰扬诀']
+
+
+def test_import_reports_whole_batch_and_changes_nothing(tmp_path):
+    config = ConfigManager(None, [make_task('离渊', 10, hotkey='f1', hotkey_enabled=True)])
+    pack = [
+        make_task('鹰扬诀', 20, hotkey='F1', hotkey_enabled=True),  # 与已有任务冲突
+        make_task('鹰眼', 0),
+        make_task('猎手', 30, hotkey='f2', hotkey_enabled=True),
+        make_task('猎手2', 30, hotkey='F2', hotkey_enabled=True),  # 与同批任务冲突
+        make_task('', 30),
+    ]
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({'tasks': pack}, ensure_ascii=False), encoding='utf-8')
+
+    count, errors = config.import_tasks(str(path))
+    assert count == 0
+    assert errors == [
+        (0, "热键 'F1' 已被任务 '离渊' 使用"),
+        (1, "倒计时必须是正整数"),
+        (3, "热键 'F2' 已被任务 '猎手' 使用"),
+        (4, "任务名称不能为空"),
+    ]
+    assert [task.name for task in config.get_tasks()] == ['离渊']
+
+
+def test_csv_import_reports_bad_numbers(tmp_path):
+    path = tmp_path / "pack.csv"
+    path.write_text("name,duration,voice_reminder\n离渊,abc,否\n鹰扬诀,20,是\n", encoding='utf-8-sig')
+    config = ConfigManager(None, [])
+    assert config.import_tasks(str(path)) == (0, [(0, "倒计时必须是正整数")])
+
+    path.write_text("name,duration,voice_reminder\n离渊,10,否\n", encoding='utf-8-sig')
+    assert config.import_tasks(str(path)) == (1, [])
+    assert config.get_tasks()[0].voice_reminder is False
+
+
+def test_import_of_large_pack_is_fast(tmp_path):
+    count = 5000
+    source = ConfigManager(None, [make_task(f'技能{i}', 60, hotkey=f'ctrl+f{i}', hotkey_enabled=True)
+                                  for i in range(count)])
+    path = str(tmp_path / "pack.json")
+    source.export_tasks(path)
+
+    target = ConfigManager(None, [make_task('离渊', 10, hotkey='f1', hotkey_enabled=True)])
+    start = time.perf_counter()
+    assert target.import_tasks(path) == (count, [])
+    # 逐个检查热键冲突时需要数秒，整批验证远小于 1 秒 (宽松上限，避免慢机器误报)
+    assert time.perf_counter() - start < 2.0
+
+
+def test_malformed_pack_is_reported_not_raised(tmp_path):
+    config = ConfigManager(None, [make_task('离渊', 10, hotkey='f1', hotkey_enabled=True)])
+    path = tmp_path / "pack.json"
+    pack = [
+        make_task('鹰扬诀', 20, hotkey=1, hotkey_enabled=True),
+        make_task('鹰眼', 20, log_pattern=5),
+        '猎手',
+        make_task('动愈守中', 70, hotkey_enabled='yes',
+                  chains=[{'on': ['start'], 'action': 'start', 'target': '离渊'},
+                          {'on': 'start', 'action': 'start', 'target': ['离渊']}]),
+    ]
+    path.write_text(json.dumps({'tasks': pack}, ensure_ascii=False), encoding='utf-8')
+    assert config.import_tasks(str(path)) == (0, [
+        (0, "热键必须是文本"),
+        (1, "日志匹配规则必须是文本"),
+        (2, "任务格式错误，应为对象"),
+        (3, "启用热键必须是 true 或 false"),
+        (3, "联动规则的触发事件无效: ['start']"),
+        (3, "联动规则缺少目标任务"),
+    ])
+
+    path.write_text('{"tasks": 5}', encoding='utf-8')
+    assert config.import_tasks(str(path)) == (0, [(-1, "读取任务包失败: 任务列表 (tasks) 必须是数组")])
+
+    path = tmp_path / "pack.jsonl"
+    path.write_text('"离渊"\n[1, 2]\n', encoding='utf-8')
+    assert config.import_tasks(str(path)) == (0, [(0, "任务格式错误，应为对象"), (1, "任务格式错误，应为对象")])
+    assert [task.name for task in config.get_tasks()] == ['离渊']
+
+
+def test_hotkey_mode_and_retrigger_are_validated(tmp_path):
+    config = ConfigManager(None, [])
+    path = tmp_path / "pack.csv"
+    path.write_text("name,duration,hotkey_mode,retrigger_ms\n"
+                    "离渊,10,hold,abc\n鹰扬诀,20,restart,-5\n鹰眼,30,toggle,250.0\n", encoding='utf-8-sig')
+    assert config.import_tasks(str(path)) == (0, [
+        (0, "热键模式无效: hold"),
+        (0, "最小触发间隔必须是非负整数"),
+        (1, "最小触发间隔必须是非负整数"),
+    ])
+
+    path.write_text("name,duration,hotkey_mode,retrigger_ms\n鹰眼,30,restart,250.0\n", encoding='utf-8-sig')
+    assert config.import_tasks(str(path)) == (1, [])
+    assert config.get_tasks()[0].retrigger_ms == 250
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+战斗日志触发测试
+"""
+
+import os
+
+import pytest
+
+from conftest import make_task
+from log_trigger import LogPatternMatcher, LogTailer, compile_log_pattern
+
+
+def test_matcher_combines_literals_and_regexes():
+    matcher = LogPatternMatcher.from_tasks([
+        make_task('火球', 5, log_pattern='火球'),
+        make_task('火球术', 5, log_pattern='火球术'),
+        make_task('火墙', 5, log_pattern='火墙'),
+        make_task('共享', 5, log_pattern='火墙'),
+        make_task('暴击', 5, log_pattern=r're:造成 \d+ 点暴击'),
+        make_task('无效', 5, log_pattern='re:(?P<x>a)'),
+    ])
+    assert matcher.match("你施放了 [火球术]") == ['火球', '火球术']
+    assert matcher.match("火墙 造成 12 点暴击伤害") == ['火墙', '共享', '暴击']
+    assert matcher.match("无关的一行") == []
+
+    with pytest.raises(ValueError):
+        compile_log_pattern('re:(')
+
+
+def test_matcher_reports_overlapping_and_nested_hits():
+    matcher = LogPatternMatcher.from_tasks([
+        make_task('a', 5, log_pattern='火球术'),
+        make_task('b', 5, log_pattern='球术'),
+        make_task('c', 5, log_pattern='暴击'),
+        make_task('d', 5, log_pattern=r're:造成 \d+ 点暴击'),
+        make_task('e', 5, log_pattern=r're:\d+ 点'),
+        make_task('f', 5, log_pattern='术造'),
+    ])
+    assert matcher.match('你施放了火球术') == ['a', 'b']
+    assert matcher.match('造成 12 点暴击') == ['d', 'e', 'c']
+    assert matcher.match('火球术造成 12 点暴击') == ['a', 'b', 'f', 'd', 'e', 'c']
+
+
+def test_tailer_handles_partial_lines_truncation_and_rotation(tmp_path):
+    path = tmp_path / "combat.log"
+    path.write_text("旧内容\n", encoding='utf-8')
+    tailer = LogTailer(str(path))
+    assert tailer.read_lines() == []  # 从文件末尾开始
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("第一行\n第二")
+    assert tailer.read_lines() == ['第一行']
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("行\n")
+    assert tailer.read_lines() == ['第二行']
+
+    # 截断后从头读取
+    path.write_text("截断后\n", encoding='utf-8')
+    assert tailer.read_lines() == ['截断后']
+
+    # 轮转：先读完旧文件剩余内容，再读新文件
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("轮转前\n")
+    os.replace(path, tmp_path / "combat.log.1")
+    path.write_text("新文件\n", encoding='utf-8')
+    assert tailer.read_lines() == ['轮转前', '新文件']
+    assert tailer.rotations == 2
+    tailer.close()
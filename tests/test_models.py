@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+任务数据类型测试
+"""
+
+import json
+import pytest
+from config_manager import ConfigManager
+from models import Task
+
+
+def test_round_trip_keeps_config_layout(tmp_path):
+    tasks = [
+        {'name': '动愈守中', 'duration': 70, 'hotkey_enabled': True, 'hotkey': 'F3',
+         'popup_reminder': True, 'voice_reminder': True, 'custom_voice': '', 'id': 'x'},
+        {'id': 'y', 'name': '离渊', 'duration': 6, 'unknown_field': [1, 2]}
+    ]
+    config_file = tmp_path / 'tasks_config.json'
+    config_file.write_text(json.dumps({'tasks': tasks, 'version': '2.0'}, ensure_ascii=False),
+                           encoding='utf-8')
+
+    config_manager = ConfigManager(str(config_file))
+    config_manager.save_config()
+
+    saved = json.loads(config_file.read_text(encoding='utf-8'))['tasks']
+    assert saved == tasks
+    assert [list(task) for task in saved] == [list(task) for task in tasks]
+
+
+def test_task_is_immutable_and_snapshots_are_shared():
+    config_manager = ConfigManager(None, [{'id': 'a', 'name': 'a', 'duration': 5}])
+    task = config_manager.get_task_by_id('a')
+
+    with pytest.raises(AttributeError):
+        task.duration = 10
+
+    assert config_manager.get_tasks() is config_manager.get_tasks()
+    config_manager.update_task({'id': 'a', 'duration': 10})
+    assert task.duration == 5
+    assert config_manager.get_task_by_id('a')['duration'] == 10
+
+
+def test_replace_appends_new_fields():
+    task = Task.from_dict({'name': 'a', 'id': 'a'})
+    assert list(task.replace(group='g').to_dict()) == ['name', 'id', 'group']
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+通知聚合测试
+"""
+
+from clock import ManualClock
+from notification_manager import NotificationAggregator
+
+
+def test_burst_is_merged_into_one_popup():
+    clock = ManualClock()
+    shown = []
+    aggregator = NotificationAggregator(lambda t, m: shown.append((t, m)), clock=clock)
+
+    for name in ('离渊', '鹰扬诀', '动愈守中'):
+        aggregator.push('时间到了', f'{name} 时间到了！', name)
+    clock.advance(1)
+
+    assert shown == [('时间到了', '3 个技能时间到了: 离渊, 鹰扬诀, 动愈守中')]
+    assert aggregator.get_stats()['suppressed'] == 2
+
+
+def test_rate_limit_delays_next_popup():
+    clock = ManualClock()
+    shown = []
+    aggregator = NotificationAggregator(lambda t, m: shown.append(clock.now()),
+                                        window_ms=100, min_interval_ms=1000, clock=clock)
+
+    aggregator.push('开始计时', 'a 开始计时', 'a')
+    clock.advance(0.2)
+    aggregator.push('开始计时', 'b 开始计时', 'b')
+    clock.advance(2)
+
+    assert shown == [0.1, 1.1]
+
+
+def test_mixed_titles_and_long_bursts_are_summarized():
+    clock = ManualClock()
+    shown = []
+    aggregator = NotificationAggregator(lambda t, m: shown.append((t, m)), max_names=2, clock=clock)
+
+    aggregator.push('开始计时', '离渊 开始计时', '离渊')
+    clock.advance(1)
+    assert shown == [('开始计时', '离渊 开始计时')]
+
+    for name in ('离渊', '鹰扬诀', '动愈守中'):
+        aggregator.push('时间到了', f'{name} 时间到了！', name)
+    aggregator.push('开始计时', '鹰眼 开始计时', '鹰眼')
+    clock.advance(2)
+    assert shown[1] == ('技能提醒 (4 条)', '3 个技能时间到了: 离渊, 鹰扬诀 等\n1 个技能开始计时: 鹰眼')
+
+
+def test_events_during_rate_limit_are_merged_into_next_popup():
+    clock = ManualClock()
+    shown = []
+    aggregator = NotificationAggregator(lambda t, m: shown.append((clock.now(), m)),
+                                        window_ms=100, min_interval_ms=1000, clock=clock)
+
+    aggregator.push('时间到了', 'a 时间到了！', 'a')
+    clock.advance(0.2)
+    for name in ('b', 'c'):
+        aggregator.push('时间到了', f'{name} 时间到了！', name)
+        clock.advance(0.3)
+    assert aggregator.get_stats() == {'shown': 1, 'suppressed': 0, 'pending': 2}
+
+    clock.advance(1)
+    assert shown == [(0.1, 'a 时间到了！'), (1.1, '2 个技能时间到了: b, c')]
+    assert aggregator.get_stats() == {'shown': 2, 'suppressed': 1, 'pending': 0}
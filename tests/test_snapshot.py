@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+共享快照测试
+"""
+
+import math
+import threading
+from conftest import make_task
+from timer_snapshot import SnapshotReader, SnapshotWriter, TimerEntry, STATE_PAUSED, STATE_RUNNING
+
+
+def test_manager_publishes_running_and_paused_timers(make_manager, clock, tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    manager = make_manager([make_task('离渊', 10), make_task('雷霆万钧', 30, group='haste')])
+    manager.snapshot_writer = SnapshotWriter(path)
+    reader = SnapshotReader(path)
+
+    manager.start_timer('离渊')
+    manager.start_timer('雷霆万钧')
+    clock.advance(4)
+    manager.set_group_rate('haste', 0)
+    timers = {timer.task_id: timer for timer in reader.read().timers}
+
+    assert timers['离渊'].state == STATE_RUNNING
+    assert timers['离渊'].remaining_now(clock.wall()) == 6.0
+    assert timers['雷霆万钧'].state == STATE_PAUSED
+    assert timers['雷霆万钧'].remaining_now() == 26.0
+    assert math.isinf(timers['雷霆万钧'].deadline)
+
+    assert not reader.changed()
+    clock.advance(6)
+    assert reader.changed()
+    assert [timer.task_id for timer in reader.read().timers] == ['雷霆万钧']
+
+    manager.cleanup()
+    snapshot = reader.read()
+    assert snapshot.closed and snapshot.timers == []
+    reader.close()
+
+
+def test_reader_never_sees_torn_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    writer = SnapshotWriter(path, capacity=64)
+    reader = SnapshotReader(path)
+    done = threading.Event()
+
+    def write():
+        # 每一代的所有槽位写入相同的剩余时间，读到混合值说明快照不一致
+        for generation in range(2000):
+            entries = [TimerEntry(f"task{i}", "任务", 0.0, float(generation), 10.0, 1.0, STATE_RUNNING)
+                       for i in range(1 + generation % 64)]
+            writer.publish(entries)
+        done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    reads = 0
+    while not done.is_set() or reads == 0:
+        timers = reader.read().timers
+        assert len({timer.remaining for timer in timers}) <= 1
+        reads += 1
+    thread.join()
+
+    assert reader.read().timers[0].remaining == 1999.0
+    writer.close()
+    reader.close()
+
+
+def test_header_fields_are_written_inside_the_seq_window(tmp_path, monkeypatch):
+    import timer_snapshot
+
+    seq = timer_snapshot.SEQ
+    writer = SnapshotWriter(str(tmp_path / "snapshot.bin"))
+    writes = []  # [(结构, 写入前映射中的序号)]
+
+    class Recording:
+        def __init__(self, name, packer):
+            self.name, self.packer = name, packer
+
+        def __getattr__(self, attr):
+            return getattr(self.packer, attr)
+
+        def pack_into(self, buffer, offset, *values):
+            writes.append((self.name, seq.unpack_from(buffer, timer_snapshot.SEQ_OFFSET)[0]))
+            self.packer.pack_into(buffer, offset, *values)
+
+    for name in ('HEADER', 'SEQ', 'SLOT'):
+        monkeypatch.setattr(timer_snapshot, name, Recording(name, getattr(timer_snapshot, name)))
+
+    writer.publish([TimerEntry('a', 'A', 10.0, 5.0, 10.0, 1.0, STATE_RUNNING)])
+    writer.close()
+
+    # 槽位和头部 (数量、发布时间、标志) 都在序号为奇数时写入，偶数序号最后单独写入
+    assert writes == [
+        ('SEQ', 0), ('SLOT', 1), ('HEADER', 1), ('SEQ', 1),
+        ('SEQ', 2), ('HEADER', 3), ('SEQ', 3),
+    ]
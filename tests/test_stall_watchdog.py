@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+卡顿检测与采样分析测试
+"""
+
+import threading
+import time
+from stall_watchdog import SamplingProfiler, StallWatchdog
+
+
+def blocking_save():
+    time.sleep(0.3)
+
+
+def test_stall_captures_main_thread_stack(qapp):
+    watchdog = StallWatchdog(threshold=0.1, interval=0.02)
+    watchdog.start()
+    try:
+        qapp.processEvents()
+        blocking_save()  # 阻塞事件循环
+        qapp.processEvents()
+        deadline = time.monotonic() + 1
+        while watchdog.stalled and time.monotonic() < deadline:
+            time.sleep(0.03)
+            qapp.processEvents()
+        assert watchdog.stall_count == 1
+        assert 'blocking_save' in watchdog.last_stack
+        assert watchdog.get_stats()['max_stall_ms'] >= 250
+    finally:
+        watchdog.stop()
+
+
+def test_profiler_writes_folded_stacks(tmp_path):
+    done = threading.Event()
+
+    def busy_loop():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop)
+    worker.start()
+    profiler = SamplingProfiler(worker.ident, interval=0.001)
+    profiler.run(0.1)
+    done.set()
+    worker.join()
+
+    path = tmp_path / "profile" / "main.folded"
+    profiler.write(str(path))
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert profiler.samples > 10
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == profiler.samples
+    assert all('threading.py:run;test_stall_watchdog.py:busy_loop' in line for line in lines)
+
+
+def test_inactive_watchdog_does_not_wake_or_report(qapp):
+    watchdog = StallWatchdog(threshold=0.05, interval=0.01)
+    watchdog.start(active=False)
+    try:
+        assert not watchdog.heartbeat.isActive()
+        blocking_save()  # 暂停期间的阻塞不算卡顿
+        qapp.processEvents()
+        assert watchdog.stall_count == 0
+
+        watchdog.set_active(True)
+        assert watchdog.heartbeat.isActive()
+        watchdog.set_active(False)
+        assert not watchdog.heartbeat.isActive()
+        blocking_save()
+        assert watchdog.stall_count == 0
+    finally:
+        watchdog.stop()
+    watchdog.thread.join(timeout=1)
+    assert not watchdog.thread.is_alive()
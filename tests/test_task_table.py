@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+任务搜索与表格模型测试
+"""
+
+import pytest
+from conftest import make_task
+from search_index import TaskSearchIndex
+from task_table_model import TaskTableModel, COL_NAME, COL_DURATION, COL_HOTKEY, COL_STATUS, edit_changes
+
+
+def test_search_narrows_incrementally():
+    tasks = [make_task('离渊', 10, hotkey='f1'), make_task('鹰扬诀', 20, hotkey='ctrl+f2'),
+             make_task('Boss 读条', 5), make_task('boss 护盾', 60)]
+    index = TaskSearchIndex(tasks)
+    assert index.search('boss') == ['Boss 读条', 'boss 护盾']
+    assert index.search('boss 读') == ['Boss 读条']
+    assert index.search('f') == ['离渊', '鹰扬诀']
+    assert index.search('xyz') == []
+
+    # 修改单个任务只更新它的索引项
+    tasks[2] = dict(tasks[2], name='小怪 读条')
+    index.update(tasks[2])
+    assert index.search('boss') == ['boss 护盾']
+    assert index.search('') == [task['id'] for task in tasks]
+
+    pytest.importorskip('pypinyin')
+    assert TaskSearchIndex(tasks).search('dysz') == []
+    assert TaskSearchIndex([make_task('动愈守中', 70)]).search('dysz') == ['动愈守中']
+
+
+def test_model_filters_and_keeps_rows_in_sync(make_manager):
+    tasks = [make_task('离渊', 10), make_task('鹰扬诀', 20), make_task('鹰眼', 30)]
+    manager = make_manager(tasks)
+    model = TaskTableModel(manager)
+    model.set_tasks(tasks)
+    edits = []
+    model.edited.connect(lambda row, column, text: edits.append((row, column, text)))
+
+    model.set_filter('鹰')
+    assert model.rowCount() == 2
+    assert model.task_at(1)['id'] == '鹰眼'
+
+    # 编辑使用显示的行号，保存前显示编辑后的文本
+    model.setData(model.index(1, COL_NAME), '鹰眼术')
+    assert edits == [(1, COL_NAME, '鹰眼术')]
+    assert model.cell_text(1, COL_NAME) == '鹰眼术'
+
+    manager.start_timer('鹰眼')
+    assert model.cell_text(1, COL_STATUS) == '运行中'
+
+    # 单行同步：保存失败时恢复原值，保存后按新名称重新筛选
+    model.update_task(tasks[2])
+    assert model.cell_text(1, COL_NAME) == '鹰眼'
+    model.update_task(dict(tasks[2], name='鹰眼术'))
+    assert model.cell_text(1, COL_NAME) == '鹰眼术'
+    model.update_task(dict(tasks[2], name='猎手'))
+    assert [model.task_at(row)['id'] for row in range(model.rowCount())] == ['鹰扬诀']
+
+    tasks[1] = dict(tasks[1], name='离火')
+    model.set_tasks(tasks, dirty_ids={'鹰扬诀'})
+    assert model.rowCount() == 0
+
+
+def test_cell_edits_are_validated_per_task(make_manager):
+    manager = make_manager([make_task('离渊', 10, hotkey='f1', hotkey_enabled=True), make_task('鹰扬诀', 20)])
+    config = manager.config_manager
+    task = config.get_tasks()[1]
+    assert edit_changes(COL_DURATION, 'abc') == {'duration': 'abc'}
+    assert config.validate_task({**task.to_dict(), **edit_changes(COL_DURATION, 'abc')}) == ["倒计时必须是正整数"]
+    assert config.validate_task({**task.to_dict(), **edit_changes(COL_HOTKEY, ' F1 ')}) == ["热键 'F1' 已被任务 '离渊' 使用"]
+    assert config.validate_task({**task.to_dict(), **edit_changes(COL_DURATION, '45')}) == []
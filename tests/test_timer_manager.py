@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+计时器场景测试 (虚拟时间)
+"""
+
+from conftest import make_task
+
+
+def record_finished(manager):
+    finished = []
+    manager.timer_finished.connect(finished.append)
+    return finished
+
+
+def test_start_then_expire(make_manager, clock, engine):
+    manager = make_manager([make_task('动愈守中', 70)])
+    finished = record_finished(manager)
+
+    assert manager.start_timer('动愈守中')
+    clock.advance(69.9)
+    assert finished == []
+    assert manager.is_timer_running('动愈守中')
+
+    clock.advance(0.1)
+    assert finished == ['动愈守中']
+    assert not manager.is_timer_running('动愈守中')
+    assert engine.spoken[-1] == '动愈守中 时间到了'
+
+
+def test_start_stop_restart_expire(make_manager, clock, window):
+    manager = make_manager([make_task('启停测试任务', 10)])
+    finished = record_finished(manager)
+
+    manager.start_timer('启停测试任务')
+    clock.advance(3)
+    assert manager.stop_timer('启停测试任务')
+    clock.advance(2)
+    manager.start_timer('启停测试任务')
+
+    # 第一次启动的截止时间 (10 秒) 不能再触发
+    clock.advance(9.9)
+    assert finished == []
+    assert manager.get_remaining_time('启停测试任务') == 0
+
+    clock.advance(0.1)
+    assert finished == ['启停测试任务']
+    assert [title for title, _ in window.notifications] == ['开始计时', '计时停止', '开始计时', '时间到了']
+
+
+def test_restart_while_running_resets_deadline(make_manager, clock):
+    manager = make_manager([make_task('离渊', 6)])
+    finished = record_finished(manager)
+
+    manager.start_timer('离渊')
+    clock.advance(4)
+    manager.start_timer('离渊')
+    clock.advance(4)
+    assert finished == []
+    clock.advance(2)
+    assert finished == ['离渊']
+
+
+def test_expiry_order_is_deterministic(make_manager, clock):
+    manager = make_manager([make_task('a', 5), make_task('b', 3), make_task('c', 5)])
+    finished = record_finished(manager)
+
+    for task_id in ('a', 'b', 'c'):
+        manager.start_timer(task_id)
+    clock.advance(10)
+    assert finished == ['b', 'a', 'c']
+
+
+def test_group_rate_change_keeps_remaining_exact(make_manager, clock):
+    manager = make_manager([make_task('a', 10, group='haste'), make_task('b', 10)])
+    finished = record_finished(manager)
+
+    manager.start_timer('a')
+    manager.start_timer('b')
+    clock.advance(4)
+    manager.set_group_rate('haste', 2.0)
+    assert manager.groups['haste'].remaining('a') == 3.0
+
+    clock.advance(3)
+    assert finished == ['a']
+    manager.reduce_group_remaining('', 2)
+    clock.advance(0.9)
+    assert finished == ['a']
+    clock.advance(0.1)
+    assert finished == ['a', 'b']
+
+
+def test_shared_cooldown_starts_all_members_once(make_manager, clock, window, engine):
+    manager = make_manager([
+        make_task('a', 5, shared_cooldown='gcd'),
+        make_task('b', 8, shared_cooldown='gcd'),
+        make_task('c', 5)
+    ])
+
+    manager.start_timer('a')
+    assert manager.is_timer_running('a') and manager.is_timer_running('b')
+    assert not manager.is_timer_running('c')
+    assert len(window.notifications) == 1
+    assert len(engine.spoken) == 1
+
+
+def test_charges_recharge_sequentially(make_manager, clock):
+    manager = make_manager([make_task('闪现', 10, charges=2)])
+    finished = record_finished(manager)
+
+    assert manager.start_timer('闪现')
+    clock.advance(4)
+    assert manager.start_timer('闪现')
+    assert manager.get_charges('闪现') == (0, 2)
+    assert not manager.start_timer('闪现')
+
+    clock.advance(6)
+    assert manager.get_charges('闪现') == (1, 2)
+    assert manager.get_remaining_time('闪现') == 10
+
+    clock.advance(10)
+    assert finished == ['闪现']
+    assert manager.get_charges('闪现') is None
+
+
+def test_next_display_change_follows_second_boundaries(make_manager, clock):
+    manager = make_manager([make_task('a', 5), make_task('b', 8)])
+    changes = []
+    manager.timers_changed.connect(lambda: changes.append(clock.now()))
+    assert manager.get_next_display_change() is None
+
+    manager.start_timer('a')
+    clock.advance(0.3)
+    manager.start_timer('b')
+    assert changes == [0.0, 0.3]
+    assert abs(manager.get_next_display_change() - 0.7) < 1e-9
+
+    manager.set_group_rate('', 0)
+    assert manager.get_next_display_change() is None
+    assert manager.get_remaining_time('a') == 4
+
+    manager.set_group_rate('', 1)
+    manager.stop_timer('a')
+    manager.stop_timer('b')
+    assert manager.get_next_display_change() is None
+
+
+def test_batch_operations_update_and_notify_once(make_manager, clock, window, engine):
+    manager = make_manager([
+        make_task('a', 5, group='haste'),
+        make_task('b', 8, shared_cooldown='gcd'),
+        make_task('c', 8, shared_cooldown='gcd'),
+        make_task('闪现', 10, charges=2),
+    ])
+    changes = []
+    manager.timers_changed.connect(lambda: changes.append(1))
+
+    assert manager.start_group(['a', 'b', '闪现']) == 4
+    assert sorted(manager.active_timers) == ['a', 'b', 'c', '闪现']
+    assert len(changes) == 1 and len(window.notifications) == 1 and len(engine.spoken) == 1
+    assert engine.spoken[-1] == '4 个技能 开始计时'
+
+    manager.set_group_rate('haste', 0)
+    changes.clear()
+    assert manager.reset_all() == 4
+    assert manager.active_timers == {} and manager.get_group_rate('haste') == 1.0
+    assert len(changes) == 1 and len(window.notifications) == 2 and len(engine.spoken) == 2
+
+    # 重置后旧的截止时间不再触发
+    manager.start_group(['c'])
+    clock.advance(10)
+    assert manager.active_timers == {}
+
+    manager.start_group(['a', 'b'])
+    manager.cleanup()
+    assert manager.active_timers == {}
+    assert engine.spoken[-1] == "3 个技能 开始计时"  # 清理时不再逐个提示停止
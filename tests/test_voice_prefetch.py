@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+语音预取测试 (虚拟时间)
+"""
+
+from conftest import FakeEngine, make_task
+from voice_cache import VoiceCache
+from voice_manager import VoiceManager
+
+
+class FileEngine(FakeEngine):
+    """把语音 "合成" 为文件的假引擎"""
+
+    def __init__(self):
+        super().__init__()
+        self.saved = []
+
+    def save_to_file(self, text, path):
+        self.saved.append(text)
+        with open(path, 'wb') as f:
+            f.write(b'RIFF' + text.encode('utf-8'))
+
+
+class FakePlayer:
+    def __init__(self):
+        self.played = []
+        self.warmed = 0
+
+    def warm(self):
+        self.warmed += 1
+
+    def play(self, data):
+        self.played.append(data)
+
+
+def test_voice_is_prefetched_before_deadline(make_manager, clock, tmp_path):
+    manager = make_manager([make_task('离渊', 10), make_task('鹰扬诀', 20, charges=3)])
+    engine, player = FileEngine(), FakePlayer()
+    manager.voice_manager = VoiceManager(engine=engine, clock=clock, threaded=False,
+                                         cache=VoiceCache(str(tmp_path)), player=player)
+    manager.set_prefetch_lead(2)
+
+    manager.start_timer('离渊')
+    manager.start_timer('鹰扬诀')
+    manager.start_timer('鹰扬诀')  # 用掉两层充能，20 秒后恢复一层
+    clock.advance(7.9)
+    assert engine.saved == []
+    clock.advance(0.1)
+    assert engine.saved == ["离渊 时间到了"] and player.warmed == 1
+
+    clock.advance(2)
+    assert player.played == [b'RIFF' + "离渊 时间到了".encode('utf-8')]
+    assert "离渊 时间到了" not in engine.spoken
+
+    clock.advance(10)
+    assert engine.saved == ["离渊 时间到了", "鹰扬诀 充能 2"]
+    assert len(player.played) == 2
+    stats = manager.voice_manager.get_stats()
+    assert stats['cached']['count'] == 2 and stats['cached']['max_ms'] == 0
+
+
+def test_latency_is_measured_from_scheduled_deadline(make_manager, clock):
+    manager = make_manager([make_task('离渊', 10), make_task('鹰扬诀', 20)])
+    manager.start_timer('离渊')
+    manager.start_timer('鹰扬诀')
+
+    # 定时器晚触发 250 毫秒 (事件循环繁忙)，延迟从计划的到期时刻算起
+    group = manager.get_group('')
+    group.timer.stop()
+    clock.advance(10.25)
+    group.on_timeout()
+    assert manager.voice_manager.get_stats()['synth']['max_ms'] == 250
+
+    # 减少剩余时间导致的到期从操作时刻算起
+    manager.reduce_group_remaining('', 10)
+    assert list(manager.voice_manager.latency.samples['synth']) == [0.25, 0.0]
@@ -1,69 +1,256 @@
+import logging
+import math
 import threading
-import time
-import keyboard
-from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal
 from voice_manager import VoiceManager
+from cooldown_groups import CooldownGroup
+from clock import SystemClock
+from models import TimerState
+from hotkey_matcher import HotkeyMatcher, HotkeyListener
+from hotkey_dispatcher import HotkeyDispatcher
+from event_queue import SpscQueue
+from event_log import event
+from alert_sinks import AlertEvent, EVENT_START, EVENT_STOP, EVENT_WARNING, EVENT_FINISH
+from timer_snapshot import TimerEntry, STATE_RUNNING, STATE_PAUSED
+from task_chains import ChainGraph
+
+logger = logging.getLogger(__name__)
+
 
 class TimerManager(QObject):
     """计时器管理器"""
     timer_finished = pyqtSignal(str)  # 计时器完成信号
+    timers_changed = pyqtSignal()  # 运行中的计时器或剩余时间发生变化
+    timer_event = pyqtSignal(str, str, float)  # (事件类型, task_id, 墙上时间)，供会话历史记录
+    hotkey_events_ready = pyqtSignal()  # 热键队列由空变为非空 (跨线程排队投递)
     
-    def __init__(self, main_window):
+    def __init__(self, main_window, clock=None, voice_manager=None, config_manager=None,
+                 alert_dispatcher=None):
         super().__init__()
         self.main_window = main_window
-        self.voice_manager = VoiceManager()
-        self.active_timers = {}  # 活动的计时器 {task_id: timer_info}
+        self.clock = clock or SystemClock()
+        self.voice_manager = voice_manager or VoiceManager()
+        self.config_manager = config_manager  # 为 None 时每次从配置文件读取
+        self.active_timers = {}  # 活动的计时器 {task_id: TimerState}
+        self.groups = {}  # 冷却分组 {group_name: CooldownGroup}，每组一个虚拟时钟
+        self.alert_dispatcher = alert_dispatcher  # 告警输出插件，为 None 时不发布
+        self.warning_lead = 0.0  # 冷却完毕前多少秒发出预警事件
+        self.prefetch_lead = 0.0  # 冷却完毕前多少秒预先合成提醒语音
         self.hotkey_bindings = {}  # 热键绑定 {hotkey: task_id}
+        self.hotkey_tasks = {}  # 绑定了热键的任务 {task_id: task}
+        self.hotkey_dispatcher = HotkeyDispatcher()
+        self.hotkey_listener = HotkeyListener(self.on_hotkey_pressed, dispatcher=self.hotkey_dispatcher)
+        self.hotkey_queue = SpscQueue()  # 钩子线程 -> 主线程的热键事件
+        self.capture_process = None  # 设置后热键在独立子进程中捕获 (见 capture_process.py)
+        self.snapshot_writer = None  # 设置后把运行中的计时器发布到共享快照 (见 timer_snapshot.py)
+        self.chain_graph = None  # 联动规则事件图，任务列表变化后重建
+        self.chain_tasks = None
+        self.chain_started = None  # 正在执行的联动中已经开始的任务，防止循环
         self.timer_finished.connect(self.on_timer_finished)
+        self.timers_changed.connect(self.publish_snapshot)
+        self.hotkey_events_ready.connect(self.drain_hotkey_events)
         
+    def get_config_manager(self):
+        """获取配置管理器"""
+        if self.config_manager is not None:
+            return self.config_manager
+        from config_manager import ConfigManager
+        return ConfigManager()
+    
     def start_timer(self, task_id):
         """开始计时"""
-        from config_manager import ConfigManager
-        config_manager = ConfigManager()
+        config_manager = self.get_config_manager()
         task = config_manager.get_task_by_id(task_id)
         
         if not task:
             return False
         
-        # 如果已经在运行，先停止
-        if task_id in self.active_timers:
-            self.stop_timer(task_id)
+        # 共享冷却：同组的所有任务一起开始
+        shared = task.get('shared_cooldown', '')
+        if not shared and task.get('charges', 1) > 1:
+            if not self.use_charge(task):
+                return False
+            self.run_chains(EVENT_START, [task_id])
+            return True
         
-        # 创建计时器信息
-        timer_info = {
-            'task': task,
-            'start_time': time.time(),
-            'duration': task['duration'],
-            'timer': QTimer()
-        }
+        if shared:
+            members = [t for t in config_manager.get_tasks() if t.get('shared_cooldown') == shared]
+        else:
+            members = [task]
         
-        # 设置计时器
-        # 使用信号连接方式，确保在主线程中处理
-        timer_info['timer'].timeout.connect(lambda: self.timer_finished.emit(task_id))
-        timer_info['timer'].setSingleShot(True)
-        timer_info['timer'].start(task['duration'] * 1000)  # 转换为毫秒
+        # 如果已经在运行，静默重新开始
+        self.schedule_tasks(members)
         
-        self.active_timers[task_id] = timer_info
+        # 显示开始提示 (共享冷却只提示一次)
+        if len(members) > 1:
+            self.show_shared_start_notification(task, members)
+        else:
+            self.show_start_notification(task)
         
-        # 显示开始提示
-        self.show_start_notification(task)
+        for member in members:
+            logger.info("任务 [%s] 开始计时: %s 秒", member['name'], member['duration'],
+                        extra=event('timer_start', member['id'], duration=member['duration']))
+            self.publish_alert(EVENT_START, member, member['duration'])
+        self.run_chains(EVENT_START, [member['id'] for member in members])
+        return True
+    
+    def schedule_tasks(self, tasks):
+        """把任务加入调度，同一冷却分组只重新设置一次计时器"""
+        by_group = {}
+        for task in tasks:
+            task_id = task['id']
+            group = task.get('group', '')
+            
+            old_info = self.active_timers.get(task_id)
+            if old_info and old_info.group != group:
+                self.groups[old_info.group].cancel(task_id)
+            
+            # 创建计时器信息，截止时间由所属分组的虚拟时钟管理
+            # 充能技能的截止时间是下一层充能恢复的时间
+            max_charges = task.get('charges', 1)
+            self.active_timers[task_id] = TimerState(task, group, max_charges - 1, max_charges)
+            by_group.setdefault(group, []).append((task_id, task['duration']))
+        
+        for group, items in by_group.items():
+            self.get_group(group).schedule_many(items)
+        self.timers_changed.emit()
+    
+    def use_charge(self, task):
+        """使用一层充能，充能依次恢复"""
+        task_id = task['id']
+        timer_info = self.active_timers.get(task_id)
+        
+        if timer_info is None:
+            # 充能已满，开始恢复第一层
+            self.schedule_tasks([task])
+            timer_info = self.active_timers[task_id]
+        elif timer_info.charges > 0:
+            # 正在恢复中，恢复进度不变
+            timer_info.charges -= 1
+            self.timers_changed.emit()
+        else:
+            if task['popup_reminder']:
+                self.main_window.show_notification("充能不足", f"{task['name']} 没有可用充能", task['name'])
+            logger.info("任务 [%s] 没有可用充能", task['name'], extra=event('charge_empty', task_id))
+            return False
         
-        print(f"任务 [{task['name']}] 开始计时: {task['duration']} 秒")
+        self.show_start_notification(task)
+        logger.info("任务 [%s] 使用充能: 剩余 %s/%s", task['name'], timer_info.charges, timer_info.max_charges,
+                    extra=event('charge_use', task_id, charges=timer_info.charges))
+        self.publish_alert(EVENT_START, task, self.groups[timer_info.group].remaining(task_id))
         return True
     
+    def start_group(self, task_ids):
+        """批量开始 (例如爆发轮转)
+
+        所有任务在一次调度中开始 (每个冷却分组只重新设置一次定时器)，
+        只发出一次界面更新和一条汇总通知。返回开始的任务数。
+        """
+        config_manager = self.get_config_manager()
+        all_tasks = config_manager.get_tasks()
+        scheduled, charged, used = {}, [], set()
+        for task_id in task_ids:
+            task = config_manager.get_task_by_id(task_id)
+            if not task or task_id in scheduled:
+                continue
+            shared = task.get('shared_cooldown', '')
+            if shared:
+                for member in all_tasks:
+                    if member.get('shared_cooldown') == shared:
+                        scheduled.setdefault(member['id'], member)
+                continue
+            timer_info = self.active_timers.get(task_id)
+            if task.get('charges', 1) > 1 and timer_info is not None:
+                # 充能恢复中：使用一层充能，恢复进度不变
+                if timer_info.charges > 0 and task_id not in used:
+                    timer_info.charges -= 1
+                    used.add(task_id)
+                    charged.append(task)
+                continue
+            scheduled[task_id] = task
+        
+        started = list(scheduled.values()) + charged
+        if not started:
+            return 0
+        self.schedule_tasks(list(scheduled.values()))
+        
+        for task in started:
+            timer_info = self.active_timers[task['id']]
+            logger.info("任务 [%s] 开始计时: %s 秒", task['name'], task['duration'],
+                        extra=event('timer_start', task['id'], duration=task['duration'], batch=True))
+            self.publish_alert(EVENT_START, task, self.groups[timer_info.group].remaining(task['id']))
+        self.show_summary_notification("开始计时", started, "开始计时")
+        self.run_chains(EVENT_START, [task['id'] for task in started])
+        return len(started)
+    
+    def stop_timers(self, task_ids, notify=True):
+        """批量停止，只发出一次界面更新和一条汇总通知 (notify=False 时不提示)。返回停止的任务数"""
+        stopped = self.remove_timers(task_ids)
+        if not stopped:
+            return 0
+        self.timers_changed.emit()
+        
+        tasks = [timer_info.task for timer_info in stopped]
+        for task in tasks:
+            logger.info("任务 [%s] 计时已停止", task['name'], extra=event('timer_stop', task['id'], batch=True))
+            self.publish_alert(EVENT_STOP, task)
+        if notify:
+            self.show_summary_notification("计时停止", tasks, "计时已停止")
+        return len(stopped)
+    
+    def stop_all(self, notify=True):
+        """停止所有计时器"""
+        return self.stop_timers(list(self.active_timers), notify)
+    
+    def reset_all(self):
+        """重置 (例如团灭后)：停止所有计时器，所有分组恢复正常速率"""
+        stopped = self.remove_timers(list(self.active_timers))
+        for group in self.groups.values():
+            if group.clock.rate != 1.0:
+                group.set_rate(1.0)
+        self.timers_changed.emit()
+        
+        tasks = [timer_info.task for timer_info in stopped]
+        for task in tasks:
+            self.publish_alert(EVENT_STOP, task)
+        logger.info("重置全部计时器: %s 个", len(tasks), extra=event('timer_reset', count=len(tasks)))
+        self.show_summary_notification("全部重置", tasks, "冷却已重置")
+        return len(tasks)
+    
+    def remove_timers(self, task_ids):
+        """移除计时器，每个冷却分组只取消一次，不发出信号。返回移除的 TimerState 列表"""
+        removed = []
+        by_group = {}
+        for task_id in task_ids:
+            timer_info = self.active_timers.pop(task_id, None)
+            if timer_info is not None:
+                removed.append(timer_info)
+                by_group.setdefault(timer_info.group, []).append(task_id)
+        for group, ids in by_group.items():
+            self.groups[group].cancel_many(ids)
+        return removed
+    
+    def get_charges(self, task_id):
+        """获取充能状态 (当前层数, 最大层数)，非充能技能返回 None"""
+        timer_info = self.active_timers.get(task_id)
+        if timer_info is None or timer_info.max_charges <= 1:
+            return None
+        return timer_info.charges, timer_info.max_charges
+    
     def stop_timer(self, task_id):
         """停止计时"""
         if task_id in self.active_timers:
-            timer_info = self.active_timers[task_id]
-            timer_info['timer'].stop()
-            del self.active_timers[task_id]
+            timer_info = self.active_timers.pop(task_id)
+            self.groups[timer_info.group].cancel(task_id)
+            self.timers_changed.emit()
             
-            task = timer_info['task']
-            print(f"任务 [{task['name']}] 计时已停止")
+            task = timer_info.task
+            logger.info("任务 [%s] 计时已停止", task['name'], extra=event('timer_stop', task_id))
+            self.publish_alert(EVENT_STOP, task)
             
             # 显示停止提示
             if task['popup_reminder']:
-                self.main_window.show_notification("计时停止", f"{task['name']} 计时已停止")
+                self.main_window.show_notification("计时停止", f"{task['name']} 计时已停止", task['name'])
             
             if task['voice_reminder']:
                 voice_text = task.get('custom_voice', f"{task['name']} 计时已停止")
@@ -74,6 +261,83 @@ class TimerManager(QObject):
             return True
         return False
     
+    def discard_timer(self, task_id):
+        """静默移除计时器 (任务被删除时使用，不提示)"""
+        timer_info = self.active_timers.pop(task_id, None)
+        if timer_info:
+            self.groups[timer_info.group].cancel(task_id)
+            self.timers_changed.emit()
+            return True
+        return False
+    
+    def apply_task_update(self, task):
+        """任务配置变化时更新运行中的计时器，不重置已经过去的时间"""
+        timer_info = self.active_timers.get(task['id'])
+        if not timer_info:
+            return False
+        
+        timer_info.task = task
+        max_charges = task.get('charges', 1)
+        if max_charges != timer_info.max_charges:
+            timer_info.max_charges = max_charges
+            if timer_info.charges >= max_charges:
+                # 充能上限降低后已经是满的
+                self.discard_timer(task['id'])
+                return True
+        
+        group = task.get('group', '')
+        if task['duration'] != timer_info.duration or group != timer_info.group:
+            # 已经过去的冷却时间 (虚拟时间) 保持不变
+            old_group = self.groups[timer_info.group]
+            elapsed = timer_info.duration - old_group.virtual_remaining(task['id'])
+            old_group.cancel(task['id'])
+            
+            timer_info.duration = task['duration']
+            timer_info.group = group
+            self.get_group(group).schedule(task['id'], max(0, task['duration'] - elapsed))
+            self.timers_changed.emit()
+        return True
+    
+    def get_group(self, name):
+        """获取冷却分组，不存在时创建"""
+        group = self.groups.get(name)
+        if group is None:
+            group = CooldownGroup(name, self.on_deadline, self.clock)
+            group.set_lead('warning', self.warning_lead, self.on_warning)
+            group.set_lead('prefetch', self.prefetch_lead, self.on_prefetch)
+            self.groups[name] = group
+        return group
+    
+    def set_warning_lead(self, seconds):
+        """设置预警提前量 (秒)，对之后开始的计时生效"""
+        self.warning_lead = max(0.0, seconds)
+        for group in self.groups.values():
+            group.set_lead('warning', self.warning_lead, self.on_warning)
+    
+    def set_prefetch_lead(self, seconds):
+        """设置语音预取提前量 (秒)，对之后开始的计时生效"""
+        self.prefetch_lead = max(0.0, seconds)
+        for group in self.groups.values():
+            group.set_lead('prefetch', self.prefetch_lead, self.on_prefetch)
+    
+    def set_group_rate(self, name, rate):
+        """设置分组冷却速率 (例如 1.5 表示冷却加快 50%)，只调整分组时钟"""
+        self.get_group(name).set_rate(rate)
+        self.timers_changed.emit()
+        logger.info("分组 [%s] 冷却速率: %s", name or '默认', rate, extra=event('group_rate', group=name, rate=rate))
+    
+    def get_group_rate(self, name):
+        """获取分组冷却速率"""
+        group = self.groups.get(name)
+        return group.clock.rate if group else 1.0
+    
+    def reduce_group_remaining(self, name, seconds):
+        """分组内所有计时器的剩余时间减少 seconds 秒"""
+        self.get_group(name).reduce_remaining(seconds)
+        self.timers_changed.emit()
+        logger.info("分组 [%s] 剩余时间减少 %s 秒", name or '默认', seconds,
+                    extra=event('group_reduce', group=name, seconds=seconds))
+    
     def is_timer_running(self, task_id):
         """检查计时器是否在运行"""
         return task_id in self.active_timers
@@ -84,28 +348,159 @@ class TimerManager(QObject):
             return 0
         
         timer_info = self.active_timers[task_id]
-        elapsed = time.time() - timer_info['start_time']
-        remaining = max(0, timer_info['duration'] - elapsed)
-        return int(remaining)
+        return int(self.groups[timer_info.group].remaining(task_id))
+    
+    def get_deadline(self, task_id):
+        """截止时间 (clock.now 的单调时间)，暂停或未运行时为 inf"""
+        timer_info = self.active_timers.get(task_id)
+        if timer_info is None:
+            return math.inf
+        return self.groups[timer_info.group].real_deadline(task_id)
+    
+    def get_next_display_change(self):
+        """距离任一剩余秒数显示变化的时间 (秒)，没有需要刷新的计时器时返回 None"""
+        delay = None
+        for task_id, timer_info in self.active_timers.items():
+            group = self.groups[timer_info.group]
+            if group.clock.rate <= 0:
+                continue  # 分组已暂停，显示不会变化
+            remaining = group.remaining(task_id)
+            # 显示的是整数秒，小数部分走完时显示变化
+            step = remaining - math.floor(remaining) or 1.0
+            if delay is None or step < delay:
+                delay = step
+        return delay
+    
+    def get_snapshot_entries(self):
+        """运行中计时器的快照条目 (截止时间为墙上时间，供外部程序读取)"""
+        wall = self.clock.wall()
+        entries = []
+        for task_id, timer_info in self.active_timers.items():
+            group = self.groups[timer_info.group]
+            rate = group.clock.rate
+            remaining = group.remaining(task_id)
+            paused = rate <= 0
+            entries.append(TimerEntry(
+                task_id, timer_info.task['name'],
+                math.inf if paused else wall + remaining,
+                remaining, timer_info.duration, rate,
+                STATE_PAUSED if paused else STATE_RUNNING,
+                timer_info.charges, timer_info.max_charges,
+            ))
+        return entries
+
+    def publish_snapshot(self):
+        """计时器变化时更新共享快照"""
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.publish(self.get_snapshot_entries(), self.clock.wall())
+
+    def on_deadline(self, task_id, deadline, due):
+        """分组时钟到期回调 (deadline 为虚拟截止时间，due 为计划到期的真实时刻)"""
+        timer_info = self.active_timers.get(task_id)
+        if timer_info is None:
+            return
+        
+        timer_info.due = due
+        if timer_info.charges + 1 < timer_info.max_charges:
+            # 恢复一层充能，紧接着从本次截止时间开始恢复下一层
+            timer_info.charges += 1
+            self.groups[timer_info.group].set_deadline(task_id, deadline + timer_info.duration)
+            self.show_charge_notification(timer_info)
+            self.timers_changed.emit()
+            return
+        
+        self.timer_finished.emit(task_id)
+    
+    def on_warning(self, task_id):
+        """即将冷却完毕"""
+        timer_info = self.active_timers.get(task_id)
+        if timer_info is None:
+            return
+        
+        task = timer_info.task
+        remaining = self.groups[timer_info.group].remaining(task_id)
+        logger.info("任务 [%s] 即将冷却完毕: %.1f 秒", task['name'], remaining,
+                    extra=event('timer_warning', task_id, remaining=remaining))
+        self.publish_alert(EVENT_WARNING, task, remaining)
+    
+    def on_prefetch(self, task_id):
+        """即将到期：让语音管理器预先合成到期时要播放的语音"""
+        timer_info = self.active_timers.get(task_id)
+        if timer_info is None or not timer_info.task['voice_reminder']:
+            return
+        if timer_info.charges + 1 < timer_info.max_charges:
+            self.voice_manager.prefetch(self.get_charge_voice_text(timer_info.task, timer_info.charges + 1))
+        else:
+            self.voice_manager.prefetch(self.get_finish_voice_text(timer_info.task))
     
     def on_timer_finished(self, task_id):
         """计时器完成处理"""
         if task_id in self.active_timers:
             timer_info = self.active_timers[task_id]
-            task = timer_info['task']
+            task = timer_info.task
             
             # 清理计时器
             del self.active_timers[task_id]
+            self.timers_changed.emit()
             
             # 显示完成提示
-            self.show_finish_notification(task)
+            self.show_finish_notification(task, timer_info.due)
             
-            print(f"任务 [{task['name']}] 倒计时完成！")
+            logger.info("任务 [%s] 倒计时完成！", task['name'], extra=event('timer_finish', task_id))
+            self.publish_alert(EVENT_FINISH, task)
+            self.run_chains(EVENT_FINISH, [task_id])
+    
+    def get_chain_graph(self):
+        """联动规则事件图 (任务列表快照变化时重建)"""
+        tasks = self.get_config_manager().get_tasks()
+        if tasks is not self.chain_tasks:
+            self.chain_graph = ChainGraph(tasks)
+            self.chain_tasks = tasks
+        return self.chain_graph
+    
+    def run_chains(self, kind, task_ids):
+        """执行联动规则
+
+        在触发事件的处理过程中直接调用 start_timer / stop_timer，与触发事件在同一次调度中完成。
+        保存配置时已经检查过循环；外部修改的配置仍可能有循环，同一轮联动中每个任务最多开始一次。
+        """
+        graph = self.get_chain_graph()
+        actions = [(task_id, action, target) for task_id in task_ids for action, target in graph.actions(kind, task_id)]
+        if not actions:
+            return
+        
+        outermost = self.chain_started is None
+        if outermost:
+            self.chain_started = set(task_ids) if kind == EVENT_START else set()
+        try:
+            for task_id, action, target in actions:
+                logger.info("联动: [%s] %s -> %s [%s]", graph.tasks[task_id]['name'], kind, action,
+                            graph.tasks[target]['name'],
+                            extra=event('chain', task_id, trigger=kind, action=action, target=target))
+                if action == EVENT_START:
+                    if target in self.chain_started:
+                        logger.warning("联动规则形成循环，跳过 [%s]", graph.tasks[target]['name'],
+                                       extra=event('chain_cycle', target))
+                        continue
+                    self.chain_started.add(target)
+                    self.start_timer(target)
+                elif action == EVENT_STOP:
+                    self.stop_timer(target)
+        finally:
+            if outermost:
+                self.chain_started = None
+    
+    def publish_alert(self, kind, task, remaining=0.0):
+        """发布计时器事件：发出 timer_event 信号，并交给告警输出插件 (不阻塞)"""
+        wall = self.clock.wall()
+        self.timer_event.emit(kind, task['id'], wall)
+        if self.alert_dispatcher is not None:
+            self.alert_dispatcher.publish(AlertEvent(kind, task['id'], task['name'], remaining, wall))
     
     def show_start_notification(self, task):
         """显示开始计时通知"""
         if task['popup_reminder']:
-            self.main_window.show_notification("开始计时", f"{task['name']} 开始计时")
+            self.main_window.show_notification("开始计时", f"{task['name']} 开始计时", task['name'])
         
         if task['voice_reminder']:
             voice_text = task.get('custom_voice', f"{task['name']} 开始计时")
@@ -113,61 +508,143 @@ class TimerManager(QObject):
                 voice_text = f"{task['name']} 开始计时"
             self.voice_manager.speak(voice_text)
     
-    def show_finish_notification(self, task):
-        """显示完成通知"""
+    def show_shared_start_notification(self, task, members):
+        """显示共享冷却开始通知 (合并为一条弹窗和一句语音)"""
         if task['popup_reminder']:
-            self.main_window.show_notification("时间到了", f"{task['name']} 时间到了！")
+            names = ", ".join(member['name'] for member in members)
+            self.main_window.show_notification("共享冷却", f"{task['name']} 触发共享冷却: {names}", task['name'])
         
         if task['voice_reminder']:
-            voice_text = task.get('custom_voice', f"{task['name']} 时间到了")
-            if not voice_text:
-                voice_text = f"{task['name']} 时间到了"
+            voice_text = task.get('custom_voice') or f"{task['name']} 共享冷却开始"
             self.voice_manager.speak(voice_text)
     
-    def update_hotkeys(self):
-        """更新热键绑定"""
-        # 清除所有现有热键
-        try:
-            keyboard.unhook_all()
-        except:
-            pass
+    def show_summary_notification(self, title, tasks, action):
+        """批量操作的汇总通知 (合并为一条弹窗和一句语音)"""
+        if not tasks:
+            return
+        names = [task['name'] for task in tasks if task['popup_reminder']]
+        if names:
+            self.main_window.show_notification(title, f"{', '.join(names)} {action}")
+        
+        if any(task['voice_reminder'] for task in tasks):
+            subject = tasks[0]['name'] if len(tasks) == 1 else f"{len(tasks)} 个技能"
+            self.voice_manager.speak(f"{subject} {action}")
+    
+    def show_charge_notification(self, timer_info):
+        """显示充能恢复通知"""
+        task = timer_info.task
+        charges = f"{timer_info.charges}/{timer_info.max_charges}"
+        logger.info("任务 [%s] 恢复一层充能: %s", task['name'], charges,
+                    extra=event('charge_restore', task['id'], charges=timer_info.charges))
         
+        if task['popup_reminder']:
+            self.main_window.show_notification("充能恢复", f"{task['name']} 充能 {charges}", task['name'])
+        
+        if task['voice_reminder']:
+            self.voice_manager.speak(self.get_charge_voice_text(task, timer_info.charges), deadline=timer_info.due)
+    
+    def get_charge_voice_text(self, task, charges):
+        """充能恢复的语音文本"""
+        return f"{task['name']} 充能 {charges}"
+    
+    def show_finish_notification(self, task, due=None):
+        """显示完成通知 (due 为计划到期的时刻，用于统计到期到开始播放的延迟)"""
+        if task['popup_reminder']:
+            self.main_window.show_notification("时间到了", f"{task['name']} 时间到了！", task['name'])
+        
+        if task['voice_reminder']:
+            self.voice_manager.speak(self.get_finish_voice_text(task), deadline=due)
+    
+    def get_finish_voice_text(self, task):
+        """完成提醒的语音文本"""
+        return task.get('custom_voice') or f"{task['name']} 时间到了"
+    
+    def update_hotkeys(self):
+        """更新热键绑定
+
+        只安装一个底层键盘钩子，热键变化时重新编译匹配器并整体替换。
+        """
         self.hotkey_bindings.clear()
+        hotkey_tasks = {}
+        matcher = HotkeyMatcher()
         
-        # 重新绑定热键
-        from config_manager import ConfigManager
-        config_manager = ConfigManager()
-        tasks = config_manager.get_tasks()
+        tasks = self.get_config_manager().get_tasks()
         
         for task in tasks:
             if task['hotkey_enabled'] and task['hotkey']:
                 try:
                     hotkey = task['hotkey'].lower()
+                    matcher.add(hotkey, task['id'])
                     self.hotkey_bindings[hotkey] = task['id']
-                    keyboard.add_hotkey(hotkey, self.on_hotkey_pressed, args=[task['id']])
-                    print(f"绑定热键: {hotkey} -> {task['name']}")
-                except Exception as e:
-                    print(f"热键绑定失败 {task['hotkey']}: {e}")
-    
-    def on_hotkey_pressed(self, task_id):
-        """热键按下处理"""
-        if self.is_timer_running(task_id):
-            # 如果正在运行，则停止
-            # 使用信号在主线程中停止计时器
-            self.main_window.stop_timer_signal.emit(task_id)
-        else:
-            # 如果没有运行，则开始
-            # 使用信号在主线程中启动计时器
-            self.main_window.start_timer_signal.emit(task_id)
+                    hotkey_tasks[task['id']] = task
+                    logger.info("绑定热键: %s -> %s", hotkey, task['name'], extra=event('hotkey_bind', task['id'], hotkey=hotkey))
+                except ValueError as e:
+                    logger.warning("热键绑定失败 %s: %s", task['hotkey'], e, extra=event('hotkey_bind_failed', task['id']))
+        
+        self.hotkey_tasks = hotkey_tasks
+        if self.capture_process is not None:
+            # 子进程捕获模式：只把绑定发给子进程，本进程不安装钩子
+            self.capture_process.set_bindings(self.hotkey_bindings)
+            return
+        
+        self.hotkey_listener.set_matcher(matcher)
+        try:
+            self.hotkey_listener.install()
+        except Exception as e:
+            logger.error("键盘钩子安装失败: %s", e, extra=event('hook_install_failed'))
+    
+    def on_hotkey_pressed(self, task_id, timestamp=None):
+        """热键按下处理 (钩子线程)
+
+        这里只把事件放入队列，是否运行、开始还是停止都在主线程中判断。
+        """
+        if timestamp is None:
+            timestamp = self.clock.wall()
+        
+        if self.hotkey_queue.push((task_id, timestamp)):
+            self.hotkey_events_ready.emit()
+    
+    def drain_hotkey_events(self):
+        """按顺序处理队列中的热键事件 (主线程)"""
+        for task_id, timestamp in self.hotkey_queue.drain():
+            self.handle_hotkey(task_id, timestamp)
+    
+    def handle_hotkey(self, task_id, timestamp):
+        """根据当前状态执行一次热键动作"""
+        task = self.hotkey_tasks.get(task_id)
+        if task is None:
+            return
+        
+        action = self.hotkey_dispatcher.decide(task, self.is_timer_running(task_id), timestamp)
+        if action == 'start':
+            self.start_timer(task_id)
+        elif action == 'stop':
+            self.stop_timer(task_id)
+    
+    def get_hotkey_stats(self):
+        """获取热键分发统计 (被忽略的自动重复与频繁触发次数，以及队列积压情况)"""
+        stats = self.hotkey_dispatcher.get_stats()
+        stats['queue'] = self.hotkey_queue.get_stats()
+        if self.capture_process is not None:
+            stats['capture'] = self.capture_process.get_stats()
+        return stats
     
     def cleanup(self):
         """清理资源"""
-        # 停止所有计时器
-        for task_id in list(self.active_timers.keys()):
-            self.stop_timer(task_id)
+        # 停止所有计时器 (不逐个提示)
+        self.stop_all(notify=False)
         
-        # 清除热键绑定
+        # 卸载键盘钩子
         try:
-            keyboard.unhook_all()
+            self.hotkey_listener.uninstall()
         except:
-            pass
\ No newline at end of file
+            pass
+        
+        if self.capture_process is not None:
+            self.capture_process.stop()
+        
+        if self.alert_dispatcher is not None:
+            self.alert_dispatcher.shutdown()
+        
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.close()
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+运行中计时器的共享快照
+
+TimerManager 把所有运行中的计时器写入一个固定格式的内存映射文件，
+直播叠加层、副屏程序等外部工具直接映射同一个文件读取，不需要和本程序通信。
+
+本模块只依赖标准库，外部工具可以直接复制使用：
+
+    from timer_snapshot import SnapshotReader
+    reader = SnapshotReader("cdtimer_snapshot.bin")
+    for timer in reader.read().timers:
+        print(timer.name, timer.remaining_now())
+
+文件格式 (小端)：
+    头部 64 字节：magic "CDTS"、版本、槽位大小、序号、容量、数量、发布时间、写入进程ID、标志
+    之后是 capacity 个固定大小的槽位，每个槽位一个计时器
+
+写入使用顺序锁：写入前序号加一变为奇数，槽位和头部的其他字段都在奇数期间写入，
+最后单独写入加一后的偶数序号。
+读取方在序号为偶数且读取前后序号相同时得到的才是一致的快照，否则重试。
+"""
+
+import mmap
+import os
+import struct
+import time
+
+SNAPSHOT_FILE = "cdtimer_snapshot.bin"
+MAGIC = b'CDTS'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHQIIdII')
+HEADER_SIZE = 64
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 8
+# 槽位：任务ID、名称 (UTF-8，补零)、截止时间 (墙上时间，暂停时为 inf)、
+# 发布时的剩余秒数、冷却时长、速率、状态、当前充能、最大充能
+SLOT = struct.Struct('<40s64sddddBBB5x')
+
+STATE_RUNNING = 1
+STATE_PAUSED = 2  # 所在冷却分组暂停，剩余时间不变
+
+FLAG_OVERFLOW = 1  # 计时器数量超过容量，只写入了前 capacity 个
+FLAG_CLOSED = 2  # 写入方已退出
+
+
+def _encode(text, size):
+    """编码为固定长度，截断时不切开多字节字符"""
+    data = text.encode('utf-8')[:size]
+    return data.decode('utf-8', errors='ignore').encode('utf-8')
+
+
+class TimerEntry:
+    """快照中的一个计时器"""
+    __slots__ = ('task_id', 'name', 'deadline', 'remaining', 'duration', 'rate', 'state',
+                 'charges', 'max_charges', 'published')
+
+    def __init__(self, task_id, name, deadline, remaining, duration, rate, state,
+                 charges=0, max_charges=1, published=0.0):
+        self.task_id = task_id
+        self.name = name
+        self.deadline = deadline
+        self.remaining = remaining
+        self.duration = duration
+        self.rate = rate
+        self.state = state
+        self.charges = charges
+        self.max_charges = max_charges
+        self.published = published
+
+    def remaining_now(self, now=None):
+        """当前剩余秒数 (暂停时为发布时的剩余时间)"""
+        if self.state == STATE_PAUSED:
+            return self.remaining
+        now = time.time() if now is None else now
+        return max(0.0, self.deadline - now)
+
+    def __repr__(self):
+        return f"TimerEntry(task_id={self.task_id!r}, name={self.name!r}, remaining={self.remaining:.2f})"
+
+
+class Snapshot:
+    """一次一致的读取结果"""
+    __slots__ = ('seq', 'published', 'writer_pid', 'flags', 'timers')
+
+    def __init__(self, seq, published, writer_pid, flags, timers):
+        self.seq = seq
+        self.published = published
+        self.writer_pid = writer_pid
+        self.flags = flags
+        self.timers = timers
+
+    @property
+    def closed(self):
+        return bool(self.flags & FLAG_CLOSED)
+
+
+class SnapshotWriter:
+    """快照写入方 (单个写入者)"""
+
+    def __init__(self, path=SNAPSHOT_FILE, capacity=128):
+        self.path = path
+        self.capacity = capacity
+        self.size = HEADER_SIZE + capacity * SLOT.size
+        self.seq = 0
+        self.publishes = 0
+
+        with open(path, 'wb') as f:
+            f.truncate(self.size)
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self._write_header(0, 0.0, 0)
+
+    def _write_header(self, count, published, flags):
+        """写入头部 (publish / close 中在序号为奇数时调用)"""
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, SLOT.size, self.seq, self.capacity, count,
+                         published, os.getpid(), flags)
+
+    def publish(self, entries, published=None):
+        """写入一组 TimerEntry"""
+        published = time.time() if published is None else published
+        flags = FLAG_OVERFLOW if len(entries) > self.capacity else 0
+        entries = entries[:self.capacity]
+
+        self._begin_write()
+        for i, entry in enumerate(entries):
+            SLOT.pack_into(
+                self.map, HEADER_SIZE + i * SLOT.size,
+                _encode(entry.task_id, 40), _encode(entry.name, 64),
+                entry.deadline, entry.remaining, entry.duration, entry.rate,
+                entry.state, min(entry.charges, 255), min(entry.max_charges, 255),
+            )
+        self._write_header(len(entries), published, flags)
+        self._end_write()
+        self.publishes += 1
+
+    def _begin_write(self):
+        self.seq += 1  # 奇数：正在写入
+        SEQ.pack_into(self.map, SEQ_OFFSET, self.seq)
+
+    def _end_write(self):
+        self.seq += 1  # 偶数：写入完成，最后写入
+        SEQ.pack_into(self.map, SEQ_OFFSET, self.seq)
+
+    def close(self):
+        """标记写入方已退出并释放映射"""
+        if self.map is None:
+            return
+        self._begin_write()
+        self._write_header(0, time.time(), FLAG_CLOSED)
+        self._end_write()
+        self.map.close()
+        self.file.close()
+        self.map = None
+
+
+class SnapshotReader:
+    """快照读取方
+
+    直接在映射的内存上解析，不复制整个文件。
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slot_size, _, capacity, _, _, _, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or slot_size != SLOT.size:
+            self.close()
+            raise ValueError(f"不是可识别的计时器快照文件: {path}")
+        self.capacity = capacity
+        self.retries = 0  # 因写入进行中而重试的次数
+        self.last_seq = None
+
+    def seq(self):
+        """当前序号，可用于判断快照是否变化"""
+        return SEQ.unpack_from(self.map, SEQ_OFFSET)[0]
+
+    def changed(self):
+        """自上次 read() 以来是否有新的快照"""
+        return self.seq() != self.last_seq
+
+    def read(self, timeout=1.0):
+        """读取一份一致的快照，写入方一直在写入 (timeout 秒) 时抛出 TimeoutError"""
+        data = self.map
+        give_up = None
+        while True:
+            _, _, _, seq, _, count, published, writer_pid, flags = HEADER.unpack_from(data, 0)
+            if not seq & 1:
+                with memoryview(data)[HEADER_SIZE:HEADER_SIZE + min(count, self.capacity) * SLOT.size] as view:
+                    slots = list(SLOT.iter_unpack(view))
+                if SEQ.unpack_from(data, SEQ_OFFSET)[0] == seq:
+                    break
+
+            # 写入进行中，让出时间片后重试
+            self.retries += 1
+            now = time.monotonic()
+            if give_up is None:
+                give_up = now + timeout
+            elif now > give_up:
+                raise TimeoutError("快照一直在写入中")
+            time.sleep(0)
+
+        self.last_seq = seq
+        timers = [
+            TimerEntry(task_id.rstrip(b'\0').decode('utf-8'), name.rstrip(b'\0').decode('utf-8'),
+                       deadline, remaining, duration, rate, state, charges, max_charges, published)
+            for task_id, name, deadline, remaining, duration, rate, state, charges, max_charges in slots
+        ]
+        return Snapshot(seq, published, writer_pid, flags, timers)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,117 @@
+"""
+语音预取缓存
+
+计时器到期前 (settings.voice_prefetch_seconds) 把要播放的语音合成为 WAV 文件，
+并读入内存；到期时直接把内存中的 WAV 交给声卡播放，不再等待语音合成。
+播放使用 Windows 自带的 winsound，其他平台上不预取，仍然由语音引擎直接朗读。
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import wave
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+try:
+    import winsound
+    WINSOUND_AVAILABLE = True
+except ImportError:
+    WINSOUND_AVAILABLE = False
+
+
+def silent_wav(milliseconds=20, framerate=22050):
+    """一段静音 WAV (用于预先打开声卡)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(framerate)
+        wav.writeframes(b'\0\0' * (framerate * milliseconds // 1000))
+    return buffer.getvalue()
+
+
+class WavPlayer:
+    """从内存播放 WAV (winsound，同步播放，在语音工作线程中调用)"""
+
+    def __init__(self):
+        self.silence = silent_wav()
+
+    def warm(self):
+        """播放一段静音，让声卡驱动在到期前完成打开和初始化"""
+        winsound.PlaySound(self.silence, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+
+    def play(self, data):
+        winsound.PlaySound(data, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+
+
+class VoiceCache:
+    """语音 WAV 缓存
+
+    合成的文件按文本的哈希保存在 directory 中 (重启后仍可复用)，
+    最近使用的 capacity 段语音保留在内存中。
+    """
+
+    def __init__(self, directory=None, capacity=32):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'cdtimer_voice')
+        self.capacity = capacity
+        self.resident = OrderedDict()  # {文本: WAV 数据}
+
+    def path_for(self, text):
+        """文本对应的 WAV 文件路径"""
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def get(self, text):
+        """内存中的 WAV 数据，没有时返回 None"""
+        data = self.resident.get(text)
+        if data is not None:
+            self.resident.move_to_end(text)
+        return data
+
+    def load(self, text):
+        """把已合成的文件读入内存，文件不存在或为空时返回 None"""
+        data = self.get(text)
+        if data is not None:
+            return data
+        try:
+            with open(self.path_for(text), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data:
+            return None
+        self.resident[text] = data
+        while len(self.resident) > self.capacity:
+            self.resident.popitem(last=False)
+        return data
+
+
+class LatencyStats:
+    """到期到开始播放的延迟统计 (最近 capacity 次，按是否命中预取分开)"""
+
+    def __init__(self, capacity=200):
+        self.samples = {'cached': deque(maxlen=capacity), 'synth': deque(maxlen=capacity)}
+
+    def record(self, cached, seconds):
+        self.samples['cached' if cached else 'synth'].append(seconds)
+
+    def summary(self):
+        """{'cached' / 'synth': {'count', 'p50_ms', 'p95_ms', 'max_ms'}}"""
+        result = {}
+        for kind, samples in self.samples.items():
+            values = sorted(samples)
+            if not values:
+                result[kind] = {'count': 0}
+                continue
+            result[kind] = {
+                'count': len(values),
+                'p50_ms': values[len(values) // 2] * 1000,
+                'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+        return result
@@ -1,24 +1,54 @@
+import logging
 import threading
 import queue
 import time
+from collections import deque
+from event_log import event
+from voice_cache import VoiceCache, WavPlayer, LatencyStats, WINSOUND_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
 try:
     import pyttsx3
     PYTTSX3_AVAILABLE = True
 except ImportError:
     PYTTSX3_AVAILABLE = False
-    print("警告: pyttsx3 未安装，语音功能将不可用")
+    logger.warning("pyttsx3 未安装，语音功能将不可用")
+
+# 语音队列中的预取通知 (预取的文本保存在 prefetch_pending 中，不会被新的语音清除)
+PREFETCH = object()
 
 class VoiceManager:
-    """语音管理器"""
+    """语音管理器
     
-    def __init__(self):
-        self.engine = None
+    engine 可以传入与 pyttsx3 引擎接口相同的对象 (say/runAndWait/stop)，
+    threaded=False 时在调用线程中直接播放，便于测试。
+    prefetch() 在到期前把语音合成到 cache 并读入内存，到期时由 player 直接播放 (见 voice_cache.py)；
+    没有 player 时不预取。
+    """
+    
+    def __init__(self, engine=None, clock=None, threaded=True, cache=None, player=None):
+        self.engine = engine
+        self.clock = clock
+        self.threaded = threaded
         self.voice_queue = queue.Queue()
+        self.prefetch_pending = deque()
         self.is_speaking = False
         self.worker_thread = None
+        self.history = deque(maxlen=50)  # 最近播放的语音 [(时间, 文本)]
+        self.player = player if player is not None else (WavPlayer() if WINSOUND_AVAILABLE else None)
+        self.cache = cache if cache is not None else (VoiceCache() if self.player else None)
+        self.latency = LatencyStats()
+        self.pending_start = None  # 等待引擎开始发声的 (文本, 到期时间)
+        self.reports_start = False  # 引擎是否支持 started-utterance 回调
         
-        if PYTTSX3_AVAILABLE:
+        if engine is None and PYTTSX3_AVAILABLE:
             self.init_engine()
+        if self.engine is not None and hasattr(self.engine, 'connect'):
+            # 合成完成、开始发声时才算开始播放
+            self.engine.connect('started-utterance', self._on_utterance_started)
+            self.reports_start = True
+        if self.engine is not None and threaded:
             self.start_worker()
     
     def init_engine(self):
@@ -37,9 +67,9 @@ class VoiceManager:
                     self.engine.setProperty('voice', voice.id)
                     break
             
-            print("语音引擎初始化成功")
+            logger.info("语音引擎初始化成功", extra=event('voice_init'))
         except Exception as e:
-            print(f"语音引擎初始化失败: {e}")
+            logger.error("语音引擎初始化失败: %s", e, extra=event('voice_init_failed'))
             self.engine = None
     
     def start_worker(self):
@@ -52,43 +82,118 @@ class VoiceManager:
         """工作线程，处理语音队列"""
         while True:
             try:
-                text = self.voice_queue.get(timeout=1)
-                if text is None:  # 退出信号
+                item = self.voice_queue.get(timeout=1)
+                if item is None:  # 退出信号
                     break
                 
-                self._speak_now(text)
+                if item is not PREFETCH:
+                    self._speak_now(*item)
                 self.voice_queue.task_done()
                 
+                # 没有待播放的语音时处理预取
+                while self.prefetch_pending and self.voice_queue.empty():
+                    self._prefetch_now(self.prefetch_pending.popleft())
+                
             except queue.Empty:
                 continue
             except Exception as e:
-                print(f"语音播放错误: {e}")
+                logger.error("语音播放错误: %s", e, extra=event('voice_error'))
+    
+    def now(self):
+        return self.clock.now() if self.clock else time.monotonic()
     
-    def _speak_now(self, text):
-        """立即播放语音"""
+    def _speak_now(self, text, deadline=None):
+        """立即播放语音，deadline 为到期时间时记录到期到开始播放的延迟"""
         if not self.engine:
-            print(f"语音播放 (引擎不可用): {text}")
+            logger.info("语音播放 (引擎不可用): %s", text, extra=event('voice_skip', reason='engine'))
             return
         
         try:
             self.is_speaking = True
-            print(f"语音播放: {text}")
+            data = self.cache.get(text) if self.cache is not None and self.player is not None else None
+            self.history.append((self.now(), text))
             
-            self.engine.say(text)
-            self.engine.runAndWait()
+            if data is not None:
+                self._log_started(text, deadline, True)
+                self.player.play(data)
+            else:
+                if self.reports_start:
+                    self.pending_start = (text, deadline)  # 引擎开始发声时记录
+                else:
+                    self._log_started(text, deadline, False)
+                self.engine.say(text)
+                self.engine.runAndWait()
             
         except Exception as e:
-            print(f"语音播放失败: {e}")
+            logger.error("语音播放失败: %s", e, extra=event('voice_failed'))
         finally:
             self.is_speaking = False
+            self.pending_start = None
     
-    def speak(self, text):
-        """添加文本到语音队列"""
+    def _on_utterance_started(self, name=None):
+        """pyttsx3 的 started-utterance 回调 (引擎开始发声)"""
+        if self.pending_start is not None:
+            text, deadline = self.pending_start
+            self.pending_start = None
+            self._log_started(text, deadline, False)
+    
+    def _log_started(self, text, deadline, cached):
+        """记录开始播放，deadline 不为 None 时统计到期到开始播放的延迟"""
+        if deadline is None:
+            logger.info("语音播放: %s", text, extra=event('voice_speak', cached=cached))
+            return
+        latency = max(0.0, self.now() - deadline)
+        self.latency.record(cached, latency)
+        logger.info("语音播放: %s (延迟 %.1f 毫秒)", text, latency * 1000,
+                    extra=event('voice_speak', cached=cached, latency_ms=round(latency * 1000, 1)))
+    
+    def _prefetch_now(self, text):
+        """合成语音文件并读入内存，然后预先打开声卡"""
+        try:
+            if self.cache.load(text) is None:
+                start = time.perf_counter()
+                path = self.cache.path_for(text)
+                self.engine.save_to_file(text, path)
+                self.engine.runAndWait()
+                if self.cache.load(text) is None:
+                    logger.warning("语音预取失败: %s", text, extra=event('voice_prefetch_failed'))
+                    return
+                logger.debug("语音已预取: %s (%.0f 毫秒)", text, (time.perf_counter() - start) * 1000,
+                             extra=event('voice_prefetch'))
+            self.player.warm()
+        except Exception as e:
+            logger.error("语音预取失败: %s", e, extra=event('voice_prefetch_failed'))
+    
+    def prefetch(self, text):
+        """预先合成即将播放的语音 (到期前调用)"""
+        text = text.strip() if text else ''
+        if (not text or self.engine is None or self.cache is None or self.player is None
+                or not hasattr(self.engine, 'save_to_file')):
+            return
+        
+        if not self.threaded:
+            self._prefetch_now(text)
+            return
+        
+        self.prefetch_pending.append(text)
+        self.voice_queue.put(PREFETCH)
+        self.start_worker()
+    
+    def get_stats(self):
+        """到期到开始播放的延迟统计 (见 LatencyStats.summary)"""
+        return self.latency.summary()
+    
+    def speak(self, text, deadline=None):
+        """添加文本到语音队列 (deadline 为到期时间，用于统计延迟)"""
         if not text or not text.strip():
             return
         
-        if not PYTTSX3_AVAILABLE:
-            print(f"语音播放 (功能不可用): {text}")
+        if self.engine is None and not PYTTSX3_AVAILABLE:
+            logger.info("语音播放 (功能不可用): %s", text, extra=event('voice_skip', reason='unavailable'))
+            return
+        
+        if not self.threaded:
+            self._speak_now(text.strip(), deadline)
             return
         
         # 清空队列，只播放最新的语音
@@ -98,7 +203,7 @@ class VoiceManager:
             except queue.Empty:
                 break
         
-        self.voice_queue.put(text.strip())
+        self.voice_queue.put((text.strip(), deadline))
         
         # 确保工作线程在运行
         self.start_worker()
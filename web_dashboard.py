@@ -0,0 +1,329 @@
+"""
+局域网网页面板
+
+内置一个小型 HTTP 服务器，手机或平板打开 http://<电脑IP>:<端口>/ 即可查看冷却状态。
+计时器的变化通过 Server-Sent Events (/events) 以增量推送，不需要轮询完整状态：
+    snapshot  连接时 (或客户端落后太多时) 的完整状态
+    timer     新增或变化的计时器
+    remove    移除的计时器
+    start / stop / warning / finish  计时器事件
+
+每次变化只在 Qt 主线程中计算和编码一次，写入共享的广播缓冲区；
+每个客户端由服务器的独立线程服务，只从缓冲区读取，不会访问 Qt 线程。
+"""
+
+import collections
+import json
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from event_log import event
+from timer_snapshot import STATE_PAUSED
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 15.0  # 没有变化时发送注释行，避免连接被中间设备断开
+
+
+def entry_to_dict(entry):
+    """TimerEntry -> JSON 字典 (暂停时截止时间为 None)"""
+    paused = entry.state == STATE_PAUSED
+    return {
+        'task_id': entry.task_id,
+        'name': entry.name,
+        'deadline': None if paused or math.isinf(entry.deadline) else round(entry.deadline, 3),
+        'remaining': round(entry.remaining, 3),
+        'duration': entry.duration,
+        'rate': entry.rate,
+        'state': 'paused' if paused else 'running',
+        'charges': entry.charges,
+        'max_charges': entry.max_charges,
+    }
+
+
+def timer_key(entry, deadline):
+    """判断计时器是否变化的比较值
+
+    运行中的计时器比较单调时钟的截止时间 deadline (剩余时间每次都不同，墙上时间的截止时间会随时钟校准漂移)；
+    暂停时比较冻结的剩余时间。墙上时间只在发送时由 entry_to_dict 换算。
+    """
+    paused = entry.state == STATE_PAUSED
+    return (entry.name, entry.state, entry.remaining if paused else deadline,
+            entry.duration, entry.rate, entry.charges, entry.max_charges)
+
+
+def format_sse(name, data, seq=None):
+    """编码为一条 SSE 消息"""
+    lines = [f"event: {name}"]
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+
+class Broadcaster:
+    """所有客户端共享的广播缓冲区
+
+    消息只编码一次，保存在有界队列中，每个客户端记录自己读到的序号。
+    客户端落后超过缓冲区容量时重新发送完整状态。
+    """
+
+    def __init__(self, capacity=256, wall=time.time):
+        self.condition = threading.Condition()
+        self.messages = collections.deque(maxlen=capacity)  # [(序号, 编码后的消息)]
+        self.seq = 0
+        self.state = {}  # 当前状态 {task_id: 字典}，供新客户端使用
+        self.wall = wall  # 墙上时间，随完整状态发送给客户端用于校正时差
+        self.closed = False
+        self.published = 0
+        self.resyncs = 0
+
+    def publish(self, messages, state=None):
+        """发布一组 (事件名, 数据)，可同时更新当前状态"""
+        with self.condition:
+            for name, data in messages:
+                self.seq += 1
+                self.messages.append((self.seq, format_sse(name, data, self.seq)))
+            if state is not None:
+                self.state = state
+            self.published += len(messages)
+            self.condition.notify_all()
+
+    def get_state(self):
+        """(序号, 完整状态)"""
+        with self.condition:
+            return self.seq, {'server_time': self.wall(), 'timers': list(self.state.values())}
+
+    def snapshot(self):
+        """(序号, 完整状态消息)"""
+        seq, data = self.get_state()
+        return seq, format_sse('snapshot', data, seq)
+
+    def wait(self, after, timeout):
+        """等待序号 after 之后的消息
+
+        返回消息列表 (超时为空列表)；客户端已经落后、需要重新同步时返回 None。
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq > after or self.closed, timeout):
+                return []
+            if self.closed:
+                return []
+            if self.messages[0][0] > after + 1:
+                self.resyncs += 1
+                return None
+            return [message for seq, message in self.messages if seq > after]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>技能倒计时</title>
+<style>
+body { background: #1e1e1e; color: #eee; font-family: sans-serif; margin: 0; padding: 12px; }
+.timer { background: #2d2d2d; border-radius: 6px; margin-bottom: 8px; padding: 10px 12px; position: relative; overflow: hidden; }
+.bar { position: absolute; left: 0; top: 0; bottom: 0; background: #2f5f8f; z-index: 0; }
+.row { position: relative; display: flex; justify-content: space-between; font-size: 22px; }
+.paused .bar { background: #666; }
+.flash { animation: flash 1s; }
+@keyframes flash { from { background: #8f6f2f; } }
+#status { color: #888; font-size: 13px; margin-bottom: 8px; }
+</style></head><body>
+<div id="status">连接中…</div><div id="timers"></div>
+<script>
+const timers = new Map();
+let offset = 0;  // 服务器时间 - 本机时间
+const box = document.getElementById('timers'), status = document.getElementById('status');
+
+function remaining(t) {
+  return t.deadline === null ? t.remaining : Math.max(0, t.deadline - (Date.now() / 1000 + offset));
+}
+function render() {
+  const items = [...timers.values()].sort((a, b) => remaining(a) - remaining(b));
+  box.innerHTML = '';
+  for (const t of items) {
+    const left = remaining(t), div = document.createElement('div');
+    div.className = 'timer' + (t.state === 'paused' ? ' paused' : '') + (t.flash ? ' flash' : '');
+    const charges = t.max_charges > 1 ? ` (${t.charges}/${t.max_charges})` : '';
+    div.innerHTML = `<div class="bar" style="width:${Math.min(100, left / t.duration * 100)}%"></div>
+      <div class="row"><span></span><span>${Math.ceil(left)} 秒</span></div>`;
+    div.querySelector('span').textContent = t.name + charges;
+    box.appendChild(div);
+    t.flash = false;
+  }
+  if (!items.length) box.innerHTML = '<div style="color:#888">没有运行中的计时器</div>';
+}
+const source = new EventSource('/events');
+source.addEventListener('snapshot', e => {
+  const data = JSON.parse(e.data);
+  offset = data.server_time - Date.now() / 1000;
+  timers.clear();
+  for (const t of data.timers) timers.set(t.task_id, t);
+  status.textContent = '已连接';
+  render();
+});
+source.addEventListener('timer', e => { const t = JSON.parse(e.data); timers.set(t.task_id, t); render(); });
+source.addEventListener('remove', e => { timers.delete(JSON.parse(e.data).task_id); render(); });
+source.addEventListener('start', e => { const t = timers.get(JSON.parse(e.data).task_id); if (t) t.flash = true; });
+source.onerror = () => { status.textContent = '连接断开，正在重连…'; };
+setInterval(render, 250);
+</script></body></html>
+""".encode('utf-8')
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """每个连接在服务器的独立线程中处理"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/':
+            self._send(200, 'text/html; charset=utf-8', PAGE)
+        elif path == '/state':
+            _, data = self.server.broadcaster.get_state()
+            self._send(200, 'application/json; charset=utf-8', json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        elif path == '/events':
+            self._stream()
+        else:
+            self._send(404, 'text/plain; charset=utf-8', b'not found')
+
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        server = self.server
+        if not server.acquire_client():
+            self._send(503, 'text/plain; charset=utf-8', "连接数已满".encode('utf-8'))
+            return
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+
+            broadcaster = server.broadcaster
+            cursor, message = broadcaster.snapshot()
+            self.wfile.write(message)
+            self.wfile.flush()
+            while not broadcaster.closed:
+                messages = broadcaster.wait(cursor, KEEPALIVE_INTERVAL)
+                if messages is None:
+                    # 落后太多，重新发送完整状态
+                    cursor, message = broadcaster.snapshot()
+                    messages = [message]
+                elif messages:
+                    cursor += len(messages)
+                else:
+                    messages = [b": keepalive\n\n"]
+                self.wfile.write(b"".join(messages))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass  # 客户端断开
+        finally:
+            server.release_client()
+
+    def log_message(self, format, *args):
+        logger.debug("面板请求 %s: " + format, self.client_address[0], *args)
+
+
+class DashboardHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, broadcaster, max_clients):
+        super().__init__(address, DashboardHandler)
+        self.broadcaster = broadcaster
+        self.max_clients = max_clients
+        self.clients = 0
+        self.clients_lock = threading.Lock()
+
+    def acquire_client(self):
+        with self.clients_lock:
+            if self.clients >= self.max_clients:
+                return False
+            self.clients += 1
+            return True
+
+    def release_client(self):
+        with self.clients_lock:
+            self.clients -= 1
+
+
+class DashboardServer:
+    """把 TimerManager 的变化转换为增量消息，并运行 HTTP 服务器
+
+    on_timers_changed / on_timer_event 在 Qt 主线程中调用，每次变化只计算一次。
+    """
+
+    def __init__(self, timer_manager, port, host='127.0.0.1', max_clients=32, capacity=256):
+        self.timer_manager = timer_manager
+        self.broadcaster = Broadcaster(capacity, timer_manager.clock.wall)
+        self.state = {}  # {task_id: 最近发送的字典}
+        self.keys = {}  # {task_id: timer_key}
+        self.httpd = DashboardHTTPServer((host, port), self.broadcaster, max_clients)
+        self.port = self.httpd.server_address[1]
+        self.thread = None
+
+    def start(self):
+        self.timer_manager.timers_changed.connect(self.on_timers_changed)
+        self.timer_manager.timer_event.connect(self.on_timer_event)
+        self.on_timers_changed()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="web-dashboard", daemon=True)
+        self.thread.start()
+        logger.info("网页面板已启动: http://%s:%s/", self.httpd.server_address[0], self.port,
+                    extra=event('dashboard_start', port=self.port))
+
+    def on_timers_changed(self):
+        """计算与上次相比变化的计时器，只有变化的计时器重新编码"""
+        state = {}
+        keys = {}
+        messages = []
+        for entry in self.timer_manager.get_snapshot_entries():
+            key = timer_key(entry, self.timer_manager.get_deadline(entry.task_id))
+            keys[entry.task_id] = key
+            if self.keys.get(entry.task_id) == key:
+                state[entry.task_id] = self.state[entry.task_id]
+            else:
+                state[entry.task_id] = entry_to_dict(entry)
+                messages.append(('timer', state[entry.task_id]))
+        messages += [('remove', {'task_id': task_id}) for task_id in self.state if task_id not in state]
+        self.state = state
+        self.keys = keys
+        if messages:
+            self.broadcaster.publish(messages, state)
+
+    def on_timer_event(self, kind, task_id, wall):
+        self.broadcaster.publish([(kind, {'task_id': task_id, 'wall': wall})])
+
+    def stop(self):
+        """断开所有客户端并停止服务器"""
+        if self.thread is None:
+            return
+        self.broadcaster.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread = None
+        try:
+            self.timer_manager.timers_changed.disconnect(self.on_timers_changed)
+            self.timer_manager.timer_event.disconnect(self.on_timer_event)
+        except TypeError:
+            pass
+
+    def get_stats(self):
+        return {
+            'clients': self.httpd.clients,
+            'published': self.broadcaster.published,
+            'resyncs': self.broadcaster.resyncs,
+        }